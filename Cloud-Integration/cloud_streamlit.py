@@ -1,21 +1,30 @@
 import os
 import streamlit as st
-from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
 import dropbox
+from credentials import CredentialStore, dropbox_client, google_auth
+from download_engine import DownloadEngine
+from drive_backend import DriveBackend
+from dropbox_manifest import list_dropbox_tree
+from resumable_download import RESUMABLE_THRESHOLD, download_resumable, http_range_opener
+from sync_state import SyncState
 
 
 script_directory = os.path.dirname(os.path.realpath(__file__))
 client_secrets_path = os.path.join(script_directory, 'client_secrets.json')
+credential_store = CredentialStore(os.path.join(script_directory, 'credentials'))
 
 
+@st.experimental_singleton
 def authenticate():
-    """Authenticate with Google Drive and return the drive instance."""
-    gauth = GoogleAuth()
-    gauth.DEFAULT_SETTINGS['client_config_file'] = client_secrets_path
-    gauth.LocalWebserverAuth()
-    drive = GoogleDrive(gauth)
-    return drive
+    """Authenticate with Google Drive once per process and return the shared drive instance."""
+    return GoogleDrive(google_auth(client_secrets_path, credential_store))
+
+
+@st.experimental_singleton
+def get_dropbox_client(access_token=None, refresh_token=None, app_key=None, app_secret=None):
+    """Return the shared Dropbox client for these credentials, created on first use."""
+    return dropbox_client(access_token, refresh_token, app_key, app_secret)
 
 
 def extract_folder_id(folder_link):
@@ -28,10 +37,26 @@ def extract_folder_id(folder_link):
         return None
 
 
-def download_folder(folder_link, destination_path, folder_name):
-    """Download files from a Google Drive folder."""
+def format_progress(snapshot):
+    """Format an aggregated download progress snapshot for display."""
+    megabytes_done = snapshot['bytes_done'] / (1024 * 1024)
+    megabytes_total = snapshot['bytes_total'] / (1024 * 1024)
+    return (f"Files: {snapshot['files_done']}/{snapshot['files_total']}  "
+            f"Data: {megabytes_done:.1f}/{megabytes_total:.1f} MB  Failed: {snapshot['failed']}")
+
+
+def download_folder(folder_link, destination_path, folder_name, workers=8, retries=3, backend=None, sync=False,
+                    delete_removed=False):
+    """
+    Download files from a Google Drive folder with parallel transfers and per-file retry.
+
+    With sync, files whose md5Checksum and size match the local state database and whose local
+    copy is untouched are skipped; with delete_removed, local files that were removed from the
+    folder are deleted.
+    """
     try:
-        drive = authenticate()
+        if backend is None:
+            backend = DriveBackend(authenticate())
 
         
         folder_id = extract_folder_id(folder_link)
@@ -40,9 +65,7 @@ def download_folder(folder_link, destination_path, folder_name):
             st.write(f"Folder ID: {folder_id}")
 
             
-            query = f"'{folder_id}' in parents and trashed=false and mimeType != 'application/vnd.google-apps.folder'"
-
-            file_list = drive.ListFile({'q': query}).GetList()
+            file_list = backend.list_files(folder_id)
 
             
             if file_list:
@@ -50,11 +73,38 @@ def download_folder(folder_link, destination_path, folder_name):
                 local_folder_path = os.path.join(destination_path, folder_name)
                 os.makedirs(local_folder_path, exist_ok=True)
 
-                for drive_file in file_list:
-                    original_file_name = drive_file['title']
-                    file_path = os.path.join(local_folder_path, original_file_name)
-                    drive_file.GetContentFile(file_path)
-
+                with SyncState(local_folder_path) as state:
+                    if delete_removed:
+                        deleted = state.delete(state.removed(backend.name(drive_file) for drive_file in file_list))
+                        st.write(f"{len(deleted)} file(s) removed from the folder were deleted locally.")
+                    if sync:
+                        changed = [drive_file for drive_file in file_list
+                                   if not state.is_current(backend.name(drive_file), backend.revision(drive_file),
+                                                           backend.content_hash(drive_file), backend.size(drive_file))]
+                        st.write(f"{len(file_list) - len(changed)} unchanged file(s) skipped.")
+                        file_list = changed
+
+                    tasks = [(drive_file, os.path.join(local_folder_path, backend.name(drive_file)),
+                              backend.name(drive_file)) for drive_file in file_list]
+                    progress_bar = st.progress(0)
+                    status = st.empty()
+
+                    def show_progress(snapshot):
+                        total = snapshot['bytes_total'] or snapshot['files_total']
+                        done = snapshot['bytes_done'] if snapshot['bytes_total'] else snapshot['files_done']
+                        progress_bar.progress(min(1.0, done / total) if total else 1.0)
+                        status.text(format_progress(snapshot))
+
+                    def record(task):
+                        drive_file = task[0]
+                        state.record(backend.name(drive_file), backend.revision(drive_file),
+                                     backend.content_hash(drive_file), backend.size(drive_file))
+
+                    progress = DownloadEngine(backend, workers, retries).download(tasks, show_progress,
+                                                                                  on_file_done=record)
+
+                if progress.failed:
+                    st.error(f"{len(progress.failed)} file(s) failed to download: " + ", ".join(sorted(progress.failed)))
                 st.success(f"{folder_name} is downloaded at {local_folder_path}")
             else:
                 st.error("User is not authorized to download.")
@@ -64,65 +114,51 @@ def download_folder(folder_link, destination_path, folder_name):
         st.error(f"Error: {e}")
 
 
-def download_from_dropbox():
-    """Download files from Dropbox."""
+def dropbox_sync_path(entry):
+    """Relative local path of a Dropbox manifest entry, as used by the sync state."""
+    return entry.path.lstrip("/")
+
+
+def changed_dropbox_files(manifest, state):
+    """Return the manifest entries that are new or changed since they were last downloaded."""
+    return [entry for entry in manifest.files
+            if not state.is_current(dropbox_sync_path(entry), entry.rev, entry.content_hash, entry.size)]
+
+
+def download_dropbox_file(entry, downloadto):
+    """Download one Dropbox file; large files are streamed with resumable range requests."""
+    if entry.size >= RESUMABLE_THRESHOLD:
+        link = dbx.files_get_temporary_link(entry.path).link
+        download_resumable(http_range_opener(link), downloadto, entry.size, key=entry.rev)
+    else:
+        dbx.files_download_to_file(downloadto, entry.path)
+
+
+def download_from_dropbox(manifest, state, files=None):
+    """Download the files of a Dropbox manifest, keeping the folder structure and recording them in the sync state."""
     global currentcount
-    for entry in dbx.files_list_folder(dropbox_download_dir, include_non_downloadable_files=False).entries:
-        if "." in entry.name: 
-            currentcount += 1
-            newpath = os.path.join(local_download_path, dropbox_download_dir)
-            os.makedirs(newpath, exist_ok=True)
-            downloadto = os.path.abspath(os.path.join(local_download_path, dropbox_download_dir, entry.name))
-            filedir = os.path.join(dropbox_download_dir, entry.name)
-            try:
-                dbx.files_download_to_file(downloadto, filedir)
-                st.write(f"Downloaded {entry.name}! \nCount: {currentcount}/{totalcount}")
-            except dropbox.exceptions.ApiError:
-                st.write(f"Failed to download file: {entry.name}\nReason: API Error")
-        else:
-            try:
-                st.download(os.path.join(dropbox_download_dir, entry.name))
-            except dropbox.exceptions.ApiError:
-                currentcount += 1
-                newpath = os.path.join(local_download_path, dropbox_download_dir)
-                os.makedirs(newpath, exist_ok=True)
-                downloadto = os.path.abspath(os.path.join(local_download_path, dropbox_download_dir, entry.name))
-                filedir = os.path.join(dropbox_download_dir, entry.name)
-                try:
-                    dbx.files_download_to_file(downloadto, filedir)
-                    st.write(f"Downloaded {entry.name}! \nCount: {currentcount}/{totalcount}")
-                except dropbox.exceptions.ApiError:
-                    st.write(f"Failed to download file: {entry.name}\nReason: API Error")
-
-
-def get_file_count(path):
-    """Recursively get the total file count from Dropbox."""
-    count = 0
-    for entry in dbx.files_list_folder(path, include_non_downloadable_files=False).entries:
-        if "." in entry.name:  
-            count += 1
-        else:
-            try:
-                count += get_file_count(os.path.join(path, entry.name))
-            except dropbox.exceptions.ApiError:
-                count += 1
-    return count
-
-
-def validate_dropbox():
-    """Validate downloaded files from Dropbox."""
-    skipped = []
-    for entry in dbx.files_list_folder(dropbox_download_dir, include_non_downloadable_files=False).entries:
-        if "." in entry.name: 
-            if not os.path.exists(os.path.abspath(os.path.join(local_download_path, dropbox_download_dir, entry.name))):
-                skipped.append(os.path.join(dropbox_download_dir, entry.name))
-        else:
-            try:
-                skipped.extend(validate_dropbox(os.path.join(dropbox_download_dir, entry.name)))
-            except dropbox.exceptions.ApiError:
-                if not os.path.exists(os.path.abspath(os.path.join(local_download_path, dropbox_download_dir, entry.name))):
-                    skipped.append(os.path.join(dropbox_download_dir, entry.name))
-    return skipped
+    for entry in manifest.files if files is None else files:
+        currentcount += 1
+        downloadto = manifest.local_path(entry, local_download_path)
+        os.makedirs(os.path.dirname(downloadto), exist_ok=True)
+        try:
+            download_dropbox_file(entry, downloadto)
+            state.record(dropbox_sync_path(entry), entry.rev, entry.content_hash, entry.size)
+            st.write(f"Downloaded {entry.path}! \nCount: {currentcount}/{totalcount}")
+        except dropbox.exceptions.ApiError:
+            st.write(f"Failed to download file: {entry.path}\nReason: API Error")
+        except Exception as e:
+            st.write(f"Failed to download file: {entry.path}\nReason: {e} (the download resumes on the next run)")
+
+
+def get_file_count(manifest):
+    """Get the total file count of a Dropbox manifest."""
+    return len(manifest)
+
+
+def validate_dropbox(manifest):
+    """Validate downloaded files from Dropbox against the manifest."""
+    return manifest.missing(local_download_path)
 
 st.title("Cloud Storage File Downloader")
 
@@ -141,19 +177,38 @@ if selected_page == "Home":
         folder_link = st.text_input("Enter Google Drive Folder Link:")
         destination_path = st.text_input("Enter Destination Path:", key='destination_path', value=os.getcwd(), type='default')
         folder_name = st.text_input("Enter Folder Name:")
+        parallel_downloads = st.number_input("Parallel downloads:", min_value=1, max_value=64, value=8)
+        sync_only_changed = st.checkbox("Only download new or changed files", value=True)
+        delete_removed = st.checkbox("Delete local files removed from the folder", value=False)
 
         
         if st.button("Download Folder"):
             if folder_link and destination_path and folder_name:
-                download_folder(folder_link, destination_path, folder_name)
+                download_folder(folder_link, destination_path, folder_name, workers=int(parallel_downloads),
+                                sync=sync_only_changed, delete_removed=delete_removed)
 
     
     elif selected_service == "Dropbox":
         st.title("Dropbox Downloader")
 
         
-        dropbox_token = st.text_input("Enter your Dropbox access token:", help="Follow the steps in the Help page to obtain your Dropbox access token.")
-        if not dropbox_token:
+        dropbox_token = st.text_input("Enter your Dropbox access token:", type="password", help="Follow the steps in the Help page to obtain your Dropbox access token.")
+        saved_credentials = credential_store.load('dropbox')
+        with st.expander("Long-lived access (refresh token)"):
+            app_key = st.text_input("App key:", value=saved_credentials.get('app_key', ''))
+            app_secret = st.text_input("App secret (optional):", type="password")
+            refresh_token = st.text_input("Refresh token:", type="password",
+                                          help="Used instead of the access token; saved on this computer with the button below.")
+            entered_credentials = {'app_key': app_key, 'app_secret': app_secret or None, 'refresh_token': refresh_token}
+            # Saving is a separate action, so forgetting is not undone by the fields still holding the values.
+            if refresh_token and app_key and st.button("Save Dropbox credentials"):
+                credential_store.save('dropbox', entered_credentials)
+                saved_credentials = entered_credentials
+            if saved_credentials and st.button("Forget saved Dropbox credentials"):
+                credential_store.clear('dropbox')
+                saved_credentials = {}
+        dropbox_credentials = entered_credentials if refresh_token and app_key else saved_credentials
+        if not dropbox_token and not dropbox_credentials.get('refresh_token'):
             st.warning("Please enter your Dropbox access token.")
             st.stop()
 
@@ -171,23 +226,42 @@ if selected_page == "Home":
         }
 
         local_download_path = settings["local-download-path"]
-        dbx = dropbox.Dropbox(settings["access-token"])
+        sync_only_changed = st.checkbox("Only download new or changed files", value=True)
+        delete_removed = st.checkbox("Delete local files removed from Dropbox", value=False)
+        if dropbox_credentials.get('refresh_token'):
+            dbx = get_dropbox_client(None, dropbox_credentials['refresh_token'], dropbox_credentials['app_key'],
+                                     dropbox_credentials.get('app_secret'))
+        else:
+            dbx = get_dropbox_client(settings["access-token"])
         st.write("Logged in.")
 
         
-        st.write("Getting total file count...")
-        totalcount = get_file_count(dropbox_download_dir)
+        st.write("Listing files...")
+        manifest = list_dropbox_tree(dbx, dropbox_download_dir)
+        os.makedirs(local_download_path, exist_ok=True)
+        manifest.save(os.path.join(local_download_path, "dropbox_manifest.json"))
+        totalcount = get_file_count(manifest)
         st.write("Done. Total files: ", totalcount)
 
-        
-        st.write("Starting downloads...")
-        currentcount = 0
-        download_from_dropbox()
+        with SyncState(local_download_path) as state:
+            if delete_removed:
+                deleted = state.delete(state.removed((dropbox_sync_path(entry) for entry in manifest.files),
+                                                    dropbox_download_dir))
+                st.write(f"{len(deleted)} file(s) removed from Dropbox were deleted locally.")
+            files = manifest.files
+            if sync_only_changed:
+                files = changed_dropbox_files(manifest, state)
+                totalcount = len(files)
+                st.write(f"{len(manifest) - totalcount} unchanged file(s) skipped.")
+
+            st.write("Starting downloads...")
+            currentcount = 0
+            download_from_dropbox(manifest, state, files)
         st.write("Finished downloading!")
 
         
         st.write("Validating downloads...")
-        failed = validate_dropbox()
+        failed = validate_dropbox(manifest)
         if len(failed) != 0:
             with open("failed.txt", "w+") as f:
                 f.write('\n'.join(failed))
@@ -213,6 +287,10 @@ elif selected_page == "Help":
     6. Click on the "Generate" button next to the "OAuth 2 access token" to get your access token.
     7. Copy the generated access token and paste it into the "Enter your Dropbox access token" field on the Home page.
 
+    For a connection that does not expire, generate a refresh token for your app (OAuth code flow with
+    `token_access_type=offline`) and enter it with the app key under "Long-lived access". "Save Dropbox
+    credentials" stores it in the `credentials` folder next to this app for later runs without entering a token.
+
     ### How to Obtain Google Drive Client ID and Client Secret:
     1. Go to [https://console.developers.google.com/](https://console.developers.google.com/).
     2. Create a new project or select an existing project.
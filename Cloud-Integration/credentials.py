@@ -0,0 +1,99 @@
+import json
+import os
+
+import dropbox
+from pydrive2.auth import GoogleAuth, RefreshError
+
+
+class CredentialStore:
+    """
+    Directory of per-service credential files, readable only by the current user.
+
+    Google Drive credentials are written by pydrive2 itself into ``path('google_drive')``;
+    other services store a JSON dict with save() and read it back with load().
+    """
+
+    def __init__(self, directory):
+        """
+        Parameters:
+        - directory (str): Directory holding the credential files; created if missing.
+        """
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def path(self, service):
+        """Path of the credential file of a service."""
+        return os.path.join(self.directory, f"{service}.json")
+
+    def load(self, service):
+        """Return the stored credentials of a service, or an empty dict."""
+        try:
+            with open(self.path(service)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, service, credentials):
+        """Store the credentials of a service, replacing earlier ones."""
+        path = self.path(service)
+        descriptor = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(credentials, file)
+        os.replace(f"{path}.tmp", path)
+
+    def clear(self, service):
+        """Forget the stored credentials of a service."""
+        if os.path.exists(self.path(service)):
+            os.remove(self.path(service))
+
+
+def google_auth(client_secrets_path, store):
+    """
+    Authenticate with Google Drive, reusing stored credentials.
+
+    A browser OAuth round-trip only happens when no credentials are stored or the stored ones
+    cannot be refreshed. Offline access is requested, so the stored refresh token renews expired
+    access tokens without user interaction, also during long downloads.
+
+    Parameters:
+    - client_secrets_path (str): Path of the OAuth client configuration.
+    - store (CredentialStore): Store holding the saved Google credentials.
+
+    Returns:
+    - pydrive2.auth.GoogleAuth: Authorized instance.
+    """
+    gauth = GoogleAuth()
+    gauth.settings.update({'client_config_file': client_secrets_path, 'get_refresh_token': True,
+                           'save_credentials': True, 'save_credentials_backend': 'file',
+                           'save_credentials_file': store.path('google_drive')})
+    try:
+        gauth.LocalWebserverAuth()
+    except RefreshError:
+        # Revoked or expired refresh token: start over with a new consent.
+        store.clear('google_drive')
+        gauth.credentials = None
+        gauth.LocalWebserverAuth()
+    if os.path.exists(store.path('google_drive')):
+        os.chmod(store.path('google_drive'), 0o600)
+    return gauth
+
+
+def dropbox_client(access_token=None, refresh_token=None, app_key=None, app_secret=None, max_connections=16):
+    """
+    Create a Dropbox client with a pooled HTTP session.
+
+    With a refresh token and app key, the client renews its short-lived access token itself.
+
+    Parameters:
+    - access_token (str or None): OAuth 2 access token.
+    - refresh_token (str or None): OAuth 2 refresh token.
+    - app_key (str or None): App key, required with refresh_token.
+    - app_secret (str or None): App secret; not needed for PKCE refresh tokens.
+    - max_connections (int): Size of the HTTP connection pool.
+
+    Returns:
+    - dropbox.Dropbox: Client.
+    """
+    return dropbox.Dropbox(oauth2_access_token=access_token, oauth2_refresh_token=refresh_token,
+                           app_key=app_key, app_secret=app_secret,
+                           session=dropbox.create_session(max_connections=max_connections))
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class DownloadProgress:
+    """
+    Thread-safe byte and file counters shared by all transfers of one download run.
+    """
+
+    def __init__(self, files_total=0, bytes_total=0):
+        self._lock = threading.Lock()
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.files_done = 0
+        self.bytes_done = 0
+        self.failed = {}
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes_done += count
+
+    def file_done(self):
+        with self._lock:
+            self.files_done += 1
+
+    def file_failed(self, name, error):
+        with self._lock:
+            self.failed[name] = error
+
+    def snapshot(self):
+        """
+        Return a consistent copy of the counters.
+
+        Returns:
+        - dict: 'files_done', 'files_total', 'bytes_done', 'bytes_total' and 'failed' (count).
+        """
+        with self._lock:
+            return {'files_done': self.files_done, 'files_total': self.files_total,
+                    'bytes_done': self.bytes_done, 'bytes_total': self.bytes_total, 'failed': len(self.failed)}
+
+
+class DownloadEngine:
+    """
+    Download many files concurrently with a bounded number of parallel transfers.
+
+    Each transfer goes through a backend's ``download(remote_file, path, on_bytes)`` method, is
+    written to a temporary file and moved into place only when complete, and is retried with
+    exponential backoff on failure. Progress callbacks run on the calling thread, so they can
+    update Streamlit elements.
+    """
+
+    def __init__(self, backend, workers=8, retries=3, backoff=0.5):
+        """
+        Parameters:
+        - backend: Object with download(remote_file, path, on_bytes) and size(remote_file).
+        - workers (int): Maximum number of parallel transfers.
+        - retries (int): Number of retries per file after the first attempt fails.
+        - backoff (float): Delay in seconds before the first retry; doubled on every retry.
+        """
+        self.backend = backend
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+
+    def _transfer(self, remote_file, path, progress):
+        temporary_path = f"{path}.download"
+        for attempt in range(self.retries + 1):
+            transferred = [0]
+
+            def on_bytes(count):
+                transferred[0] += count
+                progress.add_bytes(count)
+
+            try:
+                self.backend.download(remote_file, temporary_path, on_bytes)
+                os.replace(temporary_path, path)
+                progress.file_done()
+                return None
+            except Exception as e:
+                # Bytes of a failed attempt are transferred again, so take them off the total.
+                progress.add_bytes(-transferred[0])
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+                if attempt == self.retries:
+                    return f"{type(e).__name__}: {e}"
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def download(self, tasks, on_progress=None, poll_interval=0.2, on_file_done=None):
+        """
+        Download every task and report aggregated progress.
+
+        Parameters:
+        - tasks (list of tuple): (remote file, local path, display name) per file.
+        - on_progress (callable or None): Called on this thread with DownloadProgress.snapshot()
+          at most every poll_interval seconds and once at the end.
+        - poll_interval (float): Seconds between progress reports.
+        - on_file_done (callable or None): Called on this thread with the (remote file, local path,
+          display name) task of every file as soon as it is in place.
+
+        Returns:
+        - DownloadProgress: Final counters; 'failed' maps display names to their last error.
+        """
+        progress = DownloadProgress(len(tasks), sum(self.backend.size(remote_file) for remote_file, _, _ in tasks))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {executor.submit(self._transfer, task[0], task[1], progress): task for task in tasks}
+            while pending:
+                done, _ = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.result()
+                    if error is not None:
+                        progress.file_failed(pending[future][2], error)
+                    elif on_file_done is not None:
+                        on_file_done(pending[future])
+                    del pending[future]
+                if on_progress is not None:
+                    on_progress(progress.snapshot())
+        return progress
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import threading
+
+from resumable_download import RESUMABLE_THRESHOLD, download_resumable, http_range_opener
+
+CHUNK_SIZE = 1 << 20
+DRIVE_DOWNLOAD_URL = "https://www.googleapis.com/drive/v2/files/{}?alt=media"
+
+
+class DriveBackend:
+    """
+    Google Drive access through pydrive2, in the interface used by DownloadEngine.
+
+    pydrive2 keeps one HTTP connection per thread, so a single drive instance can serve
+    several transfer threads. Files of at least resumable_threshold bytes are streamed with
+    HTTP range requests instead, and resume where they stopped after a dropped connection.
+    """
+
+    def __init__(self, drive, resumable_threshold=RESUMABLE_THRESHOLD):
+        """
+        Parameters:
+        - drive (pydrive2.drive.GoogleDrive): Authenticated drive instance.
+        - resumable_threshold (int): Size in bytes from which downloads are resumable.
+        """
+        self.drive = drive
+        self.resumable_threshold = resumable_threshold
+        self._refresh_lock = threading.Lock()
+
+    def list_files(self, folder_id):
+        """
+        List the files (not subfolders) of a Drive folder.
+
+        Parameters:
+        - folder_id (str): Drive folder ID.
+
+        Returns:
+        - list: pydrive2 GoogleDriveFile objects.
+        """
+        query = f"'{folder_id}' in parents and trashed=false and mimeType != 'application/vnd.google-apps.folder'"
+        return self.drive.ListFile({'q': query}).GetList()
+
+    def name(self, remote_file):
+        return remote_file['title']
+
+    def size(self, remote_file):
+        return int(remote_file.get('fileSize') or 0)
+
+    def revision(self, remote_file):
+        return remote_file.get('modifiedDate')
+
+    def content_hash(self, remote_file):
+        return remote_file.get('md5Checksum')
+
+    def _auth_headers(self):
+        auth = self.drive.auth
+        # Transfer threads share the credentials; only the first one to see them expired refreshes.
+        with self._refresh_lock:
+            if auth.access_token_expired:
+                auth.Refresh()
+        return {'Authorization': f"Bearer {auth.credentials.access_token}"}
+
+    def download(self, remote_file, path, on_bytes):
+        """
+        Download one file, reporting each received chunk's size to on_bytes.
+        """
+        if self.size(remote_file) >= self.resumable_threshold:
+            download_resumable(http_range_opener(DRIVE_DOWNLOAD_URL.format(remote_file['id']), self._auth_headers),
+                               path, self.size(remote_file), key=self.content_hash(remote_file), on_bytes=on_bytes)
+            return
+        reported = [0]
+
+        def callback(transferred, total):
+            on_bytes(transferred - reported[0])
+            reported[0] = transferred
+
+        remote_file.GetContentFile(path, callback=callback)
+
+
+class LocalDriveBackend:
+    """
+    Stand-in for Google Drive backed by a local directory, for testing the download engine
+    without network access.
+
+    Every subdirectory of root is a folder whose ID is its name. Transient failures can be
+    injected: each file fails its first ``failures`` download attempts after half its bytes.
+    With base_url, e.g. of a resumable_download.FlakyHTTPServer serving root, files are
+    downloaded with resumable range requests instead of copied.
+    """
+
+    def __init__(self, root, failures=0, chunk_size=CHUNK_SIZE, base_url=None):
+        """
+        Parameters:
+        - root (str): Directory holding one subdirectory per fake folder.
+        - failures (int): Number of failing attempts per file before downloads succeed.
+        - chunk_size (int): Number of bytes copied at a time.
+        - base_url (str or None): URL at which root is served over HTTP.
+        """
+        self.root = root
+        self.failures = failures
+        self.chunk_size = chunk_size
+        self.base_url = base_url
+        self.attempts = {}
+        self._lock = threading.Lock()
+
+    def list_files(self, folder_id):
+        folder_path = os.path.join(self.root, folder_id)
+        files = []
+        for file_name in sorted(os.listdir(folder_path)):
+            file_path = os.path.join(folder_path, file_name)
+            if os.path.isfile(file_path):
+                with open(file_path, 'rb') as file:
+                    md5 = hashlib.md5(file.read()).hexdigest()
+                files.append({'id': f"{folder_id}/{file_name}", 'title': file_name,
+                              'fileSize': str(os.path.getsize(file_path)), 'md5Checksum': md5,
+                              'modifiedDate': str(os.stat(file_path).st_mtime_ns), 'path': file_path})
+        return files
+
+    def name(self, remote_file):
+        return remote_file['title']
+
+    def size(self, remote_file):
+        return int(remote_file['fileSize'])
+
+    def revision(self, remote_file):
+        return remote_file['modifiedDate']
+
+    def content_hash(self, remote_file):
+        return remote_file['md5Checksum']
+
+    def download(self, remote_file, path, on_bytes):
+        if self.base_url is not None:
+            download_resumable(http_range_opener(f"{self.base_url}/{remote_file['id']}"), path,
+                               self.size(remote_file), key=self.content_hash(remote_file),
+                               chunk_size=self.chunk_size, backoff=0, on_bytes=on_bytes)
+            return
+        with self._lock:
+            attempt = self.attempts.get(remote_file['id'], 0)
+            self.attempts[remote_file['id']] = attempt + 1
+        fail_at = self.size(remote_file) // 2 if attempt < self.failures else None
+        copied = 0
+        with open(remote_file['path'], 'rb') as source, open(path, 'wb') as destination:
+            while True:
+                if fail_at is not None and copied >= fail_at:
+                    raise ConnectionError(f"injected failure after {copied} bytes")
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                destination.write(chunk)
+                copied += len(chunk)
+                on_bytes(len(chunk))
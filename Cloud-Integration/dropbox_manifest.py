@@ -0,0 +1,72 @@
+import json
+import os
+from typing import List, NamedTuple, Optional
+
+import dropbox
+
+
+class DropboxFile(NamedTuple):
+    """One file of a Dropbox tree, as listed by files_list_folder."""
+    path: str
+    size: int
+    content_hash: Optional[str]
+    rev: Optional[str]
+    server_modified: Optional[str]
+
+
+class DropboxManifest:
+    """Files, sizes and hashes of a Dropbox folder tree, listed once and reused by every step."""
+
+    def __init__(self, root, files: List[DropboxFile], cursor=None):
+        self.root = root
+        self.files = files
+        self.cursor = cursor
+
+    def __len__(self):
+        return len(self.files)
+
+    @property
+    def total_bytes(self):
+        return sum(entry.size for entry in self.files)
+
+    def local_path(self, entry, local_root):
+        """Local path of a file, mirroring its Dropbox path under local_root."""
+        return os.path.abspath(os.path.join(local_root, *entry.path.lstrip("/").split("/")))
+
+    def missing(self, local_root):
+        """Return the Dropbox paths of files that are absent locally or have the wrong size."""
+        missing = []
+        for entry in self.files:
+            local_path = self.local_path(entry, local_root)
+            if not os.path.exists(local_path) or os.path.getsize(local_path) != entry.size:
+                missing.append(entry.path)
+        return missing
+
+    def save(self, path):
+        """Write the manifest to a JSON file."""
+        with open(f"{path}.tmp", "w") as file:
+            json.dump({'root': self.root, 'cursor': self.cursor, 'files': [entry._asdict() for entry in self.files]},
+                      file, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def load(path):
+        """Read a manifest written by save."""
+        with open(path) as file:
+            data = json.load(file)
+        return DropboxManifest(data['root'], [DropboxFile(**entry) for entry in data['files']], data['cursor'])
+
+
+def list_dropbox_tree(dbx, root):
+    """List every downloadable file under root in one recursive, paginated pass."""
+    files = []
+    result = dbx.files_list_folder(root, recursive=True, include_non_downloadable_files=False)
+    while True:
+        for entry in result.entries:
+            if isinstance(entry, dropbox.files.FileMetadata):
+                files.append(DropboxFile(entry.path_display, entry.size, entry.content_hash, entry.rev,
+                                         entry.server_modified.isoformat() if entry.server_modified else None))
+        if not result.has_more:
+            break
+        result = dbx.files_list_folder_continue(result.cursor)
+    return DropboxManifest(root, files, result.cursor)
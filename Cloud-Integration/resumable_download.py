@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_SIZE = 8 << 20
+RESUMABLE_THRESHOLD = 32 << 20
+
+
+def _read_journal(journal_path):
+    try:
+        with open(journal_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_journal(journal_path, journal):
+    with open(f"{journal_path}.tmp", "w") as file:
+        json.dump(journal, file)
+    os.replace(f"{journal_path}.tmp", journal_path)
+
+
+def download_resumable(open_range, path, size, key=None, chunk_size=CHUNK_SIZE, retries=5, backoff=0.5,
+                       on_bytes=None):
+    """
+    Stream a file to disk in fixed-size chunks, resuming interrupted transfers.
+
+    Data is appended to ``<path>.part`` and the number of bytes safely written is kept in the
+    journal ``<path>.part.json``. A dropped connection is reopened at that offset, within this
+    call up to ``retries`` times and across calls (or program restarts) as long as the journal
+    and the remote file's key are unchanged. The complete file is renamed to path atomically.
+    At most one chunk is held in memory.
+
+    Parameters:
+    - open_range (callable): open_range(offset) returns (stream, start), a readable stream of the
+      remote file from byte ``start``; start is 0 when the server ignores the requested offset.
+    - path (str): Destination path.
+    - size (int): Size of the remote file in bytes.
+    - key (str or None): Remote revision or content hash; a journal written for another key is
+      discarded and the download restarts.
+    - chunk_size (int): Bytes read and written at a time, and between journal updates.
+    - retries (int): Number of reconnections after a failure without progress in between.
+    - backoff (float): Delay in seconds before the first reconnection; doubled every time.
+    - on_bytes (callable or None): Called with the number of bytes of every chunk written,
+      including the already downloaded part of a resumed file.
+    """
+    part_path = f"{path}.part"
+    journal_path = f"{part_path}.json"
+    journal = _read_journal(journal_path)
+    offset = 0
+    if journal is not None and journal.get('size') == size and journal.get('key') == key and os.path.exists(part_path):
+        # The journal may be ahead of the data after a crash, never behind it.
+        offset = min(journal['offset'], os.path.getsize(part_path))
+    journal = {'size': size, 'key': key, 'offset': offset}
+    if on_bytes is not None and offset:
+        on_bytes(offset)
+
+    failures = 0
+    with open(part_path, "r+b" if offset else "wb") as part:
+        part.truncate(offset)
+        while offset < size:
+            try:
+                stream, start = open_range(offset)
+                with stream:
+                    if start != offset:
+                        part.seek(start)
+                        part.truncate(start)
+                        if on_bytes is not None:
+                            on_bytes(start - offset)
+                        offset = start
+                    part.seek(offset)
+                    while offset < size:
+                        chunk = stream.read(min(chunk_size, size - offset))
+                        if not chunk:
+                            raise ConnectionError(f"connection closed after {offset} of {size} bytes")
+                        part.write(chunk)
+                        part.flush()
+                        offset += len(chunk)
+                        journal['offset'] = offset
+                        _write_journal(journal_path, journal)
+                        failures = 0
+                        if on_bytes is not None:
+                            on_bytes(len(chunk))
+            except Exception:
+                failures += 1
+                if failures > retries:
+                    raise
+                time.sleep(backoff * 2 ** (failures - 1))
+    os.replace(part_path, path)
+    os.remove(journal_path)
+
+
+def http_range_opener(url, headers=None, timeout=60):
+    """
+    Build an open_range function for download_resumable that uses HTTP range requests.
+
+    Parameters:
+    - url (str): URL of the file.
+    - headers (dict or callable or None): Extra request headers, or a function returning them,
+      e.g. to send a freshly refreshed access token on every reconnection.
+    - timeout (float): Socket timeout in seconds.
+
+    Returns:
+    - callable: open_range(offset) returning (response, start).
+    """
+    def open_range(offset):
+        request_headers = dict(headers() if callable(headers) else headers or {})
+        request_headers['Range'] = f"bytes={offset}-"
+        response = urllib.request.urlopen(urllib.request.Request(url, headers=request_headers), timeout=timeout)
+        # 206 means the range was honoured; a plain 200 restarts from the first byte.
+        return response, offset if response.status == 206 else 0
+
+    return open_range
+
+
+class FlakyRangeHandler(SimpleHTTPRequestHandler):
+    """Serves a directory with byte-range support, dropping each response after drop_after bytes."""
+
+    drop_after = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        file_path = self.translate_path(self.path)
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+        size = os.path.getsize(file_path)
+        match = re.match(r"bytes=(\d+)-", self.headers.get('Range', ''))
+        start = int(match.group(1)) if match else 0
+        if start >= size:
+            self.send_error(416)
+            return
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Length', str(size - start))
+        if match:
+            self.send_header('Content-Range', f"bytes {start}-{size - 1}/{size}")
+        self.end_headers()
+        with open(file_path, 'rb') as file:
+            file.seek(start)
+            data = file.read(size - start if self.drop_after is None else self.drop_after)
+        self.wfile.write(data)
+        self.close_connection = True
+
+
+class FlakyHTTPServer:
+    """
+    Local HTTP stand-in for a cloud storage download endpoint, for testing resumable downloads
+    without network access. Every response is cut off after ``drop_after`` bytes.
+
+    Use as a context manager; ``url(name)`` is the address of a file under root.
+    """
+
+    def __init__(self, root, drop_after=None):
+        """
+        Parameters:
+        - root (str): Directory whose files are served.
+        - drop_after (int or None): Bytes sent per response before the connection is dropped.
+        """
+        handler = type('Handler', (FlakyRangeHandler,), {'drop_after': drop_after})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          lambda *args: handler(*args, directory=root))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.server.server_port}/{name}"
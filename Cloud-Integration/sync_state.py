@@ -0,0 +1,136 @@
+import os
+import sqlite3
+from typing import NamedTuple, Optional
+
+SYNC_STATE_FILE = ".sync_state.db"
+
+
+class SyncEntry(NamedTuple):
+    """What was downloaded for one local file, and what the file looked like afterwards."""
+    path: str
+    revision: Optional[str]
+    content_hash: Optional[str]
+    size: int
+    mtime_ns: int
+
+
+class SyncState:
+    """
+    Local state database of a synced folder, kept in a SQLite file inside the folder.
+
+    Every downloaded file is recorded with the remote revision, content hash and size it was
+    downloaded at, and the local size and modification time it had afterwards. A file is up to
+    date when the remote side still reports the same revision or hash and the local file has not
+    been touched since, which takes one stat call instead of a transfer.
+
+    Paths are relative to the folder and '/'-separated, e.g. 'reports/2023/q1.pdf'.
+    """
+
+    def __init__(self, local_root):
+        """
+        Parameters:
+        - local_root (str): Folder the downloads are written to; the database is stored in it.
+        """
+        self.local_root = local_root
+        os.makedirs(local_root, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(local_root, SYNC_STATE_FILE))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, revision TEXT, "
+                                "content_hash TEXT, size INTEGER, mtime_ns INTEGER)")
+        self.entries = {row[0]: SyncEntry(*row) for row in self.connection.execute("SELECT * FROM files")}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        self.connection.close()
+
+    def local_path(self, path):
+        """Local path of a relative path."""
+        return os.path.join(self.local_root, *path.split("/"))
+
+    def is_current(self, path, revision, content_hash, size):
+        """
+        Check whether the local copy of a remote file is up to date.
+
+        Parameters:
+        - path (str): Relative path of the file.
+        - revision (str or None): Remote revision (Dropbox rev, Drive modifiedDate).
+        - content_hash (str or None): Remote content hash (Dropbox content_hash, Drive md5Checksum).
+        - size (int): Remote size in bytes.
+
+        Returns:
+        - bool: True when the file was downloaded at this revision or hash and is unchanged locally.
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry.size != size:
+            return False
+        if content_hash is not None and entry.content_hash is not None:
+            if entry.content_hash != content_hash:
+                return False
+        elif revision is None or entry.revision != revision:
+            return False
+        try:
+            stat = os.stat(self.local_path(path))
+        except OSError:
+            return False
+        return stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns
+
+    def record(self, path, revision, content_hash, size):
+        """
+        Record a completed download; call it after the file was moved into place.
+        """
+        stat = os.stat(self.local_path(path))
+        entry = SyncEntry(path, revision, content_hash, size, stat.st_mtime_ns)
+        self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", entry)
+        self.connection.commit()
+        self.entries[path] = entry
+
+    def removed(self, current_paths, root=""):
+        """
+        Return the recorded paths under a remote root that are no longer present remotely.
+
+        Several remote folders can be synced into the same local folder, so only paths under
+        the root that was just listed are compared; files of other roots are never reported.
+
+        Parameters:
+        - current_paths (iterable of str): Relative paths of every file currently listed under root.
+        - root (str): Listed folder as a relative path, e.g. 'reports' for the Dropbox folder
+          '/reports'. Paths are compared case-insensitively, like Dropbox does. '' covers everything.
+
+        Returns:
+        - list of str: Recorded paths under root missing from current_paths.
+        """
+        prefix = root.strip("/").lower()
+        prefix = f"{prefix}/" if prefix else ""
+        current_paths = {path.lower() for path in current_paths}
+        return sorted(path for path in self.entries
+                      if path.lower().startswith(prefix) and path.lower() not in current_paths)
+
+    def delete(self, paths):
+        """
+        Delete local files and forget them.
+
+        Parameters:
+        - paths (list of str): Relative paths, typically from removed().
+
+        Returns:
+        - list of str: Paths whose local file was deleted.
+        """
+        deleted = []
+        for path in paths:
+            local_path = self.local_path(path)
+            if os.path.isfile(local_path):
+                os.remove(local_path)
+                deleted.append(path)
+            self.entries.pop(path, None)
+            self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.connection.commit()
+        return deleted
@@ -0,0 +1,45 @@
+import os
+
+from download_engine import DownloadEngine
+from drive_backend import LocalDriveBackend
+
+
+def _folder(root, n_files):
+    folder_path = root / "folder"
+    folder_path.mkdir(parents=True)
+    for index in range(n_files):
+        (folder_path / f"file{index}.pdf").write_bytes(bytes([index]) * (1000 + index))
+
+
+def test_transient_failures_are_retried_per_file(tmp_path):
+    _folder(tmp_path / "remote", 6)
+    backend = LocalDriveBackend(str(tmp_path / "remote"), failures=1, chunk_size=100)
+    destination = tmp_path / "local"
+    destination.mkdir()
+    tasks = [(remote_file, str(destination / remote_file['title']), remote_file['title'])
+             for remote_file in backend.list_files("folder")]
+    snapshots, done = [], []
+
+    progress = DownloadEngine(backend, workers=3, retries=1, backoff=0).download(
+        tasks, on_progress=snapshots.append, on_file_done=done.append)
+
+    assert progress.failed == {}
+    assert set(attempts for attempts in backend.attempts.values()) == {2}
+    assert sorted(task[2] for task in done) == sorted(os.listdir(destination))
+    assert snapshots[-1]['files_done'] == 6 and snapshots[-1]['bytes_done'] == snapshots[-1]['bytes_total']
+    for remote_file, path, _ in tasks:
+        assert open(path, 'rb').read() == open(remote_file['path'], 'rb').read()
+
+
+def test_file_failing_every_attempt_is_reported_without_a_partial_file(tmp_path):
+    _folder(tmp_path / "remote", 2)
+    backend = LocalDriveBackend(str(tmp_path / "remote"), failures=5, chunk_size=100)
+    destination = tmp_path / "local"
+    destination.mkdir()
+    tasks = [(remote_file, str(destination / remote_file['title']), remote_file['title'])
+             for remote_file in backend.list_files("folder")]
+
+    progress = DownloadEngine(backend, workers=2, retries=2, backoff=0).download(tasks)
+
+    assert sorted(progress.failed) == ["file0.pdf", "file1.pdf"]
+    assert os.listdir(destination) == []
@@ -0,0 +1,35 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from drive_backend import DriveBackend
+
+
+class ExpiredAuth:
+    """Stand-in for pydrive2's GoogleAuth whose token is expired until refreshed."""
+
+    def __init__(self):
+        self.refreshes = 0
+        self.access_token_expired = True
+        self.credentials = SimpleNamespace(access_token="old")
+
+    def Refresh(self):
+        self.refreshes += 1
+        time.sleep(0.05)
+        self.credentials = SimpleNamespace(access_token="new")
+        self.access_token_expired = False
+
+
+def test_concurrent_downloads_refresh_the_token_once():
+    auth = ExpiredAuth()
+    backend = DriveBackend(SimpleNamespace(auth=auth))
+    headers = []
+
+    threads = [threading.Thread(target=lambda: headers.append(backend._auth_headers())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert auth.refreshes == 1
+    assert headers == [{'Authorization': "Bearer new"}] * 8
@@ -0,0 +1,53 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+dropbox = pytest.importorskip("dropbox")
+
+from dropbox_manifest import DropboxManifest, list_dropbox_tree
+
+
+def _file(path, size):
+    return dropbox.files.FileMetadata(name=path.rsplit("/", 1)[-1], path_display=path, size=size,
+                                      content_hash="0" * 64, rev="0123456789",
+                                      server_modified=datetime.datetime(2024, 1, 1))
+
+
+class PagedClient:
+    """Stand-in for dropbox.Dropbox serving a recursive listing in pages."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def files_list_folder(self, path, recursive=False, include_non_downloadable_files=True):
+        self.calls.append(("list", path, recursive))
+        return self._page(0)
+
+    def files_list_folder_continue(self, cursor):
+        self.calls.append(("continue", cursor))
+        return self._page(int(cursor))
+
+    def _page(self, index):
+        return SimpleNamespace(entries=self.pages[index], has_more=index + 1 < len(self.pages), cursor=str(index + 1))
+
+
+def test_tree_is_listed_in_one_paginated_pass(tmp_path):
+    client = PagedClient([[dropbox.files.FolderMetadata(name="sub", path_display="/root/sub"),
+                           _file("/root/a.pdf", 3)],
+                          [_file("/root/sub/b.pdf", 5)]])
+
+    manifest = list_dropbox_tree(client, "/root")
+
+    assert client.calls == [("list", "/root", True), ("continue", "1")]
+    assert [entry.path for entry in manifest.files] == ["/root/a.pdf", "/root/sub/b.pdf"]
+    assert len(manifest) == 2 and manifest.total_bytes == 8
+
+    (tmp_path / "local" / "root").mkdir(parents=True)
+    (tmp_path / "local" / "root" / "a.pdf").write_bytes(b"abc")
+    assert manifest.missing(str(tmp_path / "local")) == ["/root/sub/b.pdf"]
+
+    manifest.save(str(tmp_path / "manifest.json"))
+    loaded = DropboxManifest.load(str(tmp_path / "manifest.json"))
+    assert (loaded.root, loaded.files, loaded.cursor) == (manifest.root, manifest.files, manifest.cursor)
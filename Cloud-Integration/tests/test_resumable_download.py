@@ -0,0 +1,59 @@
+import io
+import json
+import os
+
+from resumable_download import FlakyHTTPServer, download_resumable, http_range_opener
+
+DATA = bytes(range(256)) * 40
+
+
+def _recording_opener(data, offsets):
+    def open_range(offset):
+        offsets.append(offset)
+        return io.BytesIO(data[offset:]), offset
+
+    return open_range
+
+
+def _write_partial(path, length, key):
+    with open(f"{path}.part", "wb") as part:
+        part.write(DATA[:length])
+    with open(f"{path}.part.json", "w") as file:
+        json.dump({'size': len(DATA), 'key': key, 'offset': length}, file)
+
+
+def test_download_resumes_from_a_partial_part_file(tmp_path):
+    path = str(tmp_path / "file.bin")
+    _write_partial(path, 3000, "rev1")
+    offsets, written = [], []
+
+    download_resumable(_recording_opener(DATA, offsets), path, len(DATA), key="rev1", chunk_size=1024,
+                       on_bytes=written.append)
+
+    assert offsets == [3000]
+    assert written[0] == 3000 and sum(written) == len(DATA)
+    assert open(path, "rb").read() == DATA
+    assert not os.path.exists(f"{path}.part") and not os.path.exists(f"{path}.part.json")
+
+
+def test_partial_file_of_another_revision_is_discarded(tmp_path):
+    path = str(tmp_path / "file.bin")
+    _write_partial(path, 3000, "rev1")
+    offsets = []
+
+    download_resumable(_recording_opener(DATA, offsets), path, len(DATA), key="rev2", chunk_size=1024)
+
+    assert offsets == [0]
+    assert open(path, "rb").read() == DATA
+
+
+def test_dropped_connections_are_resumed_with_range_requests(tmp_path):
+    (tmp_path / "remote").mkdir()
+    (tmp_path / "remote" / "file.bin").write_bytes(DATA)
+    path = str(tmp_path / "file.bin")
+
+    with FlakyHTTPServer(str(tmp_path / "remote"), drop_after=4000) as server:
+        download_resumable(http_range_opener(server.url("file.bin")), path, len(DATA), chunk_size=1024,
+                           retries=1, backoff=0)
+
+    assert open(path, "rb").read() == DATA
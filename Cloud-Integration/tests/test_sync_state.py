@@ -0,0 +1,41 @@
+import os
+
+from sync_state import SyncState
+
+
+def _download(state, path, content):
+    local_path = state.local_path(path)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    with open(local_path, "wb") as file:
+        file.write(content)
+    state.record(path, "rev1", f"hash-{path}", len(content))
+
+
+def test_unchanged_file_is_current(tmp_path):
+    with SyncState(str(tmp_path)) as state:
+        _download(state, "A/report.pdf", b"12345")
+        assert state.is_current("A/report.pdf", "rev1", "hash-A/report.pdf", 5)
+        assert not state.is_current("A/report.pdf", "rev2", "hash-changed", 5)
+
+    with open(tmp_path / "A" / "report.pdf", "ab") as file:
+        file.write(b"local edit")
+    with SyncState(str(tmp_path)) as state:
+        assert not state.is_current("A/report.pdf", "rev1", "hash-A/report.pdf", 5)
+
+
+def test_roots_sharing_a_download_folder(tmp_path):
+    with SyncState(str(tmp_path)) as state:
+        for path in ["A/one.pdf", "A/sub/two.pdf", "B/three.pdf", "B/gone.pdf", "AB/four.pdf"]:
+            _download(state, path, b"data")
+
+        # Syncing /B must only consider files under /B, whatever was synced before.
+        removed = state.removed(["B/three.pdf"], "/B")
+        assert removed == ["B/gone.pdf"]
+        assert state.delete(removed) == ["B/gone.pdf"]
+
+        assert state.removed(["a/ONE.pdf", "A/sub/two.pdf"], "/a") == []
+        assert sorted(state.entries) == ["A/one.pdf", "A/sub/two.pdf", "AB/four.pdf", "B/three.pdf"]
+        for path in state.entries:
+            assert os.path.exists(state.local_path(path))
+
+        assert state.removed([], "") == sorted(state.entries)
@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from pair_scoring import SIMILARITY_METHODS
+from synthetic_corpus import generate_corpus
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+IMAGE_METHODS = ["ssim", "mse"]
+
+
+def _reset_peak_rss():
+    # Linux lets a process reset its own high-water mark; elsewhere the peak is process-wide.
+    # Memory of worker processes is not included.
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def stage(name, results, items=None):
+    """
+    Time a benchmark stage and record its wall time and peak resident memory.
+
+    Parameters:
+    - name (str): Stage name.
+    - results (list): List the stage record is appended to.
+    - items (int or None): Number of items processed, used for the throughput.
+    """
+    _reset_peak_rss()
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    record = {'stage': name, 'seconds': round(seconds, 6), 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+    if items is not None:
+        record['items'] = items
+        record['items_per_second'] = round(items / seconds, 3) if seconds > 0 else None
+    results.append(record)
+    print(f"{name:<32} {seconds:10.3f} s  {record['peak_rss_mb']:10.1f} MB", flush=True)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+STARTUP_MODULES = ["text_similarity", "image_text_similarity", "similarity_index", "cli"]
+
+
+def measure_startup(results, modules=STARTUP_MODULES):
+    """
+    Time importing each module in a fresh interpreter, as an app or test run would.
+
+    Parameters:
+    - results (list): List the stage records are appended to.
+    - modules (list of str): Modules to import.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        with stage(f"startup:import {module}", results):
+            completed = subprocess.run([sys.executable, "-c", f"import {module}"], cwd=script_dir,
+                                       capture_output=True, text=True)
+        if completed.returncode != 0:
+            results[-1]['error'] = (completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"])[-1]
+            print(f"Importing {module} failed: {results[-1]['error']}")
+
+
+def run_benchmark(work_dir, n_documents=20, words_per_document=2000, overlap=0.3, images_per_document=2,
+                  workers=None, text_methods=SIMILARITY_METHODS, image_methods=IMAGE_METHODS, seed=0,
+                  hash_radii=None, ssim_threshold=0.8):
+    """
+    Time the import of the pipeline modules, then generate a synthetic corpus and time each
+    pipeline stage on its own.
+
+    Parameters:
+    - work_dir (str): Directory for the corpus, extracted images and outputs.
+    - n_documents (int): Number of synthetic PDFs.
+    - words_per_document (int): Number of words in each PDF.
+    - overlap (float): Fraction of shared words and images between documents.
+    - images_per_document (int): Number of images embedded in each PDF.
+    - workers (int or None): Worker processes for extraction and the Levenshtein engine.
+    - text_methods (list of str): Text similarity methods to time.
+    - image_methods (list of str): Image similarity engines to time: 'ssim', 'mse' and 'embedding'
+      (the IVF index build and its top-k query).
+    - seed (int): Random seed of the corpus.
+    - hash_radii (list of int or None): Hamming radii for the perceptual-hash recall report.
+      None skips the report.
+    - ssim_threshold (float): SSIM score from which a pair counts as a match in the report.
+
+    Returns:
+    - dict: 'stages', one record per stage with 'stage', 'seconds', 'peak_rss_mb' and
+      throughput, and 'hash_recall', the recall of the hash prefilter against exhaustive SSIM.
+    """
+    from image_cache import stack_images
+    from image_embedding import build_embedding_index, embedding_top_k
+    from image_extraction import extract_folder_images
+    from image_hash import recall_report
+    from image_mse import iter_mse_blocks
+    from image_text_similarity import calculate_similarity, image_similarity, preprocess_image_bytes
+    from pair_scoring import iter_pair_chunks, iter_text_pair_chunks, similarity_column, TEXT_VARIANTS
+    from pdf_extraction import extract_folder
+    from result_writer import ChunkedResultWriter
+    from ssim_parallel import iter_ssim_blocks
+    from text_preprocessing import preprocess_texts
+
+    results = []
+    measure_startup(results)
+
+    corpus_dir = os.path.join(work_dir, "corpus")
+    images_dir = os.path.join(work_dir, "images")
+
+    with stage("corpus_generation", results, n_documents):
+        generate_corpus(corpus_dir, n_documents, words_per_document, overlap, images_per_document, seed=seed)
+
+    with stage("extraction", results, n_documents):
+        data, errors = extract_folder(corpus_dir, None, workers)
+
+    texts = [row['Text'] for row in data]
+    with stage("preprocessing", results, len(texts)):
+        preprocessed_texts = list(preprocess_texts(texts))
+
+    df = pd.DataFrame({'File Name': [row['File Name'] for row in data], 'Text': texts,
+                       'Preprocessed Text': preprocessed_texts})
+    n_pairs = len(df) * (len(df) - 1) // 2
+    for method in text_methods:
+        with stage(f"text_similarity:{method}", results, n_pairs):
+            for _ in iter_text_pair_chunks(df, calculate_similarity, workers=workers, methods=[method]):
+                pass
+
+    with stage("image_extraction", results, n_documents):
+        images, _ = extract_folder_images(corpus_dir, images_dir, preprocess_image_bytes, workers)
+    print(f"{len(images)} unique images")
+
+    # The blocked engines score the deduplicated stack the pipeline itself scores.
+    image_stack = stack_images([image['Array'] for image in images])
+    image_paths = [os.path.join(images_dir, image['Image File']) for image in images]
+    n_image_pairs = len(images) * (len(images) - 1) // 2
+    if len(images) >= 2:
+        if "mse" in image_methods:
+            with stage("image_similarity:mse", results, n_image_pairs):
+                for _ in iter_mse_blocks(image_stack):
+                    pass
+        if "ssim" in image_methods:
+            with stage("image_similarity:ssim", results, n_image_pairs):
+                for _ in iter_ssim_blocks(image_stack, workers=workers):
+                    pass
+        if "embedding" in image_methods:
+            with stage("image_embedding_index", results, len(image_paths)):
+                embedding_index = build_embedding_index(image_paths, os.path.join(work_dir, "embedding_index"),
+                                                        workers=workers)
+            with stage("image_embedding_top_k", results, len(image_paths)):
+                embedding_top_k(embedding_index, k=10)
+
+    hash_recall = []
+    if hash_radii and len(images) >= 2:
+        with stage("image_hash_recall", results, n_image_pairs):
+            hash_recall = recall_report(image_stack, lambda image1, image2: image_similarity(image1, image2, 'ssim'),
+                                        hash_radii, ssim_threshold)
+        for entry in hash_recall:
+            print(f"{entry['method']:<6} radius {entry['radius']:>3}: {entry['candidate_fraction']:7.2%} of pairs, "
+                  f"recall {entry['recall']:.3f}")
+
+    # Output writing is timed on its own with a result table of the real shape.
+    rng = np.random.RandomState(seed)
+    file_names = np.asarray(df['File Name'], dtype=object)
+    columns = [similarity_column(method, variant) for method in SIMILARITY_METHODS for variant in TEXT_VARIANTS]
+    for output_format in ("csv", "parquet"):
+        output_path = os.path.join(work_dir, f"results.{output_format}")
+        try:
+            with stage(f"output_writing:{output_format}", results, n_pairs):
+                with ChunkedResultWriter(output_path, output_format) as writer:
+                    for first, second in iter_pair_chunks(len(df)):
+                        chunk = {'File1': file_names[first], 'File2': file_names[second]}
+                        chunk.update({column: rng.random_sample(len(first)) for column in columns})
+                        writer.write(pd.DataFrame(chunk))
+        except ImportError as e:
+            print(f"Skipping {output_format} output: {e}")
+
+    return {'stages': results, 'hash_recall': hash_recall}
+
+
+def main(argv=None):
+    """
+    Command-line entry point: run the benchmark and append the results to a JSON lines file.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the pdf-similarity pipeline on a synthetic corpus.")
+    parser.add_argument("--documents", type=int, default=20, help="Number of synthetic PDFs.")
+    parser.add_argument("--words", type=int, default=2000, help="Words per PDF.")
+    parser.add_argument("--overlap", type=float, default=0.3, help="Fraction of shared words and images.")
+    parser.add_argument("--images", type=int, default=2, help="Images embedded per PDF.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+    parser.add_argument("--text-methods", nargs="*", default=SIMILARITY_METHODS, help="Text methods to time.")
+    parser.add_argument("--image-methods", nargs="*", default=IMAGE_METHODS, help="Image engines to time (ssim, mse, embedding).")
+    parser.add_argument("--hash-radii", type=int, nargs="*", default=None,
+                        help="Hamming radii for the perceptual-hash recall report against exhaustive SSIM.")
+    parser.add_argument("--ssim-threshold", type=float, default=0.8, help="SSIM score counted as a match in the report.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the corpus.")
+    parser.add_argument("--work-dir", default=None, help="Directory for the corpus (default: a temporary one).")
+    parser.add_argument("--output", default="benchmark_results.jsonl", help="JSON lines file the run is appended to.")
+    args = parser.parse_args(argv)
+
+    parameters = {'documents': args.documents, 'words': args.words, 'overlap': args.overlap, 'images': args.images,
+                  'workers': args.workers, 'seed': args.seed}
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        report = run_benchmark(args.work_dir or temporary_dir, args.documents, args.words, args.overlap, args.images,
+                               args.workers, args.text_methods, args.image_methods, args.seed, args.hash_radii,
+                               args.ssim_threshold)
+
+    run = {'timestamp': datetime.now(timezone.utc).isoformat(), 'commit': _git_commit(),
+           'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+           'parameters': parameters, 'stages': report['stages']}
+    if report['hash_recall']:
+        run['hash_recall'] = report['hash_recall']
+    with open(args.output, "a") as file:
+        file.write(json.dumps(run) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+
+from pair_scoring import SIMILARITY_METHODS
+
+
+def _add_common_arguments(parser):
+    parser.add_argument("input_folder", help="Folder containing the PDF files.")
+    parser.add_argument("--output-csv", default=None,
+                        help="Result table (default: similarities.csv in the input folder).")
+    parser.add_argument("--output-pickle", default=None,
+                        help="Pickle of the extracted texts (default: next to the result table).")
+    parser.add_argument("--output-format", choices=["csv", "parquet"], default="csv", help="Result table format.")
+    parser.add_argument("--methods", nargs="+", choices=SIMILARITY_METHODS, default=SIMILARITY_METHODS,
+                        help="Text similarity methods to score.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+    parser.add_argument("--timeout", type=float, default=None, help="Maximum seconds spent on a single PDF.")
+    parser.add_argument("--cache-dir", default=None, help="Content-addressed text cache directory.")
+    parser.add_argument("--jaccard-threshold", type=float, default=None,
+                        help="Only score Jaccard for MinHash/LSH candidate pairs at or above this similarity.")
+    parser.add_argument("--cosine-threshold", type=float, default=None,
+                        help="Leave corpus Cosine scores below this similarity empty.")
+    parser.add_argument("--levenshtein-min-similarity", type=float, default=None,
+                        help="Prune Levenshtein pairs that cannot reach this similarity.")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="Result rows scored and written at a time.")
+
+
+def _pipeline_options(args):
+    output_csv_path = args.output_csv or os.path.join(args.input_folder, "similarities.csv")
+    output_pickle_path = args.output_pickle or os.path.splitext(output_csv_path)[0] + ".pkl"
+    return dict(folder_path=args.input_folder, output_pickle_path=output_pickle_path,
+                output_csv_path=output_csv_path, workers=args.workers, timeout=args.timeout,
+                cache_dir=args.cache_dir, jaccard_threshold=args.jaccard_threshold,
+                cosine_threshold=args.cosine_threshold,
+                levenshtein_min_similarity=args.levenshtein_min_similarity, output_format=args.output_format,
+                chunk_rows=args.chunk_rows, methods=args.methods)
+
+
+def build_parser():
+    """
+    Build the argument parser of the pdf-similarity command line.
+
+    Returns:
+    - argparse.ArgumentParser: Parser with the 'text' and 'images' commands.
+    """
+    parser = argparse.ArgumentParser(description="Compute pairwise similarities of the PDFs in a folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    text_parser = commands.add_parser("text", help="Text similarities only (text_similarity.process_folder).")
+    _add_common_arguments(text_parser)
+
+    images_parser = commands.add_parser(
+        "images", help="Text and image similarities (image_text_similarity.process_folder_with_images_and_text).")
+    _add_common_arguments(images_parser)
+    images_parser.add_argument("--image-cache-dir", default=None, help="Preprocessed image stack cache directory.")
+    images_parser.add_argument("--image-hash-radius", type=int, default=None,
+                               help="Only score SSIM for pairs whose perceptual hashes are within this distance.")
+    images_parser.add_argument("--image-hash-method", choices=["ahash", "dhash", "phash"], default="phash",
+                               help="Perceptual hash of the SSIM prefilter.")
+    images_parser.add_argument("--image-neighbours", type=int, default=50,
+                               help="Neighbours kept per image in the viewer index.")
+    return parser
+
+
+def main(argv=None):
+    """
+    Command-line entry point, e.g. ``python cli.py text path/to/pdfs --workers 4``.
+
+    The folder pipelines (PDF and image extraction) are imported only once the arguments are
+    parsed, so ``--help`` and argument errors return quickly.
+    """
+    args = build_parser().parse_args(argv)
+    options = _pipeline_options(args)
+    if args.command == "text":
+        from text_similarity import process_folder
+        process_folder(**options)
+    else:
+        from image_text_similarity import process_folder_with_images_and_text
+        process_folder_with_images_and_text(image_cache_dir=args.image_cache_dir,
+                                            image_hash_radius=args.image_hash_radius,
+                                            image_hash_method=args.image_hash_method,
+                                            image_neighbours=args.image_neighbours, **options)
+    print(f"Results written to {options['output_csv_path']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
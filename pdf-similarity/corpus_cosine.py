@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def fit_corpus_tfidf(texts):
+    """
+    Fit a single TF-IDF model over the whole corpus.
+
+    The IDF weights are computed from every document in the corpus, and each row of the
+    returned matrix is L2-normalised, so the dot product of two rows is their cosine similarity.
+
+    Parameters:
+    - texts (list of str): Documents of the corpus, one entry per document.
+
+    Returns:
+    - tuple: (TfidfVectorizer, scipy.sparse.csr_matrix) fitted vectorizer and document-term matrix.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer()
+    document_term_matrix = vectorizer.fit_transform(texts)
+    return vectorizer, document_term_matrix
+
+
+def prune_block(block, threshold):
+    """
+    Drop the entries of a sparse similarity block that are below the threshold, in place.
+
+    Parameters:
+    - block (scipy.sparse.csr_matrix): Block of a sparse product of the document-term matrix.
+    - threshold (float or None): Minimum similarity to keep. None keeps every entry.
+
+    Returns:
+    - scipy.sparse.csr_matrix: The pruned block.
+    """
+    if threshold is not None:
+        block.data[block.data < threshold] = 0
+        block.eliminate_zeros()
+    return block
+
+
+def cosine_pair_scores(document_term_matrix, first, second, threshold=None):
+    """
+    Cosine similarity of the given document pairs, from one sparse product over the rows they span.
+
+    Pairs in row-major order, as yielded by pair_scoring.iter_pair_chunks, span a block of
+    roughly as many matrix cells as there are pairs, so memory stays bounded by the chunk size.
+    With a threshold the block is pruned while still sparse and only the pairs' entries are read.
+
+    Parameters:
+    - document_term_matrix (scipy.sparse matrix): L2-normalised document-term matrix.
+    - first (numpy.ndarray): First document index of each pair.
+    - second (numpy.ndarray): Second document index of each pair.
+    - threshold (float or None): Minimum similarity to keep; pairs below it are NaN. None keeps every pair.
+
+    Returns:
+    - numpy.ndarray: Similarity of each pair.
+    """
+    if len(first) == 0:
+        return np.empty(0)
+    row_start, row_stop, column_start = int(first.min()), int(first.max()) + 1, int(second.min())
+    block = document_term_matrix[row_start:row_stop] @ document_term_matrix[column_start:].T
+    if threshold is None:
+        return block.toarray()[first - row_start, second - column_start]
+    block = prune_block(block.tocsr(), threshold)
+    scores = np.asarray(block[first - row_start, second - column_start], dtype=float).ravel()
+    # Pairs without an entry were pruned, unless the threshold lets a zero similarity through.
+    if threshold > 0:
+        scores[scores < threshold] = np.nan
+    return scores
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from text_cache import file_content_hash
+
+
+def preprocess_images(image_paths, preprocess):
+    """
+    Preprocess images once into one contiguous float32 stack.
+
+    Parameters:
+    - image_paths (list of str): Paths to the images.
+    - preprocess (callable): Function mapping an image path to a 2-D array, e.g. preprocess_image.
+
+    Returns:
+    - numpy.ndarray: Array of shape (N, H, W) in the order of image_paths.
+    """
+    return stack_images(preprocess(image_path) for image_path in image_paths)
+
+
+def stack_images(arrays):
+    """
+    Copy preprocessed images into one contiguous float32 stack.
+
+    Parameters:
+    - arrays (iterable of numpy.ndarray): 2-D images of equal shape.
+
+    Returns:
+    - numpy.ndarray: Array of shape (N, H, W) in iteration order.
+    """
+    arrays = list(arrays)
+    if not arrays:
+        return np.zeros((0, 0, 0), dtype=np.float32)
+    stack = np.empty((len(arrays),) + np.shape(arrays[0]), dtype=np.float32)
+    for row, array in enumerate(arrays):
+        stack[row] = array
+    return stack
+
+
+class ImageTensorCache:
+    """
+    Persistent stack of preprocessed images keyed by image content hash.
+
+    The stack is stored as a memory-mapped ``.npy`` file of shape (capacity, H, W) with a JSON
+    index of the content hash of each used row, so unchanged images are never decoded again and
+    several processes can map the same array read-only. Both files are named after the image
+    size and a digest of the preprocessing settings, so changing the preprocessing starts a new
+    stack instead of serving stale arrays.
+
+    The file is preallocated and grows by doubling, so storing new images writes only their
+    rows. It holds at most max_bytes of images; once full, the least recently used rows are
+    overwritten, and images that still do not fit are returned without being cached.
+    """
+
+    MIN_CAPACITY = 64
+
+    def __init__(self, cache_dir, width, height, preprocess, settings="", max_bytes=1 << 30):
+        """
+        Parameters:
+        - cache_dir (str): Directory holding the stack and its key index.
+        - width (int): Width of the preprocessed images.
+        - height (int): Height of the preprocessed images.
+        - preprocess (callable): Function mapping an image source (a path for load_stack, whatever
+          is passed for load_keyed) to a (height, width) array.
+        - settings (str): Description of the preprocessing, part of the file names.
+        - max_bytes (int): Maximum size of the stack file.
+        """
+        self.cache_dir = cache_dir
+        self.shape = (height, width)
+        self.preprocess = preprocess
+        self.settings = settings
+        self.max_rows = max(1, max_bytes // (height * width * np.dtype(np.float32).itemsize))
+        settings_digest = hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+        stem = os.path.join(cache_dir, f"images_{width}x{height}_{settings_digest}")
+        self.stack_path = f"{stem}.npy"
+        self.keys_path = f"{stem}.json"
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _load_index(self):
+        # Returns the key of every used row, the clock value of its last use and the clock.
+        try:
+            with open(self.keys_path) as file:
+                index = json.load(file)
+            stack = np.load(self.stack_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return [], [], 0
+        valid = (isinstance(index, dict) and stack.shape[1:] == self.shape
+                 and len(index['keys']) == len(index['used']) <= stack.shape[0])
+        del stack
+        if not valid:
+            return [], [], 0
+        return index['keys'], index['used'], index['clock']
+
+    def _save_index(self, keys, used, clock):
+        temporary_path = f"{self.keys_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({'keys': keys, 'used': used, 'clock': clock}, file)
+        os.replace(temporary_path, self.keys_path)
+
+    def _reserve(self, n_rows):
+        # Make the stack file hold at least n_rows rows, doubling its capacity when it grows.
+        try:
+            capacity = np.load(self.stack_path, mmap_mode='r').shape[0]
+        except (OSError, ValueError):
+            capacity = 0
+        if capacity >= n_rows:
+            return
+        new_capacity = min(self.max_rows, max(n_rows, 2 * capacity, self.MIN_CAPACITY))
+        temporary_path = f"{self.stack_path}.{os.getpid()}.tmp.npy"
+        grown = np.lib.format.open_memmap(temporary_path, mode='w+', dtype=np.float32,
+                                          shape=(new_capacity,) + self.shape)
+        if capacity:
+            grown[:capacity] = np.load(self.stack_path, mmap_mode='r')
+        grown.flush()
+        # Release the mapping before replacing the file (required on Windows).
+        del grown
+        os.replace(temporary_path, self.stack_path)
+
+    def _lookup(self, content_hashes, sources, preprocess):
+        keys, used, clock = self._load_index()
+        clock += 1
+        row_of = {key: row for row, key in enumerate(keys)}
+        result = np.empty((len(content_hashes),) + self.shape, dtype=np.float32)
+
+        hits, hit_rows, missing = [], [], {}
+        for position, (content_hash, source) in enumerate(zip(content_hashes, sources)):
+            row = row_of.get(content_hash)
+            if row is not None:
+                hits.append(position)
+                hit_rows.append(row)
+                used[row] = clock
+            elif content_hash not in missing:
+                missing[content_hash] = (source, [position])
+            else:
+                missing[content_hash][1].append(position)
+        if hits:
+            stack = np.load(self.stack_path, mmap_mode='r')
+            result[hits] = stack[hit_rows]
+            del stack
+        for source, positions in missing.values():
+            result[positions] = preprocess(source)
+
+        # New images go to free rows first, then replace rows not used by this call, oldest first.
+        appended = min(len(missing), self.max_rows - len(keys))
+        replaceable = sorted((last_used, row) for row, last_used in enumerate(used) if last_used < clock)
+        rows = list(range(len(keys), len(keys) + appended))
+        rows += [row for _, row in replaceable[:len(missing) - appended]]
+        if rows:
+            self._reserve(len(keys) + appended)
+            keys.extend([None] * appended)
+            used.extend([clock] * appended)
+            stack = np.load(self.stack_path, mmap_mode='r+')
+            for row, (content_hash, (_, positions)) in zip(rows, missing.items()):
+                stack[row] = result[positions[0]]
+                keys[row] = content_hash
+                used[row] = clock
+            stack.flush()
+            del stack
+        self._save_index(keys, used, clock)
+        return result
+
+    def cached_keys(self):
+        """
+        Return the content hashes of the cached images.
+
+        Returns:
+        - set: Content hashes, e.g. the known_hashes of extract_folder_images.
+        """
+        return set(self._load_index()[0])
+
+    def load_stack(self, image_paths):
+        """
+        Return the preprocessed stack for the given images, decoding only unseen content.
+
+        Parameters:
+        - image_paths (list of str): Paths to the images.
+
+        Returns:
+        - numpy.ndarray: float32 array of shape (N, H, W) in the order of image_paths.
+        """
+        return self.load_keyed([file_content_hash(image_path) for image_path in image_paths], image_paths)
+
+    def load_keyed(self, content_hashes, sources):
+        """
+        Return the preprocessed stack for images given by content hash, preprocessing only
+        unseen ones.
+
+        Parameters:
+        - content_hashes (list of str): SHA-256 hex digest of each image's encoded bytes.
+        - sources (list): What preprocess is applied to for each image, e.g. paths or bytes.
+
+        Returns:
+        - numpy.ndarray: float32 array of shape (N, H, W) in the order of content_hashes.
+        """
+        return self._lookup(content_hashes, sources, self.preprocess)
+
+    def load_arrays(self, content_hashes, arrays):
+        """
+        Return the stack for images given by content hash, storing the arrays of uncached ones.
+
+        Parameters:
+        - content_hashes (list of str): SHA-256 hex digest of each image's encoded bytes.
+        - arrays (list): Preprocessed (height, width) array of each image, or None for images
+          that are already cached.
+
+        Returns:
+        - numpy.ndarray: float32 array of shape (N, H, W) in the order of content_hashes.
+        """
+        return self._lookup(content_hashes, arrays, lambda array: array)
@@ -0,0 +1,285 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+EMBEDDING_SIZE = (64, 64)
+_HISTOGRAM_BINS = [8, 4, 4]
+_HOG_CELL = 16
+_HOG_BINS = 9
+
+
+def _hog(gray):
+    # HOG over a 64x64 grayscale image: 3x3 blocks of 2x2 cells of 16x16 pixels, 9 unsigned
+    # orientations, L2-Hys block normalization. Computed with NumPy because cv2.HOGDescriptor
+    # is missing from some OpenCV builds.
+    gray = gray.astype(np.float32)
+    gx = np.zeros_like(gray)
+    gy = np.zeros_like(gray)
+    gx[:, 1:-1] = gray[:, 2:] - gray[:, :-2]
+    gy[1:-1, :] = gray[2:, :] - gray[:-2, :]
+    magnitude = np.hypot(gx, gy)
+    orientation = np.minimum((np.degrees(np.arctan2(gy, gx)) % 180) // (180 / _HOG_BINS), _HOG_BINS - 1)
+
+    cells_y, cells_x = gray.shape[0] // _HOG_CELL, gray.shape[1] // _HOG_CELL
+    cell_y = np.arange(gray.shape[0])[:, None] // _HOG_CELL
+    cell_x = np.arange(gray.shape[1])[None, :] // _HOG_CELL
+    bins = ((cell_y * cells_x + cell_x) * _HOG_BINS + orientation).astype(np.int64)
+    cells = np.bincount(bins.ravel(), magnitude.ravel(),
+                        cells_y * cells_x * _HOG_BINS).reshape(cells_y, cells_x, _HOG_BINS)
+
+    blocks = []
+    for y in range(cells_y - 1):
+        for x in range(cells_x - 1):
+            block = cells[y:y + 2, x:x + 2].ravel()
+            block = np.minimum(block / np.sqrt(np.sum(block ** 2) + 1e-6), 0.2)
+            blocks.append(block / np.sqrt(np.sum(block ** 2) + 1e-6))
+    return np.concatenate(blocks)
+
+
+def _normalized(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def image_embedding(img):
+    """
+    Compute a fixed-length feature vector of a decoded colour image.
+
+    The vector concatenates an HSV colour histogram (robust to cropping and small shifts) and a
+    HOG descriptor of the grayscale image (shape and layout), each L2-normalized, and is
+    normalized again so that the inner product of two embeddings is their cosine similarity.
+
+    Parameters:
+    - img (numpy.ndarray): Image as returned by cv2.imread (BGR).
+
+    Returns:
+    - numpy.ndarray: float32 vector of length 452.
+    """
+    import cv2
+
+    resized = cv2.resize(img, EMBEDDING_SIZE, interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(resized, cv2.COLOR_BGR2HSV)
+    histogram = cv2.calcHist([hsv], [0, 1, 2], None, _HISTOGRAM_BINS, [0, 180, 0, 256, 0, 256]).ravel()
+    hog = _hog(cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY))
+    embedding = np.concatenate([_normalized(np.sqrt(histogram)), _normalized(hog)]).astype(np.float32)
+    return _normalized(embedding)
+
+
+def embed_image_path(image_path):
+    """
+    Compute the embedding of an image file; raises ValueError if it cannot be read as an image.
+    """
+    import cv2
+
+    img = cv2.imread(image_path)
+    if img is None:
+        raise ValueError(f"Cannot read image {image_path}")
+    return image_embedding(img)
+
+
+def embed_image_paths(image_paths, workers=None):
+    """
+    Compute the embeddings of many image files once, in parallel.
+
+    Parameters:
+    - image_paths (list of str): Paths to the images.
+    - workers (int or None): Number of worker processes. None uses every CPU; 1 runs in-process.
+
+    Returns:
+    - numpy.ndarray: float32 array of shape (N, 452) in the order of image_paths.
+    """
+    if workers == 1 or len(image_paths) <= 1:
+        embeddings = [embed_image_path(image_path) for image_path in image_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            embeddings = list(executor.map(embed_image_path, image_paths, chunksize=64))
+    if not embeddings:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack(embeddings)
+
+
+def _merge_top_k(top_rows, top_scores, queries, candidate_rows, candidate_scores, k):
+    rows = np.concatenate([top_rows[queries], candidate_rows], axis=1)
+    scores = np.concatenate([top_scores[queries], candidate_scores], axis=1)
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k] if scores.shape[1] > k else np.argsort(-scores, axis=1)
+    top_rows[queries] = np.take_along_axis(rows, keep, axis=1)[:, :k]
+    top_scores[queries] = np.take_along_axis(scores, keep, axis=1)[:, :k]
+
+
+class IVFIndex:
+    """
+    On-disk inverted-file (IVF) index for approximate nearest-neighbour search by inner product.
+
+    The vectors are clustered by spherical k-means into n_lists lists and stored sorted by list,
+    so a query scores the centroids and then only the vectors of its n_probe closest lists.
+    The vectors are memory-mapped when loaded. The index is built once from all vectors;
+    adding images means rebuilding it.
+    """
+
+    def __init__(self, centroids, vectors, offsets, ids, n_probe=8):
+        """
+        Parameters:
+        - centroids (numpy.ndarray): List centroids of shape (n_lists, D).
+        - vectors (numpy.ndarray): Vectors of shape (N, D), sorted by list.
+        - offsets (numpy.ndarray): Start of each list in vectors, with N appended.
+        - ids (list of str): ID of each row of vectors.
+        - n_probe (int): Number of lists scanned per query.
+        """
+        self.centroids = centroids
+        self.vectors = vectors
+        self.offsets = offsets
+        self.ids = list(ids)
+        self.n_probe = n_probe
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors, ids, n_lists=None, n_probe=8, iterations=10, seed=0):
+        """
+        Cluster the vectors and build the index.
+
+        Parameters:
+        - vectors (numpy.ndarray): L2-normalized vectors of shape (N, D).
+        - ids (list of str): ID of each vector.
+        - n_lists (int or None): Number of lists; None uses about sqrt(N).
+        - n_probe (int): Default number of lists scanned per query.
+        - iterations (int): Number of k-means iterations.
+        - seed (int): Random seed of the k-means initialization.
+
+        Returns:
+        - IVFIndex: The index.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_vectors = len(vectors)
+        if n_vectors == 0:
+            return cls(np.zeros((0,) + vectors.shape[1:], dtype=np.float32), vectors, np.zeros(1, dtype=np.int64),
+                       [], n_probe)
+        n_lists = max(1, min(n_lists or int(np.sqrt(n_vectors)), n_vectors))
+        rng = np.random.RandomState(seed)
+        # Train on a sample; a few hundred vectors per list are plenty for the centroids.
+        sample = vectors[rng.choice(n_vectors, min(n_vectors, 256 * n_lists), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_number in range(n_lists):
+                members = sample[assignment == list_number]
+                if len(members):
+                    centroids[list_number] = _normalized(members.sum(axis=0))
+
+        assignment = np.concatenate([np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+                                     for start in range(0, n_vectors, 65536)])
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        return cls(centroids, vectors[order], offsets, [ids[row] for row in order], n_probe)
+
+    def search(self, queries, k=10, n_probe=None):
+        """
+        Find the approximate top-k neighbours of a batch of query vectors.
+
+        Queries are grouped by probed list so each list is scanned once per batch.
+
+        Parameters:
+        - queries (numpy.ndarray): Query embeddings of shape (M, D).
+        - k (int): Number of neighbours per query.
+        - n_probe (int or None): Lists scanned per query; None uses the index default.
+
+        Returns:
+        - tuple: (list of lists of IDs, numpy.ndarray of shape (M, k) of scores), best first.
+          Missing neighbours have ID None and score -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        top_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        top_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if len(queries) == 0 or len(self.ids) == 0 or k == 0:
+            return [[None] * k for _ in range(len(queries))], top_scores
+
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+        for list_number in np.unique(probes):
+            start, stop = self.offsets[list_number], self.offsets[list_number + 1]
+            if start == stop:
+                continue
+            query_rows = np.flatnonzero((probes == list_number).any(axis=1))
+            scores = queries[query_rows] @ np.asarray(self.vectors[start:stop]).T
+            candidate_rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            _merge_top_k(top_rows, top_scores, query_rows, candidate_rows, scores, k)
+
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top_rows = np.take_along_axis(top_rows, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        ids = [[self.ids[row] if row >= 0 else None for row in rows] for rows in top_rows]
+        return ids, top_scores
+
+    def save(self, path):
+        """
+        Save the index to a directory (centroids, vectors and offsets as .npy, IDs as JSON).
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        np.save(os.path.join(path, "vectors.npy"), np.asarray(self.vectors))
+        np.save(os.path.join(path, "offsets.npy"), self.offsets)
+        with open(os.path.join(path, "index.json"), "w") as file:
+            json.dump({'ids': self.ids, 'n_probe': self.n_probe}, file)
+
+    @staticmethod
+    def load(path):
+        """
+        Load an index saved with save; the vectors are memory-mapped.
+
+        Parameters:
+        - path (str): Index directory.
+
+        Returns:
+        - IVFIndex: The loaded index.
+        """
+        with open(os.path.join(path, "index.json")) as file:
+            meta = json.load(file)
+        return IVFIndex(np.load(os.path.join(path, "centroids.npy")),
+                        np.load(os.path.join(path, "vectors.npy"), mmap_mode='r'),
+                        np.load(os.path.join(path, "offsets.npy")), meta['ids'], meta['n_probe'])
+
+
+def build_embedding_index(image_paths, index_path, n_lists=None, workers=None):
+    """
+    Embed every image once and write the ANN index to disk.
+
+    Parameters:
+    - image_paths (list of str): Paths to the images; their file names are the index IDs.
+    - index_path (str): Index directory.
+    - n_lists (int or None): Number of IVF lists; None uses about sqrt(N).
+    - workers (int or None): Number of processes computing the embeddings.
+
+    Returns:
+    - IVFIndex: The built index.
+    """
+    embeddings = embed_image_paths(image_paths, workers)
+    index = IVFIndex.build(embeddings, [os.path.basename(image_path) for image_path in image_paths], n_lists)
+    index.save(index_path)
+    return index
+
+
+def embedding_top_k(index, k=10, n_probe=None, batch_size=4096):
+    """
+    Find the approximate top-k neighbours of every image in the index, excluding itself.
+
+    Parameters:
+    - index (IVFIndex): Index of the image set.
+    - k (int): Number of neighbours per image.
+    - n_probe (int or None): Lists scanned per query; None uses the index default.
+    - batch_size (int): Number of images queried at a time.
+
+    Returns:
+    - dict: Mapping of image ID to a list of (neighbour ID, score) tuples, most similar first.
+    """
+    neighbours = {}
+    for start in range(0, len(index), batch_size):
+        batch = np.asarray(index.vectors[start:start + batch_size])
+        ids, scores = index.search(batch, k + 1, n_probe)
+        for query_id, row_ids, row_scores in zip(index.ids[start:start + batch_size], ids, scores):
+            neighbours[query_id] = [(neighbour_id, float(score)) for neighbour_id, score in zip(row_ids, row_scores)
+                                    if neighbour_id is not None and neighbour_id != query_id][:k]
+    return neighbours
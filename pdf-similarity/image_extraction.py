@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Formats cv2.imdecode reads; other embedded formats (e.g. jpx, jbig2) are rendered to PNG for decoding.
+DECODABLE_EXTENSIONS = {"png", "jpg", "jpeg", "bmp", "tif", "tiff", "pbm", "pgm", "ppm"}
+
+
+def _decodable_bytes(pdf_document, xref, base_image):
+    import fitz
+
+    if base_image["ext"].lower() in DECODABLE_EXTENSIONS:
+        return base_image["image"]
+    pixmap = fitz.Pixmap(pdf_document, xref)
+    if pixmap.n - pixmap.alpha >= 4:
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    return pixmap.tobytes("png")
+
+
+def _write_image(images_folder_path, file_name, image_bytes):
+    image_path = os.path.join(images_folder_path, file_name)
+    # Names are content hashes, so an existing file already holds these bytes.
+    if not os.path.exists(image_path):
+        temporary_path = f"{image_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as image_file:
+            image_file.write(image_bytes)
+        os.replace(temporary_path, image_path)
+
+
+def extract_document_images(pdf_path, preprocess=None, images_folder_path=None, known_hashes=()):
+    """
+    Extract the distinct images of one PDF, each image xref only once.
+
+    The encoded bytes never leave this function: they are written to images_folder_path and
+    preprocessed here, so only arrays and metadata are returned.
+
+    Parameters:
+    - pdf_path (str): Path to the PDF file.
+    - preprocess (callable or None): Function mapping encoded image bytes to a preprocessed array,
+      e.g. preprocess_image_bytes. When set, each image is decoded here, in the worker.
+    - images_folder_path (str or None): Existing folder the images are written to as
+      '<content hash>.<extension>'. None writes nothing.
+    - known_hashes (collection of str): Content hashes of images that are not preprocessed, e.g.
+      the ones already held by an ImageTensorCache.
+
+    Returns:
+    - dict: 'File Name', 'Images', 'Image Errors' and 'Error' (None on success). 'Images' is a
+      list in first-use order of dicts with 'Content Hash', 'Extension', 'Xref', 'Pages' (1-based
+      pages using the image) and, with preprocess and unless the hash is known, 'Array'.
+      'Image Errors' maps the xrefs of images that could not be extracted or preprocessed to
+      their error; only those images are skipped.
+    """
+    import fitz
+
+    file_name = os.path.basename(pdf_path)
+    images = {}
+    image_errors = {}
+    try:
+        pdf_document = fitz.open(pdf_path)
+        try:
+            for page_num in range(pdf_document.page_count):
+                for img_info in pdf_document[page_num].get_images(full=True):
+                    xref = img_info[0]
+                    if xref in image_errors:
+                        continue
+                    if xref in images:
+                        if images[xref]['Pages'][-1] != page_num + 1:
+                            images[xref]['Pages'].append(page_num + 1)
+                        continue
+                    try:
+                        base_image = pdf_document.extract_image(xref)
+                        image = {'Content Hash': hashlib.sha256(base_image["image"]).hexdigest(),
+                                 'Extension': base_image["ext"].lower(), 'Xref': xref, 'Pages': [page_num + 1]}
+                        if preprocess is not None and image['Content Hash'] not in known_hashes:
+                            image['Array'] = preprocess(_decodable_bytes(pdf_document, xref, base_image))
+                        if images_folder_path is not None:
+                            _write_image(images_folder_path, image_file_name(image['Content Hash'],
+                                                                             image['Extension']),
+                                         base_image["image"])
+                    except Exception as e:
+                        image_errors[xref] = f"{type(e).__name__}: {e}"
+                        continue
+                    images[xref] = image
+        finally:
+            pdf_document.close()
+    except Exception as e:
+        return {'File Name': file_name, 'Images': [], 'Image Errors': {}, 'Error': f"{type(e).__name__}: {e}"}
+    return {'File Name': file_name, 'Images': list(images.values()), 'Image Errors': image_errors, 'Error': None}
+
+
+def _iter_document_images(file_paths, preprocess, images_folder_path, known_hashes, workers):
+    if workers == 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield extract_document_images(file_path, preprocess, images_folder_path, known_hashes)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_document_images, file_path, preprocess, images_folder_path,
+                                   known_hashes): file_path
+                   for file_path in file_paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'File Name': os.path.basename(futures[future]), 'Images': [], 'Image Errors': {},
+                       'Error': f"{type(e).__name__}: {e}"}
+
+
+def image_file_name(content_hash, extension):
+    """
+    Name of an extracted image file: its content hash with the real extension.
+    """
+    return f"{content_hash}.{extension}"
+
+
+def extract_folder_images(folder_path, images_folder_path=None, preprocess=None, workers=None, known_hashes=()):
+    """
+    Extract the images of every PDF in a folder in parallel, deduplicated by content.
+
+    Within a PDF an image xref is extracted once however many pages show it; across PDFs,
+    identical image bytes are kept once. Every unique image records where it occurs. Files are
+    named by content hash with their real extension, so images of different PDFs can never
+    overwrite each other, and a manifest.json with the provenance is written next to them.
+    The workers write the image files themselves and return no image bytes, so memory grows
+    with the preprocessed arrays only.
+
+    Parameters:
+    - folder_path (str): Path to the folder containing PDF files.
+    - images_folder_path (str or None): Folder the unique images and manifest are written to.
+      None writes nothing.
+    - preprocess (callable or None): Picklable function mapping encoded image bytes to a
+      preprocessed array; the arrays can be fed straight to the similarity stage.
+    - workers (int or None): Number of worker processes. None uses every CPU; 1 runs in-process.
+    - known_hashes (collection of str): Content hashes of images not to preprocess, e.g.
+      ImageTensorCache.cached_keys(); their entries have no 'Array'.
+
+    Returns:
+    - tuple: (list of dicts with 'Image File', 'Content Hash', 'Extension', 'Occurrences' (list
+      of dicts with 'Document', 'Page' and 'Xref') and, with preprocess and unless the hash is
+      known, 'Array', in directory-listing order of first occurrence; dict mapping the names of
+      failed files, or of files with skipped images, to their error).
+    """
+    file_names = [file_name for file_name in os.listdir(folder_path) if file_name.endswith(".pdf")]
+    file_paths = [os.path.join(folder_path, file_name) for file_name in file_names]
+    if images_folder_path is not None:
+        os.makedirs(images_folder_path, exist_ok=True)
+
+    documents = {}
+    errors = {}
+    for result in _iter_document_images(file_paths, preprocess, images_folder_path, set(known_hashes), workers):
+        if result['Error'] is None:
+            documents[result['File Name']] = result['Images']
+            if result['Image Errors']:
+                errors[result['File Name']] = f"{len(result['Image Errors'])} image(s) skipped: " + "; ".join(
+                    f"xref {xref}: {error}" for xref, error in result['Image Errors'].items())
+        else:
+            errors[result['File Name']] = result['Error']
+
+    unique = {}
+    for file_name in file_names:
+        for image in documents.get(file_name, []):
+            entry = unique.get(image['Content Hash'])
+            if entry is None:
+                entry = {'Image File': image_file_name(image['Content Hash'], image['Extension']),
+                         'Content Hash': image['Content Hash'], 'Extension': image['Extension'],
+                         'Occurrences': []}
+                if 'Array' in image:
+                    entry['Array'] = image['Array']
+                unique[image['Content Hash']] = entry
+            entry['Occurrences'].extend({'Document': file_name, 'Page': page, 'Xref': image['Xref']}
+                                        for page in image['Pages'])
+    images = list(unique.values())
+
+    if images_folder_path is not None:
+        write_manifest(images, images_folder_path)
+    return images, errors
+
+
+def write_manifest(images, images_folder_path):
+    """
+    Write the manifest of the unique images next to the image files.
+
+    Parameters:
+    - images (list of dict): Images as returned by extract_folder_images.
+    - images_folder_path (str): Existing output folder.
+
+    Returns:
+    - str: Path of the manifest.
+    """
+    manifest_path = os.path.join(images_folder_path, "manifest.json")
+    manifest = [{'Image File': image['Image File'], 'Content Hash': image['Content Hash'],
+                 'Extension': image['Extension'], 'Occurrences': image['Occurrences']} for image in images]
+    with open(f"{manifest_path}.tmp", "w") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return manifest_path
+
+
+def load_manifest(images_folder_path):
+    """
+    Read the manifest written by extract_folder_images.
+
+    Parameters:
+    - images_folder_path (str): Folder holding the images and manifest.json.
+
+    Returns:
+    - list of dict: One entry per unique image with 'Image File', 'Content Hash', 'Extension'
+      and 'Occurrences'.
+    """
+    with open(os.path.join(images_folder_path, "manifest.json")) as file:
+        return json.load(file)
@@ -0,0 +1,171 @@
+import numpy as np
+
+HASH_METHODS = ["ahash", "dhash", "phash"]
+
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def perceptual_hash(image, method="phash", hash_size=8):
+    """
+    Compute a 64-bit perceptual hash of a grayscale image.
+
+    Parameters:
+    - image (numpy.ndarray): 2-D grayscale image, e.g. a row of the preprocessed image stack.
+    - method (str): 'ahash' (mean), 'dhash' (horizontal gradient) or 'phash' (DCT).
+    - hash_size (int): Side of the hash grid; the hash has hash_size ** 2 bits.
+
+    Returns:
+    - int: The hash as an integer.
+    """
+    import cv2
+
+    image = np.asarray(image, dtype=np.float32)
+    if method == "ahash":
+        small = cv2.resize(image, (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+        return _bits_to_int(small > small.mean())
+    elif method == "dhash":
+        small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+        return _bits_to_int(small[:, 1:] > small[:, :-1])
+    elif method == "phash":
+        small = cv2.resize(image, (hash_size * 4, hash_size * 4), interpolation=cv2.INTER_AREA)
+        low_frequencies = cv2.dct(small)[:hash_size, :hash_size]
+        # The DC term only reflects overall brightness, so it is left out of the median.
+        return _bits_to_int(low_frequencies > np.median(low_frequencies.ravel()[1:]))
+    else:
+        raise ValueError("Invalid image hash method")
+
+
+def hamming_distance(hash1, hash2):
+    """
+    Number of differing bits between two integer hashes.
+    """
+    return bin(hash1 ^ hash2).count("1")
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes for Hamming-radius queries.
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def add(self, hash_value, item):
+        """
+        Insert a hash with an associated item (e.g. the image index).
+
+        Parameters:
+        - hash_value (int): Perceptual hash.
+        - item: Value returned by search for this hash.
+        """
+        node = [hash_value, [item], {}]
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming_distance(hash_value, current[0])
+            if distance == 0:
+                current[1].append(item)
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, hash_value, radius):
+        """
+        Find every stored item whose hash is within radius of hash_value.
+
+        Parameters:
+        - hash_value (int): Query hash.
+        - radius (int): Maximum Hamming distance.
+
+        Returns:
+        - list: List of (item, distance) tuples.
+        """
+        matches = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= radius:
+                matches.extend((item, distance) for item in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return matches
+
+
+def hash_stack(image_stack, method="phash"):
+    """
+    Hash every image of a preprocessed stack once.
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - method (str): Hash method, one of HASH_METHODS.
+
+    Returns:
+    - list of int: One hash per image.
+    """
+    return [perceptual_hash(image, method) for image in image_stack]
+
+
+def candidate_pairs(hashes, radius):
+    """
+    Find every image pair whose hashes are within a Hamming radius.
+
+    Parameters:
+    - hashes (list of int): One hash per image.
+    - radius (int): Maximum Hamming distance.
+
+    Returns:
+    - set: Set of (i, j) index pairs with i < j.
+    """
+    tree = BKTree()
+    for index, hash_value in enumerate(hashes):
+        tree.add(hash_value, index)
+    pairs = set()
+    for i, hash_value in enumerate(hashes):
+        for j, _ in tree.search(hash_value, radius):
+            if i < j:
+                pairs.add((i, j))
+    return pairs
+
+
+def recall_report(image_stack, score_function, radii=range(0, 33, 4), similarity_threshold=0.8, methods=HASH_METHODS):
+    """
+    Measure how many exhaustive-SSIM matches each hash method and radius keeps.
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - score_function (callable): Function (image1, image2) -> similarity, e.g. SSIM.
+    - radii (iterable of int): Hamming radii to evaluate.
+    - similarity_threshold (float): Pairs scoring at least this exhaustively count as matches.
+    - methods (list of str): Hash methods to evaluate.
+
+    Returns:
+    - list of dict: One entry per method and radius with the number of candidate pairs, the
+      fraction of all pairs they represent, and the recall of the exhaustive matches.
+    """
+    n_images = len(image_stack)
+    n_pairs = n_images * (n_images - 1) // 2
+    matches = {(i, j) for i in range(n_images) for j in range(i + 1, n_images)
+               if score_function(image_stack[i], image_stack[j]) >= similarity_threshold}
+
+    report = []
+    for method in methods:
+        hashes = hash_stack(image_stack, method)
+        for radius in radii:
+            candidates = candidate_pairs(hashes, radius)
+            report.append({'method': method, 'radius': radius, 'candidate_pairs': len(candidates),
+                           'candidate_fraction': len(candidates) / n_pairs if n_pairs else 0.0,
+                           'matches': len(matches),
+                           'recall': len(matches & candidates) / len(matches) if matches else 1.0})
+    return report
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+def _flatten(image_stack):
+    image_stack = np.asarray(image_stack)
+    return image_stack.reshape(len(image_stack), int(np.prod(image_stack.shape[1:])))
+
+
+def _negative_mse(rows, columns, row_norms, column_norms, n_features):
+    # ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b, computed in float64 to limit cancellation.
+    squared_distances = row_norms[:, None] + column_norms[None, :] - 2.0 * (rows @ columns.T)
+    np.maximum(squared_distances, 0.0, out=squared_distances)
+    return -squared_distances / float(n_features)
+
+
+def iter_mse_blocks(image_stack, block_size=256):
+    """
+    Yield row blocks of the upper part of the pairwise image similarity matrix (-MSE).
+
+    Each block holds the scores of images ``start:start + block_size`` against images
+    ``start:``, so memory stays bounded by ``block_size * N`` floats. The values follow the
+    ``-mse`` convention of calculate_image_similarity.
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - block_size (int): Number of rows per block.
+
+    Returns:
+    - generator: Yields (start, numpy.ndarray) where block[r, c] is the score of images
+      ``start + r`` and ``start + c``.
+    """
+    flat = _flatten(image_stack)
+    n_images, n_features = flat.shape
+    norms = np.einsum('ij,ij->i', flat, flat, dtype=np.float64)
+    for start in range(0, n_images, block_size):
+        stop = min(start + block_size, n_images)
+        rows = flat[start:stop].astype(np.float64)
+        block = np.empty((stop - start, n_images - start))
+        for column_start in range(start, n_images, block_size):
+            column_stop = min(column_start + block_size, n_images)
+            columns = flat[column_start:column_stop].astype(np.float64)
+            block[:, column_start - start:column_stop - start] = _negative_mse(
+                rows, columns, norms[start:stop], norms[column_start:column_stop], n_features)
+        yield start, block
+
+
+def mse_matrix(image_stack, block_size=256):
+    """
+    Compute the full N x N image similarity matrix (-MSE).
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - block_size (int): Number of rows computed at a time.
+
+    Returns:
+    - numpy.ndarray: Symmetric N x N matrix with zeros on the diagonal.
+    """
+    n_images = len(image_stack)
+    matrix = np.zeros((n_images, n_images))
+    for start, block in iter_mse_blocks(image_stack, block_size):
+        matrix[start:start + len(block), start:] = block
+        matrix[start:, start:start + len(block)] = block.T
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+
+def mse_top_k(image_stack, k=10, block_size=256):
+    """
+    Find the k nearest neighbours of every image by MSE.
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - k (int): Number of neighbours per image.
+    - block_size (int): Number of rows and columns computed at a time.
+
+    Returns:
+    - tuple: (indices, scores) arrays of shape (N, k), most similar (highest -MSE) first.
+    """
+    flat = _flatten(image_stack)
+    n_images, n_features = flat.shape
+    k = min(k, max(n_images - 1, 0))
+    norms = np.einsum('ij,ij->i', flat, flat, dtype=np.float64)
+    indices = np.zeros((n_images, k), dtype=np.int64)
+    scores = np.zeros((n_images, k))
+    if k == 0:
+        return indices, scores
+
+    for start in range(0, n_images, block_size):
+        stop = min(start + block_size, n_images)
+        rows = flat[start:stop].astype(np.float64)
+        block = np.empty((stop - start, n_images))
+        for column_start in range(0, n_images, block_size):
+            column_stop = min(column_start + block_size, n_images)
+            block[:, column_start:column_stop] = _negative_mse(
+                rows, flat[column_start:column_stop].astype(np.float64),
+                norms[start:stop], norms[column_start:column_stop], n_features)
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        indices[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
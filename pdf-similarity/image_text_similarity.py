@@ -1,45 +1,40 @@
 
-import fitz
 import os
-import PyPDF2
+import warnings
 import pandas as pd
 from Levenshtein import distance
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-import re
-import nltk
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from skimage.metrics import structural_similarity as ssim
-from skimage import transform
-import cv2
+from pdf_extraction import TEXT_COLUMNS, extract_folder
+from text_cache import TextCache, reusable_pair_scores
+import text_preprocessing
+from pair_scoring import SIMILARITY_METHODS, iter_text_pair_chunks, result_columns, score_settings
+from result_writer import ChunkedResultWriter, result_path
+from matrix_store import MatrixStore, matrix_store_path
+from image_cache import ImageTensorCache, stack_images
+from image_extraction import extract_folder_images
+from image_mse import iter_mse_blocks
+from image_hash import candidate_pairs, hash_stack
+from ssim_parallel import iter_ssim_blocks, ssim_score
+from neighbour_index import NeighbourIndex, neighbour_index_path
+from image_embedding import embed_image_path
 import numpy as np
 import textdistance
 
-nltk.download('punkt')
-nltk.download('stopwords')
 
 def preprocess_text(text):
     """
     Preprocess text by converting to lowercase, removing non-alphanumeric characters,
     tokenizing, removing stopwords, and stemming.
 
+    The stopword set and stemmer are shared across calls; use text_preprocessing.preprocess_texts
+    to preprocess many documents at once.
+
     Parameters:
     - text (str): Input text.
 
     Returns:
     - str: Preprocessed text.
     """
-    text = text.lower()
-    text = re.sub(r"[^a-zA-Z0-9]", " ", text)
-    tokens = word_tokenize(text)
-    stop_words = set(stopwords.words("english"))
-    filtered_tokens = [word for word in tokens if word.lower() not in stop_words]
-    stemmer = PorterStemmer()
-    stemmed_tokens = [stemmer.stem(word) for word in filtered_tokens]
-    preprocessed_text = " ".join(stemmed_tokens)
-    return preprocessed_text
+    return text_preprocessing.preprocess_text(text)
 
 def calculate_similarity(text1, text2, method):
     """
@@ -56,6 +51,8 @@ def calculate_similarity(text1, text2, method):
     if method == "Levenshtein":
         return 1 - (distance(text1, text2) / max(len(text1), len(text2)))
     elif method == "Cosine":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
         vectorizer = TfidfVectorizer().fit_transform([text1, text2])
         cosine_sim = cosine_similarity(vectorizer)
         return cosine_sim[0, 1]
@@ -74,6 +71,9 @@ def calculate_similarity(text1, text2, method):
 desired_width = 100
 desired_height = 100 
 
+# Describes preprocess_image_array; part of the image tensor cache file names so changing it invalidates them.
+IMAGE_PREPROCESS_SETTINGS = f"gray;gaussian-5x5;equalize-hist;resize-{desired_width}x{desired_height};scale-255"
+
 def preprocess_image(image_path):
     """
     Preprocess image by converting to grayscale, applying Gaussian blur, histogram equalization,
@@ -85,7 +85,33 @@ def preprocess_image(image_path):
     Returns:
     - numpy.ndarray: Preprocessed image.
     """
-    img = cv2.imread(image_path)
+    import cv2
+    return preprocess_image_array(cv2.imread(image_path))
+
+def preprocess_image_bytes(image_bytes):
+    """
+    Decode an encoded image (e.g. extracted from a PDF) and preprocess it like preprocess_image.
+
+    Parameters:
+    - image_bytes (bytes): Encoded image in a format cv2 can decode.
+
+    Returns:
+    - numpy.ndarray: Preprocessed image.
+    """
+    import cv2
+    return preprocess_image_array(cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR))
+
+def preprocess_image_array(img):
+    """
+    Preprocess a decoded BGR image; shared by preprocess_image and preprocess_image_bytes.
+
+    Parameters:
+    - img (numpy.ndarray): Image as returned by cv2.imread.
+
+    Returns:
+    - numpy.ndarray: Preprocessed image.
+    """
+    import cv2
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     blurred_img = cv2.GaussianBlur(gray, (5, 5), 0)
     equalized_img = cv2.equalizeHist(blurred_img)
@@ -100,16 +126,34 @@ def calculate_image_similarity(image_path1, image_path2, method='ssim'):
     Parameters:
     - image_path1 (str): Path to the first image.
     - image_path2 (str): Path to the second image.
-    - method (str): Image similarity calculation method ('ssim' or 'mse').
+    - method (str): Image similarity calculation method ('ssim', 'mse' or 'embedding'). 'embedding'
+      is the cosine similarity of colour-histogram and HOG feature vectors (see image_embedding.py),
+      which is less sensitive to cropping and colour changes; for large image sets, build an
+      IVFIndex once and query it instead of comparing pairs.
 
     Returns:
     - float: Image similarity index.
     """
+    if method == 'embedding':
+        return float(np.dot(embed_image_path(image_path1), embed_image_path(image_path2)))
     preprocessed_img1 = preprocess_image(image_path1)
     preprocessed_img2 = preprocess_image(image_path2)
+    return image_similarity(preprocessed_img1, preprocessed_img2, method)
+
+def image_similarity(preprocessed_img1, preprocessed_img2, method='ssim'):
+    """
+    Calculate similarity between two already preprocessed images using specified method.
 
+    Parameters:
+    - preprocessed_img1 (numpy.ndarray): First image, as returned by preprocess_image.
+    - preprocessed_img2 (numpy.ndarray): Second image, as returned by preprocess_image.
+    - method (str): Image similarity calculation method ('ssim' or 'mse').
+
+    Returns:
+    - float: Image similarity index.
+    """
     if method == 'ssim':
-        similarity_index, _ = ssim(preprocessed_img1, preprocessed_img2, full=True, data_range=preprocessed_img2.max() - preprocessed_img2.min())
+        similarity_index = ssim_score(preprocessed_img1, preprocessed_img2)
     elif method == 'mse':
         mse = np.sum((preprocessed_img1 - preprocessed_img2) ** 2) / float(preprocessed_img1.size)
         similarity_index = -mse
@@ -129,6 +173,7 @@ def extract_images_from_pdf(pdf_path, images_folder_path):
     if not os.path.exists(images_folder_path):
         os.makedirs(images_folder_path)
 
+    import fitz
     pdf_document = fitz.open(pdf_path)
 
     for page_num in range(pdf_document.page_count):
@@ -147,7 +192,32 @@ def extract_images_from_pdf(pdf_path, images_folder_path):
 
     pdf_document.close()
 
-def process_folder_with_images_and_text(folder_path, output_pickle_path, output_csv_path):
+def image_pair_frame(image_files, start, ssim_block, mse_block):
+    """
+    Build the result rows of one row block of the image similarity matrices.
+
+    Parameters:
+    - image_files (list of str): Image file name of each index.
+    - start (int): Index of the first row of the blocks.
+    - ssim_block (numpy.ndarray): SSIM block as yielded by iter_ssim_blocks.
+    - mse_block (numpy.ndarray): MSE block as yielded by iter_mse_blocks.
+
+    Returns:
+    - pd.DataFrame: One row per pair i < j of the block with 'Image1', 'Image2' and both scores.
+    """
+    rows, columns = np.triu_indices(mse_block.shape[0], k=1, m=mse_block.shape[1])
+    image_files = np.asarray(image_files, dtype=object)
+    return pd.DataFrame({'Image1': image_files[start + rows], 'Image2': image_files[start + columns],
+                         'Image Similarity (SSIM)': ssim_block[rows, columns],
+                         'Image Similarity (MSE)': mse_block[rows, columns]})
+
+def process_folder_with_images_and_text(folder_path, output_pickle_path, output_csv_path, corpus_cosine=True,
+                                        jaccard_threshold=None, minhash_store_path=None,
+                                        workers=None, timeout=None, cache_dir=None, cache_max_bytes=1 << 30,
+                                        levenshtein_min_similarity=None, output_format="csv", chunk_rows=100000,
+                                        image_cache_dir=None, image_hash_radius=None, image_hash_method="phash",
+                                        image_neighbours=50, methods=SIMILARITY_METHODS, cosine_threshold=None,
+                                        image_cache_max_bytes=1 << 30):
     """
     Process PDF files with both text and images in a folder, calculate text and image similarities,
     and save results to pickle and CSV.
@@ -156,79 +226,119 @@ def process_folder_with_images_and_text(folder_path, output_pickle_path, output_
     - folder_path (str): Path to the folder containing PDF files.
     - output_pickle_path (str): Path to save the pickle file.
     - output_csv_path (str): Path to save the CSV file.
+    - corpus_cosine (bool): Score the Cosine method from one TF-IDF fitted over the whole
+      folder instead of fitting a vectorizer per pair.
+    - jaccard_threshold (float or None): When set, the Jaccard method is scored only for the
+      MinHash/LSH candidate pairs at or above this similarity; other pairs are left empty.
+      None keeps the exhaustive all-pairs comparison, which is fine for small folders.
+    - minhash_store_path (str or None): Pickle file for the MinHash signatures so later runs
+      only hash new or changed PDFs. The preprocessed-text signatures are stored next to it
+      with a '_preprocessed' suffix.
+    - workers (int or None): Number of processes used to extract and preprocess the PDFs and
+      to score Levenshtein and SSIM pairs. None uses every CPU.
+    - timeout (float or None): Maximum number of seconds spent on a single PDF. PDFs that fail
+      or time out are skipped with a warning.
+    - cache_dir (str or None): Directory of the content-addressed text cache. When set, only new
+      or changed PDFs are extracted and preprocessed, and the Levenshtein, Jaccard and Hamming
+      scores of pairs whose files are unchanged are reused from the previous pickle and matrix store
+      when they were scored with the same settings.
+    - cache_max_bytes (int): Size limit of the text cache; least recently used entries are evicted.
+    - levenshtein_min_similarity (float or None): When set, Levenshtein pairs that cannot reach
+      this similarity are pruned by length or by an early-stopping distance and left empty.
+    - output_format (str): 'csv' writes output_csv_path; 'parquet' writes a partitioned dataset
+      next to it with a '.parquet' suffix. The same scores are always also written to a compact
+      matrix store with a '.matrix' suffix (see matrix_store.py), which the viewers load lazily.
+    - chunk_rows (int): Number of result rows scored and written at a time.
+    - image_cache_dir (str or None): Directory of the memory-mapped stack of preprocessed images,
+      keyed by image content hash, so unchanged images are not decoded again on later runs.
+      Either way every image is preprocessed only once per run.
+    - image_cache_max_bytes (int): Size limit of the image stack; least recently used images are
+      replaced.
+    - image_hash_radius (int or None): When set, SSIM is computed only for image pairs whose
+      perceptual hashes are within this Hamming distance; other pairs are left empty.
+    - image_hash_method (str): Perceptual hash used for the prefilter ('ahash', 'dhash' or 'phash').
+    - image_neighbours (int): Number of most similar images (by SSIM) kept per image in the
+      neighbour index written next to the image results for the viewer.
+    - methods (list of str): Text similarity methods to score, a subset of SIMILARITY_METHODS.
+    - cosine_threshold (float or None): When set with corpus_cosine, Cosine scores below this
+      similarity are pruned from the sparse TF-IDF products and left empty.
     """
-    data = []
-    similarities_text = []
-    similarities_image = []
-
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith(".pdf"):
-            file_path = os.path.join(folder_path, file_name)
-            images_folder_path = os.path.join(folder_path, "images")
-
-            extract_images_from_pdf(file_path, images_folder_path)
-
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                file_text = ""
-
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    file_text += text.lower()
-
-                preprocessed_text = preprocess_text(file_text)
-                data.append({'File Name': file_name, 'Text': file_text, 'Preprocessed Text': preprocessed_text})
-
-    df = pd.DataFrame(data)
-    df.to_pickle(output_pickle_path)
-
-    similarity_methods_text = ["Levenshtein", "Cosine", "Jaccard", "Hamming"]
-    for method_text in similarity_methods_text:
-        similarity_list_text = []
-        for i in range(len(df)):
-            for j in range(i + 1, len(df)):
-                file1_name, text1, preprocessed_text1 = df.iloc[i]['File Name'], df.iloc[i]['Text'], df.iloc[i]['Preprocessed Text']
-                file2_name, text2, preprocessed_text2 = df.iloc[j]['File Name'], df.iloc[j]['Text'], df.iloc[j]['Preprocessed Text']
-
-                similarity_normal_text = calculate_similarity(text1, text2, method_text)
-                similarity_preprocessed_text = calculate_similarity(preprocessed_text1, preprocessed_text2, method_text)
-
-                similarity_list_text.append({'File1': file1_name, 'File2': file2_name, f'Similarity ({method_text}) (Normal Text)': similarity_normal_text,
-                                        f'Similarity ({method_text}) (Preprocessed Text)': similarity_preprocessed_text})
-
-        similarity_df_text = pd.DataFrame(similarity_list_text)
-        similarities_text.append(similarity_df_text)
-
-    similarity_methods_image = ["ssim", "mse"]
+    # Unique images are decoded in the extraction workers, except those the tensor cache holds.
+    image_cache = None
+    if image_cache_dir is not None:
+        image_cache = ImageTensorCache(image_cache_dir, desired_width, desired_height, preprocess_image_bytes,
+                                       IMAGE_PREPROCESS_SETTINGS, image_cache_max_bytes)
     images_folder_path = os.path.join(folder_path, "images")
+    images, image_errors = extract_folder_images(folder_path, images_folder_path, preprocess_image_bytes, workers,
+                                                 image_cache.cached_keys() if image_cache is not None else ())
+    for file_name, error in image_errors.items():
+        warnings.warn(f"Images of {file_name}: {error}")
+
+    cache = TextCache(cache_dir, cache_max_bytes, text_preprocessing.PREPROCESS_SETTINGS) if cache_dir is not None else None
+    data, errors = extract_folder(folder_path, text_preprocessing.preprocess_text, workers, timeout, cache)
+    for file_name, error in errors.items():
+        warnings.warn(f"Skipping {file_name}: {error}")
+
+    # Explicit columns keep an empty folder (or one where every PDF fails) a valid empty table.
+    df = pd.DataFrame(data, columns=TEXT_COLUMNS + (['Content Hash'] if cache is not None else []))
+    settings = score_settings(text_preprocessing.PREPROCESS_SETTINGS, corpus_cosine, cosine_threshold,
+                              jaccard_threshold, levenshtein_min_similarity)
+    reusable_scores = None
+    if cache is not None:
+        reusable_scores = reusable_pair_scores(output_pickle_path, matrix_store_path(output_csv_path),
+                                               df['File Name'].tolist(), df['Content Hash'].tolist(), settings)
+    df.to_pickle(output_pickle_path)
 
-    for method_image in similarity_methods_image:
-        similarity_list_image = []
-        image_files = [f for f in os.listdir(images_folder_path) if f.endswith(".png")]
-
-        for i in range(len(image_files)):
-            for j in range(i + 1, len(image_files)):
-                image1_path = os.path.join(images_folder_path, image_files[i])
-                image2_path = os.path.join(images_folder_path, image_files[j])
-
-                image_similarity = calculate_image_similarity(image1_path, image2_path, method=method_image)
-
-                similarity_list_image.append({'Image1': image_files[i], 'Image2': image_files[j], f'Image Similarity ({method_image.upper()})': image_similarity})
-
-        similarity_df_image = pd.DataFrame(similarity_list_image)
-        similarities_image.append(similarity_df_image)
-
-    final_similarity_df_text = pd.concat(similarities_text, axis=1)
-    final_similarity_df_text.to_csv(output_csv_path, index=False)
-
-    final_similarity_df_image = pd.concat(similarities_image, axis=1)
-    final_similarity_df_image.to_csv(output_csv_path.replace('.csv', '_image.csv'), index=False)
-
-# Example usage
-#change the path of the input folder as desired 
-input_folder_path = "C:\\Users\\sairaj.bai\\Desktop\\pdf2\\images_pdf"
-output_pickle_path = 'output_all_simila.pkl'
-output_csv_path = 'output_all_similar.csv'
-process_folder_with_images_and_text(input_folder_path, output_pickle_path, output_csv_path)
-
+    # The previous store is read for reuse while the new one is written, so write it aside.
+    store = MatrixStore.create(matrix_store_path(output_csv_path) + ".new", df['File Name'], settings=settings)
+    with ChunkedResultWriter(result_path(output_csv_path, output_format), output_format, chunk_rows,
+                             result_columns(methods)) as writer:
+        for chunk in iter_text_pair_chunks(df, calculate_similarity, reusable_scores, corpus_cosine, jaccard_threshold,
+                                           minhash_store_path, levenshtein_min_similarity, workers,
+                                           methods=methods, chunk_rows=chunk_rows,
+                                           cosine_threshold=cosine_threshold):
+            writer.write(chunk)
+            store.write_frame(chunk)
+    if reusable_scores is not None:
+        reusable_scores.close()
+    store.move(matrix_store_path(output_csv_path))
+
+    if image_cache is not None:
+        image_stack = image_cache.load_arrays([image['Content Hash'] for image in images],
+                                              [image.get('Array') for image in images])
+    else:
+        image_stack = stack_images([image['Array'] for image in images])
+
+    image_files = [image['Image File'] for image in images]
+    image_output_path = result_path(output_csv_path.replace('.csv', '_image.csv'), output_format)
+
+    ssim_pairs = None
+    if image_hash_radius is not None and len(image_files) >= 2:
+        ssim_pairs = candidate_pairs(hash_stack(image_stack, image_hash_method), image_hash_radius)
+
+    neighbours = NeighbourIndex(image_files, image_neighbours)
+    image_store = MatrixStore.create(matrix_store_path(output_csv_path.replace('.csv', '_image.csv')), image_files,
+                                     ('Image1', 'Image2'))
+    with ChunkedResultWriter(image_output_path, output_format, chunk_rows) as writer:
+        if len(image_files) < 2:
+            # No image pairs to score: write the empty table only.
+            writer.write(pd.DataFrame(columns=['Image1', 'Image2', 'Image Similarity (SSIM)',
+                                               'Image Similarity (MSE)']))
+        else:
+            for (start, mse_block), (_, ssim_block) in zip(iter_mse_blocks(image_stack),
+                                                           iter_ssim_blocks(image_stack, pairs=ssim_pairs,
+                                                                            workers=workers)):
+                neighbours.update(start, ssim_block)
+                image_store.write_block('Image Similarity (SSIM)', start, ssim_block)
+                image_store.write_block('Image Similarity (MSE)', start, mse_block)
+                writer.write(image_pair_frame(image_files, start, ssim_block, mse_block))
+    image_store.flush()
+    neighbours.save(neighbour_index_path(output_csv_path))
+
+if __name__ == "__main__":
+    # Example usage
+    #change the path of the input folder as desired 
+    input_folder_path = "C:\\Users\\sairaj.bai\\Desktop\\pdf2\\images_pdf"
+    output_pickle_path = 'output_all_simila.pkl'
+    output_csv_path = 'output_all_similar.csv'
+    process_folder_with_images_and_text(input_folder_path, output_pickle_path, output_csv_path)
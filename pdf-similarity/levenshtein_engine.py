@@ -0,0 +1,167 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+except ImportError:
+    _rapidfuzz_levenshtein = None
+    from Levenshtein import distance as _levenshtein_distance
+
+_worker_texts = None
+
+
+def bounded_distance(text1, text2, max_distance=None):
+    """
+    Levenshtein distance that may stop early once it exceeds max_distance.
+
+    With rapidfuzz installed the computation is capped with score_cutoff; otherwise the full
+    distance from python-Levenshtein is computed.
+
+    Parameters:
+    - text1 (str): First text.
+    - text2 (str): Second text.
+    - max_distance (int or None): Largest distance of interest.
+
+    Returns:
+    - int: The exact distance if it is at most max_distance, otherwise any value above it.
+    """
+    if _rapidfuzz_levenshtein is not None:
+        return _rapidfuzz_levenshtein.distance(text1, text2, score_cutoff=max_distance)
+    return _levenshtein_distance(text1, text2)
+
+
+def levenshtein_similarity(text1, text2, min_similarity=None):
+    """
+    Normalised Levenshtein similarity, 1 - distance / max(len(text1), len(text2)).
+
+    Parameters:
+    - text1 (str): First text.
+    - text2 (str): Second text.
+    - min_similarity (float or None): Pairs below this similarity are not scored exactly.
+
+    Returns:
+    - float or None: The similarity, or None if it is below min_similarity. Two empty texts
+      count as identical.
+    """
+    max_length = max(len(text1), len(text2))
+    if max_length == 0:
+        return 1.0
+    if min_similarity is None:
+        return 1 - (bounded_distance(text1, text2) / max_length)
+
+    # The distance is at least the length difference, so min/max length bounds the similarity.
+    if min(len(text1), len(text2)) / max_length < min_similarity:
+        return None
+    # (1 - 0.9) * 10 is 0.999..., so a plain int() would drop pairs exactly at the threshold.
+    max_distance = math.floor((1 - min_similarity) * max_length + 1e-9)
+    text_distance = bounded_distance(text1, text2, max_distance)
+    if text_distance > max_distance:
+        return None
+    similarity = 1 - (text_distance / max_length)
+    return similarity if similarity >= min_similarity else None
+
+
+def _init_worker(texts):
+    global _worker_texts
+    _worker_texts = texts
+
+
+def _score_chunk(pairs, min_similarity):
+    return [(position, levenshtein_similarity(_worker_texts[i], _worker_texts[j], min_similarity))
+            for i, j, position in pairs]
+
+
+class LevenshteinEngine:
+    """
+    Worker pool scoring normalised Levenshtein similarities of document pairs, chunk by chunk.
+
+    The texts are sent to each worker once when the pool starts, and the pool is reused for
+    every chunk, so pairs can be streamed through it without holding all of them. Use as a
+    context manager.
+    """
+
+    def __init__(self, texts, min_similarity=None, workers=None, chunk_size=64):
+        """
+        Parameters:
+        - texts (list of str): Documents, indexed by position.
+        - min_similarity (float or None): Minimum similarity to keep. None scores every pair.
+        - workers (int or None): Number of worker processes. None uses every CPU; 1 runs in-process.
+        - chunk_size (int): Number of pairs per task.
+        """
+        self.texts = texts
+        self.lengths = [len(text) for text in texts]
+        self.min_similarity = min_similarity
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self._executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.texts,))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        _init_worker(None)
+
+    def score(self, pairs):
+        """
+        Score a batch of pairs.
+
+        Pairs whose length ratio already rules out min_similarity are skipped without computing
+        a distance, and the remaining distances stop early once they exceed the threshold.
+
+        Parameters:
+        - pairs (list of tuple): (i, j) index pairs.
+
+        Returns:
+        - list: Similarity of each pair, or None where it is below min_similarity.
+        """
+        lengths, min_similarity = self.lengths, self.min_similarity
+        candidates = []
+        for position, (i, j) in enumerate(pairs):
+            longest = max(lengths[i], lengths[j])
+            if min_similarity is not None and longest and min(lengths[i], lengths[j]) / longest < min_similarity:
+                continue
+            candidates.append((i, j, position))
+        # Similar lengths take similar time, so longest-first keeps the workers evenly loaded.
+        candidates.sort(key=lambda pair: -max(lengths[pair[0]], lengths[pair[1]]))
+
+        chunks = [candidates[start:start + self.chunk_size] for start in range(0, len(candidates), self.chunk_size)]
+        if self._executor is None or len(chunks) <= 1:
+            _init_worker(self.texts)
+            scored_chunks = [_score_chunk(chunk, min_similarity) for chunk in chunks]
+        else:
+            scored_chunks = self._executor.map(_score_chunk, chunks, [min_similarity] * len(chunks))
+
+        scores = [None] * len(pairs)
+        for scored_chunk in scored_chunks:
+            for position, similarity in scored_chunk:
+                scores[position] = similarity
+        return scores
+
+
+def levenshtein_similarities(texts, pairs=None, min_similarity=None, workers=None, chunk_size=64):
+    """
+    Score document pairs with the normalised Levenshtein similarity on worker processes.
+
+    Parameters:
+    - texts (list of str): Documents, indexed by position.
+    - pairs (iterable of tuple or None): (i, j) index pairs to score. None scores all i < j.
+    - min_similarity (float or None): Minimum similarity to keep. None scores every pair.
+    - workers (int or None): Number of worker processes. None uses every CPU; 1 runs in-process.
+    - chunk_size (int): Number of pairs per task.
+
+    Returns:
+    - dict: Maps (i, j) to the similarity for every pair at or above min_similarity.
+    """
+    if pairs is None:
+        pairs = ((i, j) for i in range(len(texts)) for j in range(i + 1, len(texts)))
+    pairs = list(pairs)
+    with LevenshteinEngine(texts, min_similarity, workers, chunk_size) as engine:
+        scores = engine.score(pairs)
+    return {pair: similarity for pair, similarity in zip(pairs, scores) if similarity is not None}
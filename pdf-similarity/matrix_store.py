@@ -0,0 +1,272 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from result_writer import ChunkedResultWriter
+
+
+def matrix_store_path(output_csv_path):
+    """
+    Path of the matrix store written next to a CSV result table.
+    """
+    return os.path.splitext(output_csv_path)[0] + ".matrix"
+
+
+def condensed_index(i, j, n_items):
+    """
+    Position of the pair (i, j), i != j, in a condensed upper-triangular array of n_items items.
+
+    Works element-wise on numpy arrays as well as on ints.
+    """
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return i * n_items - i * (i + 1) // 2 + (j - i - 1)
+
+
+class MatrixStore:
+    """
+    Pairwise similarity scores as a string table of item IDs plus one condensed upper-triangular
+    float32 array per metric.
+
+    A store is a directory holding ``ids.json``, ``meta.json`` and one ``.npy`` file per metric
+    of length N * (N - 1) / 2 in the pair order (0, 1), (0, 2), ..., (N - 2, N - 1). The arrays
+    are memory-mapped, so opening a store reads nothing but the ID table, a pair lookup is O(1)
+    and a row slice touches N values. Pairs never written are NaN.
+
+    ``settings`` maps metrics to a description of the settings their scores were computed with,
+    so later runs only reuse scores computed the same way.
+    """
+
+    def __init__(self, path, ids, key_columns, metrics, mode='r', settings=None):
+        self.path = path
+        self.ids = list(ids)
+        self.key_columns = list(key_columns)
+        self.settings = dict(settings or {})
+        self.position = {item_id: index for index, item_id in enumerate(self.ids)}
+        self.n_pairs = len(self.ids) * (len(self.ids) - 1) // 2
+        self.mode = mode
+        self._files = dict(metrics)
+        self._arrays = {}
+
+    @classmethod
+    def create(cls, path, ids, key_columns=('File1', 'File2'), settings=None):
+        """
+        Create an empty store, replacing any existing one at path.
+
+        Parameters:
+        - path (str): Store directory.
+        - ids (list of str): Item IDs, in matrix order.
+        - key_columns (tuple): Names of the two ID columns of the exported table.
+        - settings (dict or None): Maps metrics to the settings their scores are computed with.
+
+        Returns:
+        - MatrixStore: Store open for writing; metrics are added as they are first written.
+        """
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        store = cls(path, ids, key_columns, {}, mode='r+', settings=settings)
+        with open(os.path.join(path, "ids.json"), "w") as file:
+            json.dump(store.ids, file)
+        store._write_meta()
+        return store
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open an existing store read-only. The metric arrays are mapped on first use.
+
+        Parameters:
+        - path (str): Store directory.
+
+        Returns:
+        - MatrixStore: The store.
+        """
+        with open(os.path.join(path, "ids.json")) as file:
+            ids = json.load(file)
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        return cls(path, ids, meta['key_columns'], meta['metrics'], settings=meta.get('settings'))
+
+    def _write_meta(self):
+        meta = {'n_items': len(self.ids), 'key_columns': self.key_columns, 'metrics': self._files,
+                'settings': self.settings}
+        with open(os.path.join(self.path, "meta.json.tmp"), "w") as file:
+            json.dump(meta, file)
+        os.replace(os.path.join(self.path, "meta.json.tmp"), os.path.join(self.path, "meta.json"))
+
+    @property
+    def metrics(self):
+        """
+        Names of the stored metrics.
+        """
+        return list(self._files)
+
+    def array(self, metric):
+        """
+        Return the condensed float32 array of one metric (a memory map).
+        """
+        if metric not in self._arrays:
+            if metric in self._files:
+                self._arrays[metric] = np.load(os.path.join(self.path, self._files[metric]), mmap_mode=self.mode)
+            elif self.mode == 'r+':
+                self._files[metric] = f"metric_{len(self._files)}.npy"
+                array = np.lib.format.open_memmap(os.path.join(self.path, self._files[metric]), mode='w+',
+                                                  dtype=np.float32, shape=(self.n_pairs,))
+                array[:] = np.nan
+                self._arrays[metric] = array
+                self._write_meta()
+            else:
+                raise KeyError(metric)
+        return self._arrays[metric]
+
+    def write_block(self, metric, start, block):
+        """
+        Store one row block of the upper part of a pairwise matrix.
+
+        Parameters:
+        - metric (str): Metric name.
+        - start (int): Index of the first row of the block.
+        - block (numpy.ndarray): Scores of items ``start:start + len(block)`` against items
+          ``start:``, as yielded by iter_mse_blocks or iter_ssim_blocks.
+        """
+        array = self.array(metric)
+        n_items = len(self.ids)
+        for row in range(len(block)):
+            i = start + row
+            offset = condensed_index(i, i + 1, n_items) if i + 1 < n_items else self.n_pairs
+            array[offset:offset + n_items - i - 1] = block[row, i + 1 - start:]
+
+    def write_frame(self, chunk):
+        """
+        Store the metric columns of a result chunk keyed by the two ID columns.
+
+        Parameters:
+        - chunk (pandas.DataFrame): Rows with the key columns and one column per metric.
+        """
+        first = chunk[self.key_columns[0]].map(self.position).to_numpy(dtype=np.int64)
+        second = chunk[self.key_columns[1]].map(self.position).to_numpy(dtype=np.int64)
+        pair_positions = condensed_index(first, second, len(self.ids))
+        for metric in chunk.columns:
+            if metric not in self.key_columns:
+                self.array(metric)[pair_positions] = chunk[metric].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    def flush(self):
+        """
+        Write pending changes of every mapped metric to disk.
+        """
+        for array in self._arrays.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def close(self):
+        """
+        Flush and unmap every metric array; they are mapped again on next use.
+        """
+        self.flush()
+        self._arrays = {}
+
+    def move(self, path):
+        """
+        Move the store to path, replacing any store there, e.g. once a run written to a
+        temporary path is complete.
+
+        Parameters:
+        - path (str): New store directory.
+        """
+        self.close()
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(self.path, path)
+        self.path = path
+
+    def score(self, item1, item2, metric):
+        """
+        Look up the score of one pair in O(1).
+
+        Parameters:
+        - item1 (str): First item ID.
+        - item2 (str): Second item ID.
+        - metric (str): Metric name.
+
+        Returns:
+        - float: The score, or NaN if the pair was not scored.
+        """
+        i, j = self.position[item1], self.position[item2]
+        if i == j:
+            return float('nan')
+        return float(self.array(metric)[condensed_index(i, j, len(self.ids))])
+
+    def row(self, item, metric):
+        """
+        Return the scores of one item against every item.
+
+        Parameters:
+        - item (str): Item ID.
+        - metric (str): Metric name.
+
+        Returns:
+        - numpy.ndarray: float32 array of length N in ID order, NaN for the item itself.
+        """
+        i = self.position[item]
+        n_items = len(self.ids)
+        array = self.array(metric)
+        scores = np.full(n_items, np.nan, dtype=np.float32)
+        if i > 0:
+            scores[:i] = array[condensed_index(np.arange(i), i, n_items)]
+        if i + 1 < n_items:
+            offset = condensed_index(i, i + 1, n_items)
+            scores[i + 1:] = array[offset:offset + n_items - i - 1]
+        return scores
+
+    def row_frame(self, item, metrics=None):
+        """
+        Return the scores of one item against every other item as a table.
+
+        Parameters:
+        - item (str): Item ID.
+        - metrics (list of str or None): Metrics to include; None includes all.
+
+        Returns:
+        - pandas.DataFrame: Key columns plus one column per metric, one row per other item.
+        """
+        others = [other for other in self.ids if other != item]
+        keep = np.arange(len(self.ids)) != self.position[item]
+        frame = pd.DataFrame({self.key_columns[0]: item, self.key_columns[1]: others})
+        for metric in metrics if metrics is not None else self.metrics:
+            frame[metric] = self.row(item, metric)[keep]
+        return frame
+
+    def iter_chunks(self, chunk_rows=100000):
+        """
+        Yield the stored pairs as result-table chunks in pair order.
+
+        Returns:
+        - generator: Yields DataFrames with the key columns and one column per metric.
+        """
+        ids = np.asarray(self.ids, dtype=object)
+        n_items = len(self.ids)
+        row_offsets = condensed_index(np.arange(n_items - 1), np.arange(1, n_items), n_items)
+        for start in range(0, self.n_pairs, chunk_rows):
+            stop = min(start + chunk_rows, self.n_pairs)
+            positions = np.arange(start, stop)
+            rows = np.searchsorted(row_offsets, positions, side='right') - 1
+            columns = positions - row_offsets[rows] + rows + 1
+            chunk = {self.key_columns[0]: ids[rows], self.key_columns[1]: ids[columns]}
+            chunk.update({metric: np.asarray(self.array(metric)[start:stop]) for metric in self.metrics})
+            yield pd.DataFrame(chunk)
+
+    def export(self, output_path, output_format="csv", chunk_rows=100000):
+        """
+        Export the store as a CSV file (or Parquet dataset) for reading by humans.
+
+        Parameters:
+        - output_path (str): Output file (CSV) or dataset directory (Parquet).
+        - output_format (str): 'csv' or 'parquet'.
+        - chunk_rows (int): Number of rows written at a time.
+        """
+        with ChunkedResultWriter(output_path, output_format, chunk_rows, self.key_columns + self.metrics) as writer:
+            for chunk in self.iter_chunks(chunk_rows):
+                writer.write(chunk)
@@ -0,0 +1,339 @@
+import hashlib
+import os
+import pickle
+from collections import defaultdict
+
+import numpy as np
+
+# Mersenne prime used for the universal hash family a * x + b mod p.
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def _token_hashes(tokens):
+    """
+    Hash tokens to stable 32-bit integers (independent of PYTHONHASHSEED).
+
+    Parameters:
+    - tokens (iterable of str): Tokens to hash.
+
+    Returns:
+    - numpy.ndarray: uint64 array of token hashes.
+    """
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little") for token in tokens),
+        dtype=np.uint64,
+    )
+
+
+def _text_digest(text):
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def optimal_bands(num_perm, threshold):
+    """
+    Choose the number of LSH bands whose S-curve midpoint is closest to the threshold.
+
+    Parameters:
+    - num_perm (int): Number of MinHash permutations.
+    - threshold (float): Target Jaccard similarity.
+
+    Returns:
+    - int: Number of bands (rows per band is num_perm // bands).
+    """
+    best_bands, best_error = 1, float("inf")
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if error < best_error:
+            best_bands, best_error = bands, error
+    return best_bands
+
+
+def jaccard_similarity(text1, text2):
+    """
+    Exact Jaccard similarity of the whitespace token sets of two texts.
+
+    Parameters:
+    - text1 (str): First text.
+    - text2 (str): Second text.
+
+    Returns:
+    - float: Jaccard similarity.
+    """
+    tokens1 = set(text1.split())
+    tokens2 = set(text2.split())
+    union_size = len(tokens1 | tokens2)
+    return len(tokens1 & tokens2) / union_size if union_size > 0 else 0
+
+
+class MinHashLSH:
+    """
+    MinHash signature store with a banded LSH index for Jaccard near-duplicate search.
+
+    Documents are tokenised the same way as the Jaccard branch of ``calculate_similarity``
+    (``text.split()``). Signatures are kept per key and can be saved, so later runs only
+    hash new or changed documents.
+    """
+
+    def __init__(self, threshold=0.5, num_perm=128, seed=1):
+        """
+        Parameters:
+        - threshold (float): Target Jaccard similarity for candidate pairs.
+        - num_perm (int): Number of MinHash permutations.
+        - seed (int): Seed for the permutation coefficients.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seed = seed
+        self.bands = optimal_bands(num_perm, threshold)
+        self.rows = num_perm // self.bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self.signatures = {}
+        self.digests = {}
+        self._buckets = [defaultdict(set) for _ in range(self.bands)]
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a text.
+
+        Parameters:
+        - text (str): Input text.
+
+        Returns:
+        - numpy.ndarray: uint64 signature of length num_perm.
+        """
+        hashes = _token_hashes(set(text.split()))
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key, text):
+        """
+        Add or update a document. Unchanged documents are not re-hashed.
+
+        Parameters:
+        - key (str): Document identifier, e.g. the PDF file name.
+        - text (str): Document text.
+
+        Returns:
+        - bool: True if a signature was (re)computed.
+        """
+        digest = _text_digest(text)
+        if self.digests.get(key) == digest:
+            return False
+        if key in self.signatures:
+            self.remove(key)
+        signature = self.signature(text)
+        self.signatures[key] = signature
+        self.digests[key] = digest
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band][band_key].add(key)
+        return True
+
+    def remove(self, key):
+        """
+        Remove a document from the store and the LSH buckets.
+
+        Parameters:
+        - key (str): Document identifier.
+        """
+        signature = self.signatures.pop(key)
+        self.digests.pop(key, None)
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band][band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def estimate(self, key1, key2):
+        """
+        Estimate the Jaccard similarity of two stored documents from their signatures.
+
+        Returns:
+        - float: Fraction of matching signature positions.
+        """
+        return float(np.mean(self.signatures[key1] == self.signatures[key2]))
+
+    def candidate_pairs(self):
+        """
+        Collect every pair of keys sharing at least one LSH bucket.
+
+        Returns:
+        - set: Set of (key1, key2) tuples with key1 < key2.
+        """
+        candidates = set()
+        for buckets in self._buckets:
+            for bucket in buckets.values():
+                if len(bucket) < 2:
+                    continue
+                members = sorted(bucket)
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        candidates.add((members[i], members[j]))
+        return candidates
+
+    def query(self, text):
+        """
+        Find stored documents that share an LSH bucket with a new text.
+
+        Parameters:
+        - text (str): Query text.
+
+        Returns:
+        - list: List of (key, estimated Jaccard) tuples sorted by descending estimate.
+        """
+        signature = self.signature(text)
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates |= self._buckets[band].get(band_key, set())
+        results = [(key, float(np.mean(self.signatures[key] == signature))) for key in candidates]
+        return sorted(results, key=lambda item: item[1], reverse=True)
+
+    def similar_pairs(self, threshold=None, texts=None):
+        """
+        Return candidate pairs whose (estimated or exact) Jaccard reaches the threshold.
+
+        Parameters:
+        - threshold (float or None): Minimum Jaccard to keep. Defaults to the index threshold.
+        - texts (dict or None): Maps keys to texts. When given, exact Jaccard scores are
+          computed for the candidate pairs instead of signature estimates.
+
+        Returns:
+        - list: List of (key1, key2, score) tuples sorted by key.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        pairs = []
+        for key1, key2 in sorted(self.candidate_pairs()):
+            if texts is not None:
+                score = jaccard_similarity(texts[key1], texts[key2])
+            else:
+                score = self.estimate(key1, key2)
+            if score >= threshold:
+                pairs.append((key1, key2, score))
+        return pairs
+
+    def save(self, path):
+        """
+        Save the signature store to a pickle file.
+
+        Parameters:
+        - path (str): Destination path.
+        """
+        state = {'num_perm': self.num_perm, 'seed': self.seed, 'signatures': self.signatures,
+                 'digests': self.digests}
+        with open(path, 'wb') as file:
+            pickle.dump(state, file)
+
+    @classmethod
+    def load(cls, path, threshold=0.5, num_perm=128, seed=1):
+        """
+        Load a signature store, or create an empty one if the file does not exist or was built
+        with a different number of permutations or seed. Signatures do not depend on the
+        threshold, so a store can be reloaded with a new one.
+
+        Parameters:
+        - path (str): Path of the pickle file.
+        - threshold (float): Target Jaccard similarity.
+        - num_perm (int): Number of MinHash permutations.
+        - seed (int): Seed for the permutation coefficients.
+
+        Returns:
+        - MinHashLSH: Loaded or new index.
+        """
+        index = cls(threshold, num_perm, seed)
+        if not os.path.exists(path):
+            return index
+        with open(path, 'rb') as file:
+            state = pickle.load(file)
+        if (state['num_perm'], state['seed']) != (num_perm, seed):
+            return index
+        for key, signature in state['signatures'].items():
+            index.signatures[key] = signature
+            index.digests[key] = state['digests'][key]
+            for band, band_key in index._band_keys(signature):
+                index._buckets[band][band_key].add(key)
+        return index
+
+
+def lsh_index(texts, threshold, store_path=None, num_perm=128):
+    """
+    Build the LSH index of a set of documents, reusing the stored signatures of earlier runs.
+
+    Parameters:
+    - texts (dict): Maps document keys (e.g. file names) to texts.
+    - threshold (float): Target Jaccard similarity.
+    - store_path (str or None): Pickle file holding the signatures of earlier runs. Only new or
+      changed documents are hashed, and the updated store is written back.
+    - num_perm (int): Number of MinHash permutations.
+
+    Returns:
+    - MinHashLSH: Index holding exactly the given documents.
+    """
+    if store_path is not None:
+        index = MinHashLSH.load(store_path, threshold, num_perm)
+    else:
+        index = MinHashLSH(threshold, num_perm)
+    for key in set(index.signatures) - set(texts):
+        index.remove(key)
+    for key, text in texts.items():
+        index.add(key, text)
+    if store_path is not None:
+        index.save(store_path)
+    return index
+
+
+def lsh_jaccard_candidate_scores(index, keys, texts, threshold):
+    """
+    Exact Jaccard similarity of the LSH candidate pairs, taken from the shared buckets.
+
+    Only pairs sharing a bucket are ever looked at, so the cost follows the number of
+    candidates rather than the number of pairs.
+
+    Parameters:
+    - index (MinHashLSH): Index as returned by lsh_index, holding every key.
+    - keys (list of str): Document key of each position, e.g. the file names.
+    - texts (list of str): Document texts, indexed by position.
+    - threshold (float): Minimum Jaccard similarity to keep.
+
+    Returns:
+    - tuple: (first, second, scores) numpy.ndarrays of the candidate pairs at or above the
+      threshold, with first < second, sorted in row-major order.
+    """
+    positions = {key: position for position, key in enumerate(keys)}
+    pairs = sorted(tuple(sorted((positions[key1], positions[key2]))) for key1, key2 in index.candidate_pairs())
+    kept = []
+    for i, j in pairs:
+        score = jaccard_similarity(texts[i], texts[j])
+        if score >= threshold:
+            kept.append((i, j, score))
+    if not kept:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    first, second, scores = zip(*kept)
+    return np.array(first, dtype=np.int64), np.array(second, dtype=np.int64), np.array(scores)
+
+
+def lsh_jaccard_similarities(texts, threshold, store_path=None, num_perm=128):
+    """
+    Score the Jaccard similarity of only those document pairs that LSH reports as candidates.
+
+    Parameters:
+    - texts (dict): Maps document keys (e.g. file names) to texts.
+    - threshold (float): Minimum Jaccard similarity to keep.
+    - store_path (str or None): Pickle file holding the signatures of earlier runs. Only new or
+      changed documents are hashed, and the updated store is written back.
+    - num_perm (int): Number of MinHash permutations.
+
+    Returns:
+    - dict: Maps (key1, key2) tuples with key1 < key2 to their exact Jaccard similarity.
+    """
+    index = lsh_index(texts, threshold, store_path, num_perm)
+    return {(key1, key2): score for key1, key2, score in index.similar_pairs(threshold, texts)}
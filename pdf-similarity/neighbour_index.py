@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+
+
+def neighbour_index_path(output_csv_path):
+    """
+    Path of the image neighbour index written next to the image results.
+    """
+    return output_csv_path.replace('.csv', '_image_neighbours.npz')
+
+
+class NeighbourIndex:
+    """
+    Top-k most similar images of every image, sorted by descending score.
+
+    The index is filled block by block while the pairwise scores are computed, so the full
+    N x N matrix is never held, and looking up the neighbours of one image costs O(k).
+    """
+
+    def __init__(self, names, k=50):
+        """
+        Parameters:
+        - names (list of str): Image names, in the order of the similarity matrix.
+        - k (int): Number of neighbours kept per image.
+        """
+        self.names = list(names)
+        self.position = {name: row for row, name in enumerate(self.names)}
+        self.k = min(k, max(len(self.names) - 1, 0))
+        self.indices = np.full((len(self.names), self.k), -1, dtype=np.int64)
+        self.scores = np.full((len(self.names), self.k), -np.inf)
+
+    def _merge(self, rows, candidate_indices, candidate_scores):
+        scores = np.concatenate([self.scores[rows], candidate_scores], axis=1)
+        indices = np.concatenate([self.indices[rows], candidate_indices], axis=1)
+        scores[np.isnan(scores)] = -np.inf
+        top = np.argpartition(-scores, self.k - 1, axis=1)[:, :self.k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        self.indices[rows] = np.take_along_axis(np.take_along_axis(indices, top, axis=1), order, axis=1)
+        self.scores[rows] = np.take_along_axis(top_scores, order, axis=1)
+
+    def update(self, start, block):
+        """
+        Add one row block of the upper part of a pairwise similarity matrix.
+
+        Parameters:
+        - start (int): Index of the first row of the block.
+        - block (numpy.ndarray): Scores of images ``start:start + len(block)`` against images
+          ``start:``, as yielded by iter_ssim_blocks or iter_mse_blocks. Cells on or below the
+          diagonal are ignored, and NaN marks unscored pairs.
+        """
+        if self.k == 0 or len(block) == 0:
+            return
+        rows = np.arange(start, start + len(block))
+        columns = np.arange(start, len(self.names))
+        block = np.where(columns[None, :] > rows[:, None], block, np.nan)
+        self._merge(rows, np.broadcast_to(columns, block.shape), block)
+        self._merge(columns, np.broadcast_to(rows, block.T.shape), block.T)
+
+    def neighbours(self, name, k=None):
+        """
+        Return the most similar images of one image.
+
+        Parameters:
+        - name (str): Image name.
+        - k (int or None): Number of neighbours; None returns all that are stored.
+
+        Returns:
+        - list: List of (image name, score) tuples, most similar first.
+        """
+        row = self.position[name]
+        count = self.k if k is None else min(k, self.k)
+        return [(self.names[index], float(score))
+                for index, score in zip(self.indices[row, :count], self.scores[row, :count])
+                if index >= 0 and np.isfinite(score)]
+
+    def save(self, path):
+        """
+        Save the index to a .npz file, replacing any previous one atomically.
+        """
+        temporary_path = f"{path}.tmp.npz"
+        np.savez(temporary_path, names=np.array(self.names, dtype=str), indices=self.indices, scores=self.scores)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Load an index saved with save.
+
+        Parameters:
+        - path (str): Path of the .npz file.
+
+        Returns:
+        - NeighbourIndex: The loaded index.
+        """
+        with np.load(path) as data:
+            index = NeighbourIndex(data['names'].tolist(), data['indices'].shape[1])
+            index.indices = data['indices']
+            index.scores = data['scores']
+        return index
@@ -0,0 +1,265 @@
+import os
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+
+from corpus_cosine import cosine_pair_scores, fit_corpus_tfidf
+from levenshtein_engine import LevenshteinEngine
+from matrix_store import condensed_index
+from minhash_lsh import lsh_index, lsh_jaccard_candidate_scores
+
+SIMILARITY_METHODS = ["Levenshtein", "Cosine", "Jaccard", "Hamming"]
+TEXT_VARIANTS = ["Normal Text", "Preprocessed Text"]
+
+
+def similarity_column(method, variant):
+    """
+    Name of the output column holding a method's score for one text variant.
+
+    Parameters:
+    - method (str): Similarity method, e.g. 'Cosine'.
+    - variant (str): Text variant, 'Normal Text' or 'Preprocessed Text'.
+
+    Returns:
+    - str: Column name, e.g. 'Similarity (Cosine) (Normal Text)'.
+    """
+    return f'Similarity ({method}) ({variant})'
+
+
+def result_columns(methods=SIMILARITY_METHODS):
+    """
+    Columns of the text result table, in the order score_pairs writes them.
+
+    Parameters:
+    - methods (list of str): Methods scored.
+
+    Returns:
+    - list of str: 'File1', 'File2' and one column per method and text variant.
+    """
+    return ['File1', 'File2'] + [similarity_column(method, variant) for method in methods for variant in TEXT_VARIANTS]
+
+
+def score_settings(preprocess_settings="", corpus_cosine=True, cosine_threshold=None, jaccard_threshold=None,
+                   levenshtein_min_similarity=None):
+    """
+    Describe the settings every result column is scored with, besides the two texts.
+
+    Stored with the scores, so a later run only reuses scores computed the same way, e.g. not
+    exhaustive Jaccard scores once LSH Jaccard is enabled.
+
+    Parameters:
+    - preprocess_settings (str): Description of the text preprocessing, e.g.
+      text_preprocessing.PREPROCESS_SETTINGS; part of the 'Preprocessed Text' settings.
+    - corpus_cosine, cosine_threshold, jaccard_threshold, levenshtein_min_similarity: Options of
+      iter_text_pair_chunks.
+
+    Returns:
+    - dict: Maps each column name to its settings string.
+    """
+    method_settings = {"Levenshtein": f"min_similarity={levenshtein_min_similarity}",
+                       "Cosine": f"corpus={corpus_cosine}|threshold={cosine_threshold}",
+                       "Jaccard": f"lsh_threshold={jaccard_threshold}",
+                       "Hamming": ""}
+    settings = {}
+    for method, setting in method_settings.items():
+        settings[similarity_column(method, "Normal Text")] = setting
+        settings[similarity_column(method, "Preprocessed Text")] = f"{preprocess_settings}|{setting}"
+    return settings
+
+
+def all_pairs(n_items):
+    """
+    Index arrays of every pair i < j in row-major order.
+
+    Parameters:
+    - n_items (int): Number of items.
+
+    Returns:
+    - tuple: (numpy.ndarray, numpy.ndarray) first and second indices of each pair.
+    """
+    first, second = np.triu_indices(n_items, k=1)
+    return first, second
+
+
+def iter_pair_chunks(n_items, chunk_rows=100000):
+    """
+    Yield the pairs i < j in row-major order as bounded-size index arrays.
+
+    Parameters:
+    - n_items (int): Number of items.
+    - chunk_rows (int): Approximate number of pairs per chunk (a row of pairs is never split
+      unless it alone exceeds chunk_rows).
+
+    Returns:
+    - generator: Yields (first, second) numpy.ndarray index arrays.
+    """
+    firsts, seconds, size = [], [], 0
+    for i in range(n_items - 1):
+        for start in range(i + 1, n_items, chunk_rows):
+            second = np.arange(start, min(start + chunk_rows, n_items))
+            firsts.append(np.full(len(second), i))
+            seconds.append(second)
+            size += len(second)
+            if size >= chunk_rows:
+                yield np.concatenate(firsts), np.concatenate(seconds)
+                firsts, seconds, size = [], [], 0
+    if size:
+        yield np.concatenate(firsts), np.concatenate(seconds)
+
+
+def score_pairs(file_names, texts_by_variant, similarity_function, methods=SIMILARITY_METHODS,
+                precomputed=None, known_scores=None, pairs=None):
+    """
+    Score document pairs with several methods in a single pass over the pairs.
+
+    Texts are read from plain column lists instead of DataFrame rows, and scores are written
+    into preallocated NumPy columns.
+
+    Parameters:
+    - file_names (list of str): File name of each document.
+    - texts_by_variant (dict): Maps a text variant ('Normal Text', 'Preprocessed Text') to the
+      list of texts of every document.
+    - similarity_function (callable): Function (text1, text2, method) -> float used for columns
+      that are not precomputed, e.g. calculate_similarity.
+    - methods (list of str): Methods to score.
+    - precomputed (dict or None): Maps column names to score arrays aligned with the pairs,
+      computed by a corpus-level engine. Such columns are never scored per pair; NaN entries
+      are left empty.
+    - known_scores (dict or None): Maps column names to arrays aligned with the pairs holding
+      scores that are already known, e.g. reused from a previous run, and NaN elsewhere. They
+      take precedence over everything else.
+    - pairs (tuple or None): (first, second) index arrays of the pairs to score. None scores
+      every pair i < j.
+
+    Returns:
+    - pd.DataFrame: One row per pair with 'File1' and 'File2' keys and one column per method
+      and text variant.
+    """
+    precomputed = precomputed or {}
+    known_scores = known_scores or {}
+    first, second = pairs if pairs is not None else all_pairs(len(file_names))
+
+    scores = {}
+    for method in methods:
+        for variant, texts in texts_by_variant.items():
+            column = similarity_column(method, variant)
+            known = known_scores.get(column, np.full(len(first), np.nan))
+            if column in precomputed:
+                values = np.asarray(precomputed[column], dtype=float)
+            else:
+                values = np.full(len(first), np.nan)
+                for row in np.flatnonzero(np.isnan(known)).tolist():
+                    values[row] = similarity_function(texts[first[row]], texts[second[row]], method)
+            scores[column] = np.where(np.isnan(known), values, known)
+
+    file_names = np.asarray(file_names, dtype=object)
+    result = {'File1': file_names[first], 'File2': file_names[second]}
+    result.update(scores)
+    return pd.DataFrame(result)
+
+
+def iter_text_pair_chunks(df, similarity_function, reusable_scores=None, corpus_cosine=True, jaccard_threshold=None,
+                          minhash_store_path=None, levenshtein_min_similarity=None, workers=None,
+                          methods=SIMILARITY_METHODS, chunk_rows=100000, cosine_threshold=None):
+    """
+    Score every document pair of a folder with all text similarity methods, chunk by chunk.
+
+    Everything is computed per chunk of pairs: TF-IDF cosine from a sparse product over the
+    rows the chunk spans, LSH Jaccard scattered from the candidate pairs of the MinHash
+    buckets (other pairs are never scanned), and Levenshtein on one worker pool kept for the
+    whole run. Only per-document state (TF-IDF matrices, signatures, texts) and the LSH
+    candidates are held, so peak memory depends on the chunk size, not on the number of pairs.
+
+    Parameters:
+    - df (pd.DataFrame): One row per document with 'File Name', 'Text' and 'Preprocessed Text'.
+    - similarity_function (callable): Function (text1, text2, method) -> float for per-pair methods.
+    - reusable_scores (text_cache.ReusableScores or None): Scores of a previous run to reuse.
+    - corpus_cosine (bool): Score Cosine from one TF-IDF fitted over the whole folder.
+    - jaccard_threshold (float or None): Score Jaccard only for LSH candidates at or above this value.
+    - minhash_store_path (str or None): Pickle file for the MinHash signatures.
+    - levenshtein_min_similarity (float or None): Prune Levenshtein pairs below this similarity.
+    - workers (int or None): Number of processes for the Levenshtein engine.
+    - methods (list of str): Methods to score.
+    - chunk_rows (int): Number of pairs per yielded chunk.
+    - cosine_threshold (float or None): Prune corpus Cosine scores below this value from the
+      sparse products; such pairs are left empty.
+
+    Returns:
+    - generator: Yields pd.DataFrame chunks as returned by score_pairs.
+    """
+    n_documents = len(df)
+    file_names = df['File Name'].tolist()
+    texts_by_variant = {"Normal Text": df['Text'].tolist(), "Preprocessed Text": df['Preprocessed Text'].tolist()}
+
+    cosine_matrices = {}
+    if "Cosine" in methods and corpus_cosine and n_documents > 1:
+        cosine_matrices = {similarity_column("Cosine", variant): fit_corpus_tfidf(texts)[1]
+                           for variant, texts in texts_by_variant.items()}
+
+    jaccard_candidates = {}
+    if "Jaccard" in methods and jaccard_threshold is not None:
+        preprocessed_store_path = None
+        if minhash_store_path is not None:
+            root, extension = os.path.splitext(minhash_store_path)
+            preprocessed_store_path = f"{root}_preprocessed{extension}"
+        for variant, store_path in [("Normal Text", minhash_store_path), ("Preprocessed Text", preprocessed_store_path)]:
+            texts = texts_by_variant[variant]
+            index = lsh_index(dict(zip(file_names, texts)), jaccard_threshold, store_path)
+            first, second, scores = lsh_jaccard_candidate_scores(index, file_names, texts, jaccard_threshold)
+            jaccard_candidates[similarity_column("Jaccard", variant)] = (condensed_index(first, second, n_documents),
+                                                                        scores)
+
+    with ExitStack() as stack:
+        levenshtein_engine = None
+        if "Levenshtein" in methods:
+            # One pool for both variants: preprocessed texts follow the normal ones.
+            levenshtein_engine = stack.enter_context(LevenshteinEngine(
+                texts_by_variant["Normal Text"] + texts_by_variant["Preprocessed Text"],
+                levenshtein_min_similarity, workers))
+
+        for first, second in iter_pair_chunks(n_documents, chunk_rows):
+            known_scores = reusable_scores.lookup(first, second) if reusable_scores is not None else {}
+            precomputed = {column: cosine_pair_scores(matrix, first, second, cosine_threshold)
+                           for column, matrix in cosine_matrices.items()}
+
+            if levenshtein_engine is not None:
+                for offset, variant in enumerate(TEXT_VARIANTS):
+                    column = similarity_column("Levenshtein", variant)
+                    values = known_scores.get(column, np.full(len(first), np.nan)).copy()
+                    missing = np.flatnonzero(np.isnan(values))
+                    pairs = list(zip((first[missing] + offset * n_documents).tolist(),
+                                     (second[missing] + offset * n_documents).tolist()))
+                    values[missing] = [np.nan if score is None else score
+                                       for score in levenshtein_engine.score(pairs)]
+                    precomputed[column] = values
+
+            # Chunks are consecutive runs of the row-major pair order.
+            chunk_start = int(condensed_index(first[0], second[0], n_documents))
+            for column, (positions, scores) in jaccard_candidates.items():
+                start, stop = np.searchsorted(positions, [chunk_start, chunk_start + len(first)])
+                values = np.full(len(first), np.nan)
+                values[positions[start:stop] - chunk_start] = scores[start:stop]
+                precomputed[column] = values
+
+            yield score_pairs(file_names, texts_by_variant, similarity_function, methods, precomputed,
+                              known_scores, (first, second))
+
+
+def score_text_pairs(df, similarity_function, **options):
+    """
+    Score every document pair of a folder with all text similarity methods.
+
+    Parameters:
+    - df (pd.DataFrame): One row per document with 'File Name', 'Text' and 'Preprocessed Text'.
+    - similarity_function (callable): Function (text1, text2, method) -> float for per-pair methods.
+    - options: Keyword arguments of iter_text_pair_chunks.
+
+    Returns:
+    - pd.DataFrame: One row per pair as returned by score_pairs.
+    """
+    chunks = list(iter_text_pair_chunks(df, similarity_function, **options))
+    if not chunks:
+        return score_pairs(df['File Name'].tolist(), {"Normal Text": [], "Preprocessed Text": []},
+                           similarity_function, options.get('methods', SIMILARITY_METHODS))
+    return pd.concat(chunks, ignore_index=True)
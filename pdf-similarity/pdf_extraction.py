@@ -0,0 +1,174 @@
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from text_cache import file_content_hash
+
+TEXT_COLUMNS = ['File Name', 'Text', 'Preprocessed Text']
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when a PDF takes longer than the per-file timeout."""
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def extract_pdf_pages(file_path):
+    """
+    Extract the lowercased text of each page of a PDF.
+
+    Parameters:
+    - file_path (str): Path to the PDF file.
+
+    Returns:
+    - list of str: Text of every page, in page order.
+    """
+    import PyPDF2
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [page.extract_text().lower() for page in pdf_reader.pages]
+
+
+def extract_pdf_text(file_path):
+    """
+    Extract the lowercased text of every page of a PDF.
+
+    Parameters:
+    - file_path (str): Path to the PDF file.
+
+    Returns:
+    - str: Text of all pages joined together.
+    """
+    return "".join(extract_pdf_pages(file_path))
+
+
+def extract_and_preprocess(file_path, preprocess=None, timeout=None, pages=False):
+    """
+    Extract and optionally preprocess one PDF, turning any failure into an error entry.
+
+    The timeout is enforced with SIGALRM where the platform provides it (POSIX) and the call runs
+    on the main thread; elsewhere the file runs to completion.
+
+    Parameters:
+    - file_path (str): Path to the PDF file.
+    - preprocess (callable or None): Function applied to the extracted text, e.g. preprocess_text.
+    - timeout (float or None): Maximum number of seconds for this file.
+    - pages (bool): Keep the pages apart: 'Text' and 'Preprocessed Text' are then lists with one
+      entry per page, and preprocess is applied to each page.
+
+    Returns:
+    - dict: Keys 'File Name', 'Text', 'Preprocessed Text' and 'Error' (None on success).
+    """
+    file_name = os.path.basename(file_path)
+    use_alarm = (timeout is not None and hasattr(signal, 'SIGALRM')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if pages:
+            file_text = extract_pdf_pages(file_path)
+            preprocessed_text = [preprocess(page) for page in file_text] if preprocess is not None else None
+        else:
+            file_text = extract_pdf_text(file_path)
+            preprocessed_text = preprocess(file_text) if preprocess is not None else None
+        return {'File Name': file_name, 'Text': file_text, 'Preprocessed Text': preprocessed_text, 'Error': None}
+    except ExtractionTimeout:
+        return {'File Name': file_name, 'Text': None, 'Preprocessed Text': None,
+                'Error': f"timed out after {timeout} seconds"}
+    except Exception as e:
+        return {'File Name': file_name, 'Text': None, 'Preprocessed Text': None, 'Error': f"{type(e).__name__}: {e}"}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+
+def iter_extracted_pdfs(file_paths, preprocess=None, workers=None, timeout=None, pages=False):
+    """
+    Extract and preprocess PDFs on a process pool, yielding results in completion order.
+
+    A broken or slow PDF produces an entry with 'Error' set instead of aborting the run.
+
+    Parameters:
+    - file_paths (list of str): Paths to the PDF files.
+    - preprocess (callable or None): Picklable function applied to each extracted text.
+    - workers (int or None): Number of worker processes. None uses every CPU; 1 runs in-process.
+    - timeout (float or None): Maximum number of seconds per file.
+    - pages (bool): Extract and preprocess each page separately (see extract_and_preprocess).
+
+    Returns:
+    - generator: Yields the dicts returned by extract_and_preprocess.
+    """
+    if workers == 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield extract_and_preprocess(file_path, preprocess, timeout, pages)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_and_preprocess, file_path, preprocess, timeout, pages): file_path
+                   for file_path in file_paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. a segfault in a PDF parser).
+                yield {'File Name': os.path.basename(futures[future]), 'Text': None, 'Preprocessed Text': None,
+                       'Error': f"{type(e).__name__}: {e}"}
+
+
+def extract_folder(folder_path, preprocess=None, workers=None, timeout=None, cache=None, pages=False):
+    """
+    Extract and preprocess every PDF in a folder in parallel.
+
+    Results are returned in directory-listing order so downstream pair ordering is stable;
+    PDFs that fail are reported separately. With a cache, each PDF is hashed and only PDFs whose
+    content is not cached yet are extracted.
+
+    Parameters:
+    - folder_path (str): Path to the folder containing PDF files.
+    - preprocess (callable or None): Picklable function applied to each extracted text.
+    - workers (int or None): Number of worker processes. None uses every CPU.
+    - timeout (float or None): Maximum number of seconds per file.
+    - cache (TextCache or None): Content-addressed cache of extracted and preprocessed text. With
+      pages, use a cache whose settings differ from the whole-document one.
+    - pages (bool): Extract and preprocess each page separately (see extract_and_preprocess).
+
+    Returns:
+    - tuple: (list of dicts with 'File Name', 'Text', 'Preprocessed Text' and, with a cache,
+      'Content Hash'; dict mapping failed file names to their error message).
+    """
+    file_names = [file_name for file_name in os.listdir(folder_path) if file_name.endswith(".pdf")]
+    file_paths = [os.path.join(folder_path, file_name) for file_name in file_names]
+
+    results = {}
+    errors = {}
+    content_hashes = {}
+    if cache is not None:
+        for file_name, file_path in zip(file_names, file_paths):
+            content_hashes[file_name] = file_content_hash(file_path)
+            entry = cache.get(content_hashes[file_name])
+            if entry is not None:
+                results[file_name] = {'File Name': file_name, **entry}
+
+    pending_paths = [file_path for file_name, file_path in zip(file_names, file_paths) if file_name not in results]
+    for result in iter_extracted_pdfs(pending_paths, preprocess, workers, timeout, pages):
+        error = result.pop('Error')
+        if error is None:
+            results[result['File Name']] = result
+            if cache is not None:
+                cache.put(content_hashes[result['File Name']],
+                          {'Text': result['Text'], 'Preprocessed Text': result['Preprocessed Text']})
+        else:
+            errors[result['File Name']] = error
+
+    for file_name, content_hash in content_hashes.items():
+        if file_name in results:
+            results[file_name]['Content Hash'] = content_hash
+
+    data = [results[file_name] for file_name in file_names if file_name in results]
+    return data, errors
@@ -0,0 +1,133 @@
+import os
+import shutil
+
+import pandas as pd
+
+
+def result_path(output_csv_path, output_format="csv"):
+    """
+    Path of a result table for the chosen output format.
+
+    CSV results are written to output_csv_path itself; Parquet results are written to a
+    partitioned dataset directory next to it with a '.parquet' suffix.
+
+    Parameters:
+    - output_csv_path (str): Path of the CSV output.
+    - output_format (str): 'csv' or 'parquet'.
+
+    Returns:
+    - str: Path of the file or dataset directory.
+    """
+    if output_format == "csv":
+        return output_csv_path
+    elif output_format == "parquet":
+        return os.path.splitext(output_csv_path)[0] + ".parquet"
+    else:
+        raise ValueError("Invalid output format")
+
+
+class ChunkedResultWriter:
+    """
+    Write a result table in bounded-size chunks as the rows are produced.
+
+    Rows can be appended one at a time (they are buffered up to chunk_rows) or written as
+    DataFrame chunks. CSV output is a single file with one header; Parquet output is a dataset
+    directory with one part file per chunk. Existing output at the path is replaced.
+    """
+
+    def __init__(self, path, output_format="csv", chunk_rows=100000, columns=None):
+        """
+        Parameters:
+        - path (str): Output file (CSV) or dataset directory (Parquet).
+        - output_format (str): 'csv' or 'parquet'.
+        - chunk_rows (int): Maximum number of buffered rows before they are written.
+        - columns (list of str or None): Columns of the table, so an empty CSV still gets its
+          header. None takes them from the first row or chunk.
+        """
+        if output_format not in ("csv", "parquet"):
+            raise ValueError("Invalid output format")
+        self.path = path
+        self.output_format = output_format
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._buffer = []
+        self._parts_written = 0
+        self._header_written = False
+        self._columns = list(columns) if columns is not None else None
+
+        if output_format == "parquet":
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.makedirs(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def append(self, row):
+        """
+        Buffer one row and write the buffer once it holds chunk_rows rows.
+
+        Parameters:
+        - row (dict): Column values of the row.
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows.
+        """
+        if self._buffer:
+            buffered, self._buffer = self._buffer, []
+            self.write(pd.DataFrame(buffered, columns=self._columns))
+
+    def write(self, chunk):
+        """
+        Write a DataFrame chunk straight to the output.
+
+        Parameters:
+        - chunk (pd.DataFrame): Rows to write. Every chunk must have the same columns.
+        """
+        if self._columns is None:
+            self._columns = list(chunk.columns)
+        if self.output_format == "csv":
+            chunk.to_csv(self.path, mode='a', header=not self._header_written, index=False)
+            self._header_written = True
+        else:
+            part_path = os.path.join(self.path, f"part-{self._parts_written:05d}.parquet")
+            chunk.to_parquet(part_path, index=False)
+            self._parts_written += 1
+        self.rows_written += len(chunk)
+
+    def close(self):
+        """
+        Write any remaining buffered rows. An empty CSV still gets its header if known.
+        """
+        self.flush()
+        if self.output_format == "csv" and not self._header_written and self._columns is not None:
+            self.write(pd.DataFrame(columns=self._columns))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def iter_result_chunks(path, chunk_rows=100000):
+    """
+    Read a result table written by ChunkedResultWriter chunk by chunk.
+
+    Parameters:
+    - path (str): CSV file or Parquet dataset directory.
+    - chunk_rows (int): Number of CSV rows per chunk.
+
+    Returns:
+    - generator: Yields pd.DataFrame chunks.
+    """
+    if os.path.isdir(path):
+        for part_name in sorted(os.listdir(path)):
+            if part_name.endswith(".parquet"):
+                yield pd.read_parquet(os.path.join(path, part_name))
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
@@ -0,0 +1,232 @@
+import os
+import pickle
+import warnings
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from pdf_extraction import extract_folder, extract_pdf_text
+from text_cache import TextCache, file_content_hash
+from text_preprocessing import PREPROCESS_SETTINGS, preprocess_text
+
+INDEX_METHODS = ["Cosine", "Jaccard"]
+
+
+class SimilarityIndex:
+    """
+    Persistent index of preprocessed PDF text for top-k similarity queries.
+
+    Each document keeps its term counts (hashed, so the vocabulary never has to be refitted),
+    its token set and some metadata. Document frequencies are updated incrementally, and the
+    TF-IDF weights use the same smoothed IDF and L2 normalisation as TfidfVectorizer.
+    """
+
+    def __init__(self, n_features=2 ** 20):
+        """
+        Parameters:
+        - n_features (int): Number of hashed term features.
+        """
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+        self.file_names = []
+        self.metadata = {}
+        self.term_counts = {}
+        self.token_sets = {}
+        self.postings = defaultdict(set)
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self._tfidf_matrix = None
+
+    def __len__(self):
+        return len(self.file_names)
+
+    def __contains__(self, file_name):
+        return file_name in self.metadata
+
+    def add_text(self, file_name, preprocessed_text, metadata=None):
+        """
+        Add a document from its preprocessed text, replacing any document with the same name.
+
+        Parameters:
+        - file_name (str): Document identifier.
+        - preprocessed_text (str): Output of preprocess_text for the document.
+        - metadata (dict or None): Extra information stored with the document.
+        """
+        if file_name in self:
+            self.remove(file_name)
+        counts = self.vectorizer.transform([preprocessed_text]).tocsr()
+        self.document_frequency[counts.indices] += 1
+        self.term_counts[file_name] = counts
+        self.token_sets[file_name] = set(preprocessed_text.split())
+        for token in self.token_sets[file_name]:
+            self.postings[token].add(file_name)
+        self.metadata[file_name] = dict(metadata or {})
+        self.file_names.append(file_name)
+        self._tfidf_matrix = None
+
+    def add(self, pdf_path):
+        """
+        Extract, preprocess and add one PDF.
+
+        Parameters:
+        - pdf_path (str): Path to the PDF file.
+        """
+        preprocessed_text = preprocess_text(extract_pdf_text(pdf_path))
+        self.add_text(os.path.basename(pdf_path), preprocessed_text,
+                      {'Path': pdf_path, 'Content Hash': file_content_hash(pdf_path)})
+
+    def remove(self, file_name):
+        """
+        Remove a document from the index.
+
+        Parameters:
+        - file_name (str): Document identifier.
+        """
+        counts = self.term_counts.pop(file_name)
+        self.document_frequency[counts.indices] -= 1
+        for token in self.token_sets.pop(file_name):
+            self.postings[token].discard(file_name)
+            if not self.postings[token]:
+                del self.postings[token]
+        del self.metadata[file_name]
+        self.file_names.remove(file_name)
+        self._tfidf_matrix = None
+
+    def _idf(self):
+        n_documents = len(self.file_names)
+        return np.log((1 + n_documents) / (1 + self.document_frequency)) + 1
+
+    def _tfidf(self, counts):
+        import scipy.sparse as sp
+        from sklearn.preprocessing import normalize
+
+        return normalize((counts @ sp.diags(self._idf())).tocsr())
+
+    def _matrix(self):
+        if self._tfidf_matrix is None:
+            import scipy.sparse as sp
+
+            counts = sp.vstack([self.term_counts[file_name] for file_name in self.file_names]).tocsr()
+            self._tfidf_matrix = self._tfidf(counts)
+        return self._tfidf_matrix
+
+    def query_text(self, preprocessed_text, k=10, method="Cosine"):
+        """
+        Find the k indexed documents most similar to a preprocessed text.
+
+        Parameters:
+        - preprocessed_text (str): Output of preprocess_text for the query document.
+        - k (int): Number of matches to return.
+        - method (str): 'Cosine' (TF-IDF) or 'Jaccard' (token sets).
+
+        Returns:
+        - pd.DataFrame: 'File Name' and 'Similarity' of the top-k matches, most similar first.
+        """
+        if method == "Cosine":
+            if not self.file_names:
+                scores = np.zeros(0)
+            else:
+                query_vector = self._tfidf(self.vectorizer.transform([preprocessed_text]))
+                scores = (self._matrix() @ query_vector.T).toarray().ravel()
+            candidates = self.file_names
+        elif method == "Jaccard":
+            query_tokens = set(preprocessed_text.split())
+            intersections = Counter()
+            for token in query_tokens:
+                intersections.update(self.postings.get(token, ()))
+            candidates = list(intersections)
+            scores = np.array([intersections[file_name]
+                               / (len(query_tokens) + len(self.token_sets[file_name]) - intersections[file_name])
+                               for file_name in candidates])
+        else:
+            raise ValueError("Invalid similarity method")
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.zeros(0, dtype=int)
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return pd.DataFrame({'File Name': [candidates[index] for index in top], 'Similarity': scores[top]})
+
+    def query(self, pdf_path, k=10, method="Cosine"):
+        """
+        Extract and preprocess one PDF and return the k most similar indexed documents.
+
+        Parameters:
+        - pdf_path (str): Path to the query PDF.
+        - k (int): Number of matches to return.
+        - method (str): 'Cosine' or 'Jaccard'.
+
+        Returns:
+        - pd.DataFrame: 'File Name' and 'Similarity' of the top-k matches, most similar first.
+        """
+        return self.query_text(preprocess_text(extract_pdf_text(pdf_path)), k, method)
+
+    def save(self, path):
+        """
+        Save the index to a pickle file.
+
+        Parameters:
+        - path (str): Destination path.
+        """
+        tfidf_matrix, self._tfidf_matrix = self._tfidf_matrix, None
+        try:
+            with open(path, 'wb') as file:
+                pickle.dump(self, file)
+        finally:
+            self._tfidf_matrix = tfidf_matrix
+
+    @staticmethod
+    def load(path):
+        """
+        Load an index saved with save.
+
+        Parameters:
+        - path (str): Path of the pickle file.
+
+        Returns:
+        - SimilarityIndex: Loaded index.
+        """
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+
+def build_index(folder_path, index_path=None, workers=None, timeout=None, cache_dir=None):
+    """
+    Build or update a similarity index from every PDF in a folder.
+
+    With an existing index at index_path, only new or changed PDFs are re-indexed and PDFs that
+    left the folder are removed. Pass cache_dir to also skip re-extracting unchanged PDFs.
+
+    Parameters:
+    - folder_path (str): Path to the folder containing PDF files.
+    - index_path (str or None): Pickle file of the index; it is loaded if present and saved.
+    - workers (int or None): Number of processes used to extract and preprocess the PDFs.
+    - timeout (float or None): Maximum number of seconds spent on a single PDF.
+    - cache_dir (str or None): Directory of the content-addressed text cache.
+
+    Returns:
+    - SimilarityIndex: The up-to-date index.
+    """
+    if index_path is not None and os.path.exists(index_path):
+        index = SimilarityIndex.load(index_path)
+    else:
+        index = SimilarityIndex()
+
+    cache = TextCache(cache_dir, settings=PREPROCESS_SETTINGS) if cache_dir is not None else None
+    data, errors = extract_folder(folder_path, preprocess_text, workers, timeout, cache)
+    for file_name, error in errors.items():
+        warnings.warn(f"Skipping {file_name}: {error}")
+
+    current = {row['File Name'] for row in data}
+    for file_name in [file_name for file_name in index.file_names if file_name not in current]:
+        index.remove(file_name)
+    for row in data:
+        file_path = os.path.join(folder_path, row['File Name'])
+        content_hash = row.get('Content Hash') or file_content_hash(file_path)
+        if index.metadata.get(row['File Name'], {}).get('Content Hash') != content_hash:
+            index.add_text(row['File Name'], row['Preprocessed Text'],
+                           {'Path': file_path, 'Content Hash': content_hash})
+
+    if index_path is not None:
+        index.save(index_path)
+    return index
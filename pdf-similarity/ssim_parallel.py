@@ -0,0 +1,167 @@
+import bisect
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory, util
+
+import numpy as np
+
+# Set in every worker by _init_worker: the shared memory segment and the stack viewing it.
+_shared_block = None
+_shared_stack = None
+
+
+def ssim_score(image1, image2):
+    """
+    SSIM of two preprocessed images, with the data range of the second image.
+
+    This is the score image_similarity returns for method 'ssim'.
+    """
+    from skimage.metrics import structural_similarity as ssim
+
+    similarity_index, _ = ssim(image1, image2, full=True, data_range=image2.max() - image2.min())
+    return similarity_index
+
+
+def _init_worker(name, shape, dtype):
+    global _shared_block, _shared_stack
+    # The parent owns the segment and unlinks it; a worker only attaches, so it must not be
+    # tracked here, or a tracker may report it as leaked or unlink it early. Before 3.13 attaching
+    # always registers it, and unregistering afterwards would also drop the parent's registration
+    # when the tracker is shared, so registration is skipped while attaching instead.
+    if sys.version_info >= (3, 13):
+        _shared_block = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            _shared_block = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    _shared_stack = np.ndarray(shape, dtype=dtype, buffer=_shared_block.buf)
+    # Pool workers leave through multiprocessing, which runs finalizers but not atexit hooks.
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    global _shared_block, _shared_stack
+    # The stack views the buffer, so it has to go before the segment can be closed.
+    _shared_stack = None
+    if _shared_block is not None:
+        _shared_block.close()
+        _shared_block = None
+
+
+def _score_tile(stack, tile):
+    row_start, row_stop, column_start, column_stop, pairs = tile
+    scores = np.full((row_stop - row_start, column_stop - column_start), np.nan)
+    if pairs is None:
+        pairs = [(i, j) for i in range(row_start, row_stop)
+                 for j in range(max(i + 1, column_start), column_stop)]
+    for i, j in pairs:
+        scores[i - row_start, j - column_start] = ssim_score(stack[i], stack[j])
+    return scores
+
+
+def _score_shared_tile(tile):
+    return _score_tile(_shared_stack, tile)
+
+
+def _tiles(n_images, start, stop, tile_size, columns_of):
+    # Tiles of the block rows start:stop against columns start:, upper triangle only.
+    # columns_of maps a row to the sorted columns to score in it, or is None for all pairs.
+    for row_start in range(start, stop, tile_size):
+        row_stop = min(row_start + tile_size, stop)
+        for column_start in range(row_start, n_images, tile_size):
+            column_stop = min(column_start + tile_size, n_images)
+            tile_pairs = None
+            if columns_of is not None:
+                tile_pairs = []
+                for i in range(row_start, row_stop):
+                    columns = columns_of.get(i, [])
+                    first = bisect.bisect_left(columns, column_start)
+                    last = bisect.bisect_left(columns, column_stop)
+                    tile_pairs.extend((i, j) for j in columns[first:last])
+                if not tile_pairs:
+                    continue
+            yield row_start, row_stop, column_start, column_stop, tile_pairs
+
+
+def iter_ssim_blocks(image_stack, block_size=256, pairs=None, workers=None, tile_size=32):
+    """
+    Yield row blocks of the upper part of the pairwise SSIM matrix, scored by a process pool.
+
+    The stack is copied into shared memory once; workers map it and receive only tile
+    coordinates, so no image is pickled per task. Blocks have the layout of
+    image_mse.iter_mse_blocks and come out in row order, with the same values as scoring the
+    pairs one by one. Cells on or below the diagonal, and pairs not in ``pairs``, are NaN.
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - block_size (int): Number of rows per block.
+    - pairs (set or None): Set of (i, j) pairs with i < j to score; None scores all pairs.
+    - workers (int or None): Number of processes; None uses all CPUs, 1 scores in this process.
+    - tile_size (int): Side of the pair-matrix tiles handed to a worker.
+
+    Returns:
+    - generator: Yields (start, numpy.ndarray) where block[r, c] is the SSIM of images
+      ``start + r`` and ``start + c``.
+    """
+    image_stack = np.ascontiguousarray(image_stack)
+    n_images = len(image_stack)
+    workers = workers or os.cpu_count() or 1
+    columns_of = None
+    if pairs is not None:
+        columns_of = {}
+        for i, j in sorted(pairs):
+            columns_of.setdefault(i, []).append(j)
+
+    def assemble(start, stop, tiles, tile_scores):
+        block = np.full((stop - start, n_images - start), np.nan)
+        for (row_start, row_stop, column_start, column_stop, _), scores in zip(tiles, tile_scores):
+            block[row_start - start:row_stop - start, column_start - start:column_stop - start] = scores
+        return block
+
+    if workers == 1 or n_images < 2:
+        for start in range(0, n_images, block_size):
+            stop = min(start + block_size, n_images)
+            tiles = list(_tiles(n_images, start, stop, tile_size, columns_of))
+            yield start, assemble(start, stop, tiles, (_score_tile(image_stack, tile) for tile in tiles))
+        return
+
+    shared_block = shared_memory.SharedMemory(create=True, size=image_stack.nbytes)
+    try:
+        np.ndarray(image_stack.shape, dtype=image_stack.dtype, buffer=shared_block.buf)[:] = image_stack
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared_block.name, image_stack.shape, image_stack.dtype.str)) as executor:
+            for start in range(0, n_images, block_size):
+                stop = min(start + block_size, n_images)
+                tiles = list(_tiles(n_images, start, stop, tile_size, columns_of))
+                # map returns results in submission order, whatever order the workers finish in.
+                yield start, assemble(start, stop, tiles, executor.map(_score_shared_tile, tiles))
+    finally:
+        shared_block.close()
+        shared_block.unlink()
+
+
+def ssim_matrix(image_stack, pairs=None, workers=None, block_size=256):
+    """
+    Compute the full N x N SSIM matrix with a process pool.
+
+    Parameters:
+    - image_stack (numpy.ndarray): Preprocessed images of shape (N, H, W).
+    - pairs (set or None): Set of (i, j) pairs with i < j to score; None scores all pairs.
+    - workers (int or None): Number of processes; None uses all CPUs.
+    - block_size (int): Number of rows computed at a time.
+
+    Returns:
+    - numpy.ndarray: Symmetric N x N matrix with ones on the diagonal and NaN for unscored pairs.
+    """
+    n_images = len(image_stack)
+    matrix = np.full((n_images, n_images), np.nan)
+    for start, block in iter_ssim_blocks(image_stack, block_size, pairs, workers):
+        matrix[start:start + len(block), start:] = block
+    lower = np.tril_indices(n_images, -1)
+    matrix[lower] = matrix.T[lower]
+    np.fill_diagonal(matrix, 1.0)
+    return matrix
@@ -1,42 +1,51 @@
 
-from image_text_similarity import process_folder_with_images_and_text
 import streamlit as st
 import os
-import pandas as pd
 from PIL import Image
+from matrix_store import MatrixStore, matrix_store_path
+from neighbour_index import NeighbourIndex, neighbour_index_path
+from thumbnail_store import ThumbnailStore
 
-@st.cache
+@st.cache(allow_output_mutation=True)
 def load_similarity_data():
     """
-    Load similarity data from a CSV file and return a DataFrame.
+    Open the image similarity matrix store. The scores are memory-mapped and read on demand.
 
     Returns:
-        pd.DataFrame: DataFrame containing similarity data.
+        MatrixStore: Store with the 'Image Similarity (SSIM)' and 'Image Similarity (MSE)' metrics,
+        or None if the results do not exist yet.
     """
-    similarity_df_image = pd.read_csv(output_csv_path.replace('.csv', '_image.csv'))
-    return similarity_df_image
+    store_path = matrix_store_path(output_csv_path.replace('.csv', '_image.csv'))
+    if not os.path.isdir(store_path):
+        return None
+    return MatrixStore.open(store_path)
 
-def calculate_most_similar_images(similarity_df, selected_image):
+@st.cache(allow_output_mutation=True)
+def load_neighbour_index():
     """
-    Calculate the most similar images based on the selected image.
+    Load the per-image neighbour index written by process_folder_with_images_and_text.
+
+    Returns:
+        NeighbourIndex: Most similar images of every image, or None if the results do not exist yet.
+    """
+    index_path = neighbour_index_path(output_csv_path)
+    if not os.path.exists(index_path):
+        return None
+    return NeighbourIndex.load(index_path)
+
+@st.cache(allow_output_mutation=True)
+def load_thumbnail(images_folder_path, image_file):
+    """
+    Load the 150x150 thumbnail of an image from the on-disk thumbnail store.
 
     Args:
-        similarity_df (pd.DataFrame): DataFrame containing similarity data.
-        selected_image (str): The selected image.
+        images_folder_path (str): Folder holding the extracted images.
+        image_file (str): Image file name.
 
     Returns:
-        pd.DataFrame: DataFrame with the most similar images and their similarity values.
+        PIL.Image.Image: The thumbnail.
     """
-    most_similar_images = []
-    for index, row in similarity_df.iterrows():
-        if row['Image1'] == selected_image:
-            most_similar_images.append({'Image1': row['Image1'], 'Image2': row['Image2'], 'Similarity (SSIM)': row['Image Similarity (SSIM)']})
-        elif row['Image2'] == selected_image:
-            most_similar_images.append({'Image1': row['Image2'], 'Image2': row['Image1'], 'Similarity (SSIM)': row['Image Similarity (SSIM)']})
-
-    most_similar_df = pd.DataFrame(most_similar_images)
-    most_similar_df = most_similar_df.sort_values(by=['Similarity (SSIM)'], ascending=False)
-    return most_similar_df
+    return ThumbnailStore(images_folder_path, (150, 150)).load(image_file)
 
 def main():
     """
@@ -46,13 +55,17 @@ def main():
     #change the path of the folder as the images where they are saved
     input_folder_path = r"C:\Users\sairaj.bai\Desktop\pdf2\images_pdf\images"
 
-    # Load similarity data using st.cache
-    similarity_df_image = load_similarity_data()
+    # Load the neighbour index and open the matrix store (scores are read per pair) using st.cache
+    neighbour_index = load_neighbour_index()
+    similarity_data = load_similarity_data()
+    if neighbour_index is None:
+        st.error("No image similarity results found. Run image_text_similarity.py on the input folder first.")
+        return
 
     st.sidebar.header("Select Image")
 
     # Update selected_image based on user interaction in the sidebar
-    selected_image = st.sidebar.selectbox("Select an image:", similarity_df_image['Image1'].unique())
+    selected_image = st.sidebar.selectbox("Select an image:", neighbour_index.names)
 
     # Display the selected image below the sidebar
     st.subheader(f"Selected Image: {selected_image}")
@@ -67,12 +80,12 @@ def main():
 
     st.header("Similar Images (Descending Order)")
 
-    all_similar_df = calculate_most_similar_images(similarity_df_image, selected_image)
+    all_similar = neighbour_index.neighbours(selected_image)
 
-    if not all_similar_df.empty:
+    if all_similar:
         # Display all similar images with their similarity values in a grid with 5 images in each row
         images_per_row = 5
-        total_images = len(all_similar_df)
+        total_images = len(all_similar)
         rows = (total_images // images_per_row) + (total_images % images_per_row > 0)
 
         for i in range(rows):
@@ -80,11 +93,16 @@ def main():
             for j in range(images_per_row):
                 index = i * images_per_row + j
                 if index < total_images:
-                    row = all_similar_df.iloc[index]
-                    similar_image_path = os.path.join(input_folder_path, row['Image2'])
+                    similar_image, similarity = all_similar[index]
+                    similar_image_path = os.path.join(input_folder_path, similar_image)
                     try:
-                        similar_image_pil = Image.open(similar_image_path).resize((150, 150))
-                        columns[j].image(similar_image_pil, caption=f"{row['Image2']} - Similarity: {row['Similarity (SSIM)']:.4f}")
+                        similar_image_pil = load_thumbnail(input_folder_path, similar_image)
+                        caption = f"{similar_image} - Similarity: {similarity:.4f}"
+                        if similarity_data is not None:
+                            # One pair lookup in the memory-mapped store
+                            mse = similarity_data.score(selected_image, similar_image, 'Image Similarity (MSE)')
+                            caption += f" - MSE: {mse:.4f}"
+                        columns[j].image(similar_image_pil, caption=caption)
                     except Exception as e:
                         st.warning(f"Error loading similar image: {similar_image_path}")
                         st.warning(f"Error details: {e}")
@@ -96,7 +114,6 @@ if __name__ == "__main__":
     # Define the paths for output files
     output_pickle_path = 'output_all_simila.pkl'
     output_csv_path = 'output_all_similar.csv'
-    #change the path of the input folder as desired 
-    # Process the data and run the Streamlit app
-    process_folder_with_images_and_text(r"C:\Users\sairaj.bai\Desktop\pdf2\images_pdf", output_pickle_path, output_csv_path)
+    # The results are produced by running image_text_similarity.py on the input folder;
+    # the app only reads them, so launching it does not recompute anything.
     main()
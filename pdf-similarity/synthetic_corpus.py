@@ -0,0 +1,88 @@
+import os
+import string
+
+import numpy as np
+
+
+def _vocabulary(rng, size=5000):
+    """
+    Generate pronounceable-looking pseudo-words so that stemming and stopword removal have
+    realistic work to do.
+    """
+    lengths = rng.randint(3, 11, size=size)
+    letters = np.array(list(string.ascii_lowercase))
+    return ["".join(rng.choice(letters, size=length)) for length in lengths]
+
+
+def _random_image(rng, width=200, height=150):
+    # Smooth gradients plus a few solid blocks: compressible like real figures, but distinct.
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    for channel in range(3):
+        fx, fy, phase = rng.uniform(0.005, 0.05), rng.uniform(0.005, 0.05), rng.uniform(0, np.pi)
+        image[..., channel] = (127 + 127 * np.sin(fx * x + fy * y + phase)).astype(np.uint8)
+    for _ in range(rng.randint(1, 5)):
+        x0, y0 = rng.randint(0, width - 20), rng.randint(0, height - 20)
+        image[y0:y0 + rng.randint(10, 60), x0:x0 + rng.randint(10, 60)] = rng.randint(0, 256, size=3)
+    return image
+
+
+def generate_corpus(folder_path, n_documents=20, words_per_document=2000, overlap=0.3, images_per_document=2,
+                    words_per_page=400, seed=0):
+    """
+    Write a folder of synthetic PDFs with controllable size, text overlap and embedded images.
+
+    Every document draws a fraction ``overlap`` of its words from one shared base text (so
+    pairs share roughly that much content) and the rest at random from a pseudo-word
+    vocabulary. Each embedded image is reused from a shared pool with probability ``overlap``
+    and otherwise unique to the document. Everything is generated offline and is reproducible
+    for a given seed.
+
+    Parameters:
+    - folder_path (str): Output folder; created if needed.
+    - n_documents (int): Number of PDFs.
+    - words_per_document (int): Number of words in each PDF.
+    - overlap (float): Fraction of shared words and shared images, between 0 and 1.
+    - images_per_document (int): Number of images embedded in each PDF.
+    - words_per_page (int): Number of words per PDF page.
+    - seed (int): Random seed.
+
+    Returns:
+    - list of str: Paths of the generated PDFs.
+    """
+    import fitz
+
+    os.makedirs(folder_path, exist_ok=True)
+    rng = np.random.RandomState(seed)
+    vocabulary = _vocabulary(rng)
+    base_words = list(rng.choice(vocabulary, size=words_per_document))
+    shared_images = [_random_image(rng) for _ in range(max(1, images_per_document))]
+
+    pdf_paths = []
+    for document in range(n_documents):
+        shared = rng.random_sample(words_per_document) < overlap
+        random_words = rng.choice(vocabulary, size=words_per_document)
+        words = [base_words[position] if shared[position] else random_words[position]
+                 for position in range(words_per_document)]
+
+        pdf_document = fitz.open()
+        for start in range(0, max(1, len(words)), words_per_page):
+            page = pdf_document.new_page()
+            page_text = " ".join(words[start:start + words_per_page])
+            page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), page_text, fontsize=8)
+
+        for image_number in range(images_per_document):
+            if rng.random_sample() < overlap:
+                image = shared_images[image_number % len(shared_images)]
+            else:
+                image = _random_image(rng)
+            pixmap = fitz.Pixmap(fitz.csRGB, image.shape[1], image.shape[0], image.tobytes(), False)
+            page = pdf_document[image_number % pdf_document.page_count]
+            top = 60 + 160 * (image_number // pdf_document.page_count % 4)
+            page.insert_image(fitz.Rect(60, top, 260, top + 150), pixmap=pixmap)
+
+        pdf_path = os.path.join(folder_path, f"synthetic_{document:05d}.pdf")
+        pdf_document.save(pdf_path)
+        pdf_document.close()
+        pdf_paths.append(pdf_path)
+    return pdf_paths
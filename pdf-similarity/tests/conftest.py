@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The pipeline modules are flat scripts that import each other by name.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def nltk_data():
+    nltk = pytest.importorskip("nltk")
+    from text_preprocessing import NLTK_RESOURCES, ensure_nltk_data
+
+    ensure_nltk_data()
+    try:
+        for resource_path, _ in NLTK_RESOURCES:
+            nltk.data.find(resource_path)
+    except LookupError:
+        pytest.skip("NLTK data is not available")
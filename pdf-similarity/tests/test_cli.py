@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("PyPDF2")
+
+from cli import build_parser, main
+from pair_scoring import result_columns
+from synthetic_corpus import generate_corpus
+
+
+def test_text_command_defaults_next_to_the_input_folder():
+    args = build_parser().parse_args(["text", "pdfs", "--methods", "Jaccard", "--jaccard-threshold", "0.5"])
+
+    assert args.command == "text"
+    assert args.methods == ["Jaccard"]
+    assert args.jaccard_threshold == 0.5
+    assert args.output_format == "csv"
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["text", "pdfs", "--methods", "Euclidean"])
+
+
+def test_text_command_scores_every_pair(tmp_path, nltk_data):
+    folder_path = tmp_path / "pdfs"
+    generate_corpus(str(folder_path), n_documents=4, words_per_document=150, images_per_document=0)
+
+    main(["text", str(folder_path), "--workers", "1", "--methods", "Cosine", "Jaccard"])
+
+    result = pd.read_csv(folder_path / "similarities.csv")
+    assert len(result) == 6
+    assert (folder_path / "similarities.pkl").exists()
+    assert sorted(column for column in result.columns if column.startswith("Similarity")) == sorted(
+        f"Similarity ({method}) ({variant})" for method in ["Cosine", "Jaccard"]
+        for variant in ["Normal Text", "Preprocessed Text"])
+    assert result.filter(like="Similarity").notna().all().all()
+
+
+def test_text_command_writes_a_header_for_a_single_pdf(tmp_path, nltk_data):
+    folder_path = tmp_path / "pdfs"
+    generate_corpus(str(folder_path), n_documents=1, words_per_document=150, images_per_document=0)
+
+    main(["text", str(folder_path), "--workers", "1"])
+
+    result = pd.read_csv(folder_path / "similarities.csv")
+    assert result.empty
+    assert list(result.columns) == result_columns()
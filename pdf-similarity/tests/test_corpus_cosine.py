@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from corpus_cosine import cosine_pair_scores, fit_corpus_tfidf
+from pair_scoring import all_pairs, iter_pair_chunks, score_text_pairs, similarity_column
+
+TEXTS = ["alpha beta gamma", "alpha beta delta", "xray yankee zulu", "alpha beta gamma delta", "xray yankee"]
+
+
+def _exact_scores(texts):
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    _, document_term_matrix = fit_corpus_tfidf(texts)
+    first, second = all_pairs(len(texts))
+    return cosine_similarity(document_term_matrix)[first, second]
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 100])
+def test_chunked_pair_scores_match_the_exact_similarities(chunk_rows):
+    _, document_term_matrix = fit_corpus_tfidf(TEXTS)
+
+    scores = np.concatenate([cosine_pair_scores(document_term_matrix, first, second)
+                             for first, second in iter_pair_chunks(len(TEXTS), chunk_rows)])
+
+    np.testing.assert_allclose(scores, _exact_scores(TEXTS))
+
+
+def test_pair_scores_below_threshold_are_empty():
+    _, document_term_matrix = fit_corpus_tfidf(TEXTS)
+    first, second = all_pairs(len(TEXTS))
+    scores = cosine_pair_scores(document_term_matrix, first, second)
+
+    pruned = cosine_pair_scores(document_term_matrix, first, second, threshold=0.5)
+
+    np.testing.assert_array_equal(np.isnan(pruned), scores < 0.5)
+    np.testing.assert_allclose(pruned[scores >= 0.5], scores[scores >= 0.5])
+
+
+def test_pipeline_cosine_column_uses_one_corpus_tfidf():
+    df = pd.DataFrame({'File Name': [f"{index}.pdf" for index in range(len(TEXTS))], 'Text': TEXTS,
+                       'Preprocessed Text': TEXTS})
+
+    result = score_text_pairs(df, lambda text1, text2, method: 0.0, methods=["Cosine"], chunk_rows=3,
+                              cosine_threshold=0.5)
+
+    exact = _exact_scores(TEXTS)
+    column = result[similarity_column("Cosine", "Normal Text")].to_numpy()
+    np.testing.assert_array_equal(np.isnan(column), exact < 0.5)
+    np.testing.assert_allclose(column[exact >= 0.5], exact[exact >= 0.5])
@@ -0,0 +1,58 @@
+import numpy as np
+
+from image_cache import ImageTensorCache
+
+
+class CountingPreprocess:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, source):
+        self.calls.append(source)
+        return np.full((2, 2), source, dtype=np.float32)
+
+
+def test_cached_images_are_not_preprocessed_again(tmp_path):
+    preprocess = CountingPreprocess()
+    ImageTensorCache(str(tmp_path), 2, 2, preprocess).load_keyed(["a", "b"], [1, 2])
+
+    stack = ImageTensorCache(str(tmp_path), 2, 2, preprocess).load_keyed(["b", "c", "a", "c"], [2, 3, 1, 3])
+
+    assert preprocess.calls == [1, 2, 3]
+    assert stack[:, 0, 0].tolist() == [2, 3, 1, 3]
+
+
+def test_changed_settings_do_not_serve_stale_arrays(tmp_path):
+    ImageTensorCache(str(tmp_path), 2, 2, lambda source: np.zeros((2, 2)), settings="blur").load_keyed(["a"], [1])
+
+    cache = ImageTensorCache(str(tmp_path), 2, 2, lambda source: np.ones((2, 2)), settings="no-blur")
+
+    assert cache.cached_keys() == set()
+    assert cache.load_keyed(["a"], [1])[0, 0, 0] == 1
+
+
+def test_full_cache_replaces_the_least_recently_used_images(tmp_path):
+    preprocess = CountingPreprocess()
+    cache = ImageTensorCache(str(tmp_path), 2, 2, preprocess, max_bytes=3 * 2 * 2 * 4)
+    cache.load_keyed(["a", "b", "c"], [1, 2, 3])
+    cache.load_keyed(["a"], [1])
+
+    cache.load_keyed(["d"], [4])
+    assert cache.cached_keys() == {"a", "c", "d"}
+
+    stack = cache.load_keyed(["e", "f", "g", "h"], [5, 6, 7, 8])
+    assert stack[:, 0, 0].tolist() == [5, 6, 7, 8]
+    assert len(cache.cached_keys()) == 3
+    assert np.load(cache.stack_path, mmap_mode='r').shape[0] == 3
+
+
+def test_stack_grows_by_doubling(tmp_path):
+    cache = ImageTensorCache(str(tmp_path), 2, 2, CountingPreprocess())
+    cache.MIN_CAPACITY = 2
+    capacities = []
+    for index in range(5):
+        cache.load_keyed([f"key{index}"], [index])
+        capacities.append(np.load(cache.stack_path, mmap_mode='r').shape[0])
+
+    assert capacities == [2, 2, 4, 4, 8]
+    assert cache.load_keyed([f"key{index}" for index in range(5)], range(5))[:, 0, 0].tolist() == list(range(5))
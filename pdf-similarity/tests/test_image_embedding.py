@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from image_embedding import IVFIndex, embedding_top_k
+
+
+def _clustered_vectors(n_clusters=8, per_cluster=25, dimensions=16, seed=0):
+    rng = np.random.RandomState(seed)
+    centres = rng.randn(n_clusters, dimensions)
+    vectors = np.repeat(centres, per_cluster, axis=0) + 0.1 * rng.randn(n_clusters * per_cluster, dimensions)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _exact_top_k(vectors, queries, k):
+    scores = queries @ vectors.T
+    return np.argsort(-scores, axis=1, kind='stable')[:, :k], np.sort(scores, axis=1)[:, ::-1][:, :k]
+
+
+def test_probing_every_list_is_exact(tmp_path):
+    vectors = _clustered_vectors()
+    ids = [f"{row}.png" for row in range(len(vectors))]
+    IVFIndex.build(vectors, ids, n_lists=8).save(str(tmp_path / "index"))
+    index = IVFIndex.load(str(tmp_path / "index"))
+
+    found, scores = index.search(vectors[:20], k=5, n_probe=8)
+
+    exact_rows, exact_scores = _exact_top_k(vectors, vectors[:20], 5)
+    np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+    assert [set(row) for row in found] == [{ids[column] for column in row} for row in exact_rows]
+
+
+def test_default_probes_recall_the_true_neighbours():
+    vectors = _clustered_vectors()
+    ids = [f"{row}.png" for row in range(len(vectors))]
+    index = IVFIndex.build(vectors, ids, n_lists=16, n_probe=4)
+
+    neighbours = embedding_top_k(index, k=5)
+
+    exact_rows, _ = _exact_top_k(vectors, vectors, 6)
+    hits = sum(len({name for name, _ in neighbours[ids[row]]} & {ids[column] for column in exact_rows[row][1:]})
+               for row in range(len(vectors)))
+    assert all(len(found) == 5 and ids[row] not in dict(found) for row, found in
+               ((row, neighbours[ids[row]]) for row in range(len(vectors))))
+    assert hits / (5 * len(vectors)) >= 0.9
+
+
+def _write_image(path, pixels):
+    cv2 = pytest.importorskip("cv2")
+    assert cv2.imwrite(str(path), pixels)
+    return str(path)
+
+
+def test_embedding_similarity_of_image_files(tmp_path):
+    pytest.importorskip("cv2")
+    from image_text_similarity import calculate_image_similarity
+
+    rng = np.random.RandomState(0)
+    gradient = np.tile(np.linspace(0, 255, 96, dtype=np.float32), (96, 1))
+    original = np.dstack([gradient, gradient.T, 255 - gradient]) + rng.normal(0, 5, (96, 96, 3))
+    original = np.clip(original, 0, 255).astype(np.uint8)
+    image = _write_image(tmp_path / "original.png", original)
+    brighter = _write_image(tmp_path / "brighter.png", np.clip(original.astype(int) + 10, 0, 255).astype(np.uint8))
+    unrelated = _write_image(tmp_path / "unrelated.png", rng.randint(0, 256, (96, 96, 3), dtype=np.uint8))
+
+    assert calculate_image_similarity(image, image, 'embedding') == pytest.approx(1.0, abs=1e-5)
+    assert (calculate_image_similarity(image, brighter, 'embedding')
+            > calculate_image_similarity(image, unrelated, 'embedding') + 0.2)
+
+
+def test_unreadable_image_raises_a_clear_error(tmp_path):
+    pytest.importorskip("cv2")
+    from image_text_similarity import calculate_image_similarity
+
+    image = _write_image(tmp_path / "image.png", np.zeros((32, 32, 3), dtype=np.uint8))
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+
+    with pytest.raises(ValueError, match="broken.png"):
+        calculate_image_similarity(image, str(tmp_path / "broken.png"), 'embedding')
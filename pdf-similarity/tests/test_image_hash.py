@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from image_hash import HASH_METHODS, candidate_pairs, hamming_distance, hash_stack
+
+
+def test_bk_tree_finds_exactly_the_pairs_within_the_radius():
+    hashes = [int(value) for value in np.random.RandomState(0).randint(0, 1 << 16, size=60)]
+
+    for radius in [0, 3, 6]:
+        exact = {(i, j) for i in range(len(hashes)) for j in range(i + 1, len(hashes))
+                 if hamming_distance(hashes[i], hashes[j]) <= radius}
+        assert candidate_pairs(hashes, radius) == exact
+
+
+@pytest.mark.parametrize("method", HASH_METHODS)
+def test_near_duplicate_images_hash_close_together(method):
+    pytest.importorskip("cv2")
+    rng = np.random.RandomState(1)
+    base = np.kron(rng.rand(8, 8), np.ones((12, 12)))
+    image_stack = np.stack([base, np.clip(base + 0.01 * rng.rand(*base.shape), 0, 1), rng.rand(*base.shape)])
+
+    hashes = hash_stack(image_stack, method)
+
+    assert hamming_distance(hashes[0], hashes[1]) < hamming_distance(hashes[0], hashes[2])
+    assert (0, 1) in candidate_pairs(hashes, 4)
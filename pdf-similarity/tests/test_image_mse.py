@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from image_mse import mse_matrix, mse_top_k
+
+
+def _naive(image_stack):
+    n_images = len(image_stack)
+    matrix = np.zeros((n_images, n_images))
+    for i in range(n_images):
+        for j in range(n_images):
+            if i != j:
+                matrix[i, j] = -np.mean((image_stack[i].astype(np.float64) - image_stack[j]) ** 2)
+    return matrix
+
+
+@pytest.fixture
+def image_stack():
+    return np.random.RandomState(0).rand(11, 6, 5).astype(np.float32)
+
+
+@pytest.mark.parametrize("block_size", [1, 4, 256])
+def test_tiled_matrix_matches_the_per_pair_scores(image_stack, block_size):
+    np.testing.assert_allclose(mse_matrix(image_stack, block_size), _naive(image_stack), atol=1e-9)
+
+
+def test_top_k_matches_a_full_sort(image_stack):
+    naive = _naive(image_stack)
+    np.fill_diagonal(naive, -np.inf)
+
+    indices, scores = mse_top_k(image_stack, k=3, block_size=4)
+
+    np.testing.assert_array_equal(indices, np.argsort(-naive, axis=1, kind='stable')[:, :3])
+    np.testing.assert_allclose(scores, np.take_along_axis(naive, indices, axis=1), atol=1e-9)
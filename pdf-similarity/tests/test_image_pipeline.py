@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from image_mse import iter_mse_blocks
+
+
+def test_mse_blocks_of_empty_stack():
+    assert list(iter_mse_blocks(np.zeros((0, 100, 100)))) == []
+
+
+@pytest.mark.parametrize("image_options", [{}, {'image_hash_radius': 8}])
+def test_folder_without_images(tmp_path, nltk_data, image_options):
+    pytest.importorskip("fitz")
+    pytest.importorskip("cv2")
+    from image_text_similarity import process_folder_with_images_and_text
+    from synthetic_corpus import generate_corpus
+
+    folder_path = tmp_path / "pdfs"
+    generate_corpus(str(folder_path), n_documents=3, words_per_document=200, images_per_document=0)
+    output_csv_path = str(tmp_path / "similarities.csv")
+    process_folder_with_images_and_text(str(folder_path), str(tmp_path / "similarities.pkl"), output_csv_path,
+                                        workers=1, **image_options)
+
+    assert len(pd.read_csv(output_csv_path)) == 3
+    image_results = pd.read_csv(str(tmp_path / "similarities_image.csv"))
+    assert list(image_results.columns) == ['Image1', 'Image2', 'Image Similarity (SSIM)', 'Image Similarity (MSE)']
+    assert image_results.empty
+
+
+def test_cache_stores_only_the_arrays_of_uncached_images(tmp_path):
+    from image_cache import ImageTensorCache
+
+    cache = ImageTensorCache(str(tmp_path), 2, 2, preprocess=None)
+    cache.load_arrays(["a"], [np.full((2, 2), 1, dtype=np.float32)])
+
+    stack = cache.load_arrays(["b", "a"], [np.full((2, 2), 2, dtype=np.float32), None])
+
+    assert cache.cached_keys() == {"a", "b"}
+    assert stack[:, 0, 0].tolist() == [2, 1]
+
+
+def test_undecodable_image_skips_only_that_image(tmp_path):
+    pytest.importorskip("fitz")
+    from image_extraction import extract_folder_images
+    from synthetic_corpus import generate_corpus
+
+    folder_path = tmp_path / "pdfs"
+    generate_corpus(str(folder_path), n_documents=1, words_per_document=50, images_per_document=3, overlap=0)
+    calls = []
+
+    def preprocess(image_bytes):
+        calls.append(image_bytes)
+        if len(calls) == 1:
+            raise ValueError("cannot decode")
+        return np.zeros((2, 2), dtype=np.float32)
+
+    images, errors = extract_folder_images(str(folder_path), preprocess=preprocess, workers=1)
+
+    assert len(images) == 2
+    assert "1 image(s) skipped" in next(iter(errors.values()))
+
+
+def test_image_pair_frame_lists_each_pair_of_the_block_once():
+    pytest.importorskip("cv2")
+    from image_text_similarity import image_pair_frame
+
+    image_files = ["a.png", "b.png", "c.png", "d.png"]
+    scores = np.arange(16, dtype=float).reshape(4, 4)
+    start = 1
+    ssim_block, mse_block = scores[start:3, start:], -scores[start:3, start:]
+
+    frame = image_pair_frame(image_files, start, ssim_block, mse_block)
+
+    assert list(zip(frame['Image1'], frame['Image2'])) == [("b.png", "c.png"), ("b.png", "d.png"), ("c.png", "d.png")]
+    assert frame['Image Similarity (SSIM)'].tolist() == [scores[1, 2], scores[1, 3], scores[2, 3]]
+    assert frame['Image Similarity (MSE)'].tolist() == [-scores[1, 2], -scores[1, 3], -scores[2, 3]]
+
+
+def _blank_image(image_bytes):
+    return np.zeros((2, 2), dtype=np.float32)
+
+
+def test_workers_write_the_images_and_return_no_bytes(tmp_path):
+    pytest.importorskip("fitz")
+    from image_extraction import extract_folder_images, load_manifest
+    from synthetic_corpus import generate_corpus
+
+    folder_path = tmp_path / "pdfs"
+    images_folder_path = tmp_path / "images"
+    generate_corpus(str(folder_path), n_documents=3, words_per_document=50, images_per_document=2, overlap=0.5)
+
+    images, errors = extract_folder_images(str(folder_path), str(images_folder_path), _blank_image, workers=2)
+    known = {images[0]['Content Hash']}
+    cached_images, _ = extract_folder_images(str(folder_path), preprocess=_blank_image, workers=1,
+                                             known_hashes=known)
+
+    assert not errors and images
+    assert all(set(image) == {'Image File', 'Content Hash', 'Extension', 'Occurrences', 'Array'} for image in images)
+    assert sorted(path.name for path in images_folder_path.iterdir()) == sorted(
+        [image['Image File'] for image in images] + ["manifest.json"])
+    assert [entry['Image File'] for entry in load_manifest(str(images_folder_path))] == [
+        image['Image File'] for image in images]
+    assert [('Array' in image) for image in cached_images] == [image['Content Hash'] not in known
+                                                              for image in cached_images]
@@ -0,0 +1,20 @@
+import pytest
+
+from levenshtein_engine import levenshtein_similarities, levenshtein_similarity
+
+TEXTS = ["abcdefghij", "abcdefghiX", "abcdefghXY", "abcdefgh", "zzzzzzzzzz"]
+
+
+def test_similarity_equal_to_the_threshold_is_kept():
+    assert levenshtein_similarity("abcdefghij", "abcdefghiX", min_similarity=0.9) == pytest.approx(0.9)
+    assert levenshtein_similarity("abcdefghij", "abcdefghXY", min_similarity=0.9) is None
+
+
+@pytest.mark.parametrize("min_similarity", [0.5, 0.8, 0.9])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bounded_scores_match_the_unbounded_path(min_similarity, workers):
+    exact = levenshtein_similarities(TEXTS, workers=1)
+
+    bounded = levenshtein_similarities(TEXTS, min_similarity=min_similarity, workers=workers, chunk_size=2)
+
+    assert bounded == pytest.approx({pair: score for pair, score in exact.items() if score >= min_similarity - 1e-12})
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from matrix_store import MatrixStore
+
+
+def test_blocks_and_frames_round_trip_through_lookups_and_export(tmp_path):
+    n_items = 7
+    ids = [f"{index}.pdf" for index in range(n_items)]
+    dense = np.random.RandomState(0).rand(n_items, n_items).astype(np.float32)
+    first, second = np.triu_indices(n_items, k=1)
+    store = MatrixStore.create(str(tmp_path / "store.new"), ids)
+    for start in range(0, n_items, 3):
+        store.write_block("MSE", start, dense[start:start + 3, start:])
+    frame = pd.DataFrame({'File1': np.asarray(ids)[second], 'File2': np.asarray(ids)[first],
+                          'Cosine': dense[first, second]})
+    store.write_frame(frame.iloc[::2])
+    store.move(str(tmp_path / "store"))
+
+    store = MatrixStore.open(str(tmp_path / "store"))
+
+    assert store.score("2.pdf", "5.pdf", "MSE") == dense[2, 5] == store.score("5.pdf", "2.pdf", "MSE")
+    assert np.isnan(store.score("3.pdf", "3.pdf", "MSE"))
+    expected_row = np.where(np.arange(n_items) < 3, dense[:, 3], dense[3])
+    expected_row[3] = np.nan
+    np.testing.assert_array_equal(store.row("3.pdf", "MSE"), expected_row)
+    cosine = np.full(len(first), np.nan, dtype=np.float32)
+    cosine[::2] = dense[first, second][::2]
+
+    store.export(str(tmp_path / "export.csv"), chunk_rows=4)
+    exported = pd.read_csv(tmp_path / "export.csv")
+    assert list(zip(exported['File1'], exported['File2'])) == [(ids[i], ids[j]) for i, j in zip(first, second)]
+    np.testing.assert_allclose(exported['MSE'], dense[first, second], rtol=1e-6)
+    np.testing.assert_allclose(exported['Cosine'], cosine, rtol=1e-6)
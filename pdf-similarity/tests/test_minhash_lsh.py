@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from minhash_lsh import jaccard_similarity
+from pair_scoring import score_text_pairs, similarity_column
+
+
+def _corpus(n_documents=30, seed=0):
+    rng = np.random.RandomState(seed)
+    vocabulary = [f"word{index}" for index in range(400)]
+    texts = []
+    for _ in range(n_documents // 3):
+        base = list(rng.choice(vocabulary, 60, replace=False))
+        texts.append(" ".join(base))
+        texts.append(" ".join(base[:59] + ["edit"]))
+        texts.append(" ".join(rng.choice(vocabulary, 60, replace=False)))
+    return texts
+
+
+def test_lsh_jaccard_recalls_the_exact_near_duplicates():
+    texts = _corpus()
+    df = pd.DataFrame({'File Name': [f"{index:02d}.pdf" for index in range(len(texts))],
+                       'Text': texts, 'Preprocessed Text': texts})
+    threshold = 0.8
+
+    result = score_text_pairs(df, lambda text1, text2, method: 0.0, methods=["Jaccard"],
+                              jaccard_threshold=threshold, chunk_rows=7)
+
+    column = result[similarity_column("Jaccard", "Normal Text")]
+    found = {(row.File1, row.File2) for row, score in zip(result.itertuples(), column) if not np.isnan(score)}
+    names = df['File Name'].tolist()
+    exact = {(names[i], names[j]) for i in range(len(texts)) for j in range(i + 1, len(texts))
+             if jaccard_similarity(texts[i], texts[j]) >= threshold}
+    assert exact and found == exact
+    scored = column.dropna()
+    assert (scored >= threshold).all()
+    assert len(result) == len(texts) * (len(texts) - 1) // 2
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pytest
+
+from neighbour_index import NeighbourIndex
+
+
+def _symmetric_scores(n_images, seed=0):
+    scores = np.random.RandomState(seed).rand(n_images, n_images)
+    return np.triu(scores, 1) + np.triu(scores, 1).T
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 10])
+def test_blockwise_index_keeps_the_exact_top_k(tmp_path, block_size):
+    n_images, k = 10, 3
+    scores = _symmetric_scores(n_images)
+    scores[0, 1] = scores[1, 0] = np.nan
+    names = [f"{index}.png" for index in range(n_images)]
+    index = NeighbourIndex(names, k)
+    for start in range(0, n_images, block_size):
+        index.update(start, scores[start:start + block_size, start:])
+    index.save(str(tmp_path / "neighbours.npz"))
+
+    loaded = NeighbourIndex.load(str(tmp_path / "neighbours.npz"))
+
+    ranked = np.where(np.isnan(scores) | np.eye(n_images, dtype=bool), -np.inf, scores)
+    for row, name in enumerate(names):
+        expected = np.argsort(-ranked[row], kind='stable')[:k]
+        assert loaded.neighbours(name) == [(names[column], ranked[row, column]) for column in expected]
+
+
+def test_thumbnails_are_rendered_once(tmp_path):
+    pil = pytest.importorskip("PIL.Image")
+    from thumbnail_store import ThumbnailStore
+
+    pil.new("RGB", (400, 300), "red").save(tmp_path / "image.png")
+    store = ThumbnailStore(str(tmp_path), size=(50, 40))
+
+    path = store.path("image.png")
+    rendered_at = os.path.getmtime(path)
+    os.utime(tmp_path / "image.png", (rendered_at - 10, rendered_at - 10))
+
+    assert store.path("image.png") == path and os.path.getmtime(path) == rendered_at
+    assert store.load("image.png").size == (50, 40)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from pair_scoring import score_pairs, score_text_pairs, similarity_column
+
+TEXTS = ["one two three four", "one two three five", "six seven eight nine", "one two"]
+
+
+def _pairwise_reference(texts, similarity_function, methods):
+    rows = []
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            rows.append([similarity_function(texts[i], texts[j], method) for method in methods])
+    return np.array(rows)
+
+
+def test_one_pass_matches_scoring_each_pair_per_method():
+    def similarity(text1, text2, method):
+        return len(set(text1.split()) & set(text2.split())) + 0.1 * len(method)
+
+    methods = ["Levenshtein", "Hamming"]
+    names = [f"{index}.pdf" for index in range(len(TEXTS))]
+
+    result = score_pairs(names, {"Normal Text": TEXTS}, similarity, methods)
+
+    assert list(zip(result['File1'], result['File2']))[:3] == [("0.pdf", "1.pdf"), ("0.pdf", "2.pdf"), ("0.pdf", "3.pdf")]
+    np.testing.assert_allclose(result[[similarity_column(method, "Normal Text") for method in methods]].to_numpy(),
+                               _pairwise_reference(TEXTS, similarity, methods))
+
+
+def test_known_and_precomputed_scores_are_not_scored_again():
+    calls = []
+
+    def similarity(text1, text2, method):
+        calls.append((text1, text2))
+        return 0.5
+
+    column = similarity_column("Hamming", "Normal Text")
+    known = np.full(6, np.nan)
+    known[[0, 5]] = [0.9, 0.1]
+
+    result = score_pairs(["a", "b", "c", "d"], {"Normal Text": TEXTS}, similarity, ["Hamming", "Cosine"],
+                         precomputed={similarity_column("Cosine", "Normal Text"): np.arange(6.0)},
+                         known_scores={column: known})
+
+    assert len(calls) == 4
+    assert result[column].tolist() == [0.9, 0.5, 0.5, 0.5, 0.5, 0.1]
+    assert result[similarity_column("Cosine", "Normal Text")].tolist() == list(np.arange(6.0))
+
+
+def test_minhash_stores_without_pkl_extension_are_kept_apart(tmp_path):
+    df = pd.DataFrame({'File Name': ["a.pdf", "b.pdf", "c.pdf"],
+                       'Text': ["one two three four", "one two three five", "six seven eight nine"],
+                       'Preprocessed Text': ["one two three", "one two five", "six seven"]})
+    store_path = tmp_path / "signatures"
+
+    score_text_pairs(df, lambda text1, text2, method: 0.0, methods=["Jaccard"], jaccard_threshold=0.5,
+                     minhash_store_path=str(store_path))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["signatures", "signatures_preprocessed"]
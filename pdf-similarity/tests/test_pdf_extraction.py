@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("PyPDF2")
+
+from pdf_extraction import extract_folder
+from synthetic_corpus import generate_corpus
+
+
+def test_pool_matches_in_process_extraction_and_reports_broken_files(tmp_path):
+    folder_path = tmp_path / "pdfs"
+    generate_corpus(str(folder_path), n_documents=4, words_per_document=120, images_per_document=0)
+    (folder_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    serial, serial_errors = extract_folder(str(folder_path), str.upper, workers=1)
+    pooled, pooled_errors = extract_folder(str(folder_path), str.upper, workers=2)
+
+    assert pooled == serial
+    listed = [file_name for file_name in os.listdir(folder_path) if file_name != "broken.pdf"]
+    assert [row['File Name'] for row in pooled] == listed
+    assert all(row['Text'] and row['Preprocessed Text'] == row['Text'].upper() for row in pooled)
+    assert list(pooled_errors) == list(serial_errors) == ["broken.pdf"]
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from result_writer import ChunkedResultWriter, iter_result_chunks
+
+COLUMNS = ['File1', 'File2', 'Score']
+
+
+def test_empty_first_chunk_writes_the_header_once(tmp_path):
+    path = str(tmp_path / "results.csv")
+    with ChunkedResultWriter(path) as writer:
+        writer.write(pd.DataFrame(columns=COLUMNS))
+        writer.write(pd.DataFrame([["a.pdf", "b.pdf", 0.5]], columns=COLUMNS))
+        writer.append({'File1': "a.pdf", 'File2': "c.pdf", 'Score': 0.25})
+
+    with open(path) as file:
+        assert file.read().splitlines() == ["File1,File2,Score", "a.pdf,b.pdf,0.5", "a.pdf,c.pdf,0.25"]
+
+
+def test_known_columns_give_a_header_only_csv_without_rows(tmp_path):
+    path = str(tmp_path / "results.csv")
+    with ChunkedResultWriter(path, columns=COLUMNS):
+        pass
+
+    assert list(pd.read_csv(path).columns) == COLUMNS
+    assert pd.read_csv(path).empty
+
+
+def test_parquet_chunks_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "results.parquet")
+    chunks = [pd.DataFrame([["a.pdf", "b.pdf", 0.5]], columns=COLUMNS),
+              pd.DataFrame([["a.pdf", "c.pdf", 0.25]], columns=COLUMNS)]
+    with ChunkedResultWriter(path, "parquet") as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    pd.testing.assert_frame_equal(pd.concat(iter_result_chunks(path), ignore_index=True),
+                                  pd.concat(chunks, ignore_index=True))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from minhash_lsh import jaccard_similarity
+from similarity_index import SimilarityIndex
+
+DOCUMENTS = {"a.pdf": "alpha beta gamma delta", "b.pdf": "alpha beta epsilon", "c.pdf": "zeta eta theta",
+             "d.pdf": "alpha gamma zeta eta"}
+QUERY = "alpha beta gamma"
+
+
+def _index(documents=DOCUMENTS):
+    index = SimilarityIndex()
+    for file_name, text in documents.items():
+        index.add_text(file_name, text)
+    return index
+
+
+def test_cosine_top_k_matches_a_tfidf_fitted_on_the_index():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer().fit(DOCUMENTS.values())
+    exact = (vectorizer.transform(DOCUMENTS.values()) @ vectorizer.transform([QUERY]).T).toarray().ravel()
+    order = np.argsort(-exact, kind='stable')[:2]
+
+    top = _index().query_text(QUERY, k=2)
+
+    assert top['File Name'].tolist() == [list(DOCUMENTS)[position] for position in order]
+    np.testing.assert_allclose(top['Similarity'], exact[order])
+
+
+def test_jaccard_top_k_matches_exact_jaccard():
+    top = _index().query_text(QUERY, k=3, method="Jaccard")
+
+    exact = sorted(((jaccard_similarity(QUERY, text), file_name) for file_name, text in DOCUMENTS.items()),
+                   key=lambda pair: -pair[0])[:3]
+    assert top['File Name'].tolist() == [file_name for _, file_name in exact]
+    np.testing.assert_allclose(top['Similarity'], [score for score, _ in exact])
+
+
+def test_removed_documents_leave_the_same_index_as_never_adding_them(tmp_path):
+    index = _index()
+    index.remove("a.pdf")
+    index.save(str(tmp_path / "index.pkl"))
+
+    loaded = SimilarityIndex.load(str(tmp_path / "index.pkl"))
+
+    fresh = _index({file_name: text for file_name, text in DOCUMENTS.items() if file_name != "a.pdf"})
+    assert "a.pdf" not in loaded and len(loaded) == 3
+    for method in ["Cosine", "Jaccard"]:
+        expected = fresh.query_text(QUERY, k=3, method=method)
+        actual = loaded.query_text(QUERY, k=3, method=method)
+        assert actual['File Name'].tolist() == expected['File Name'].tolist()
+        np.testing.assert_allclose(actual['Similarity'], expected['Similarity'])
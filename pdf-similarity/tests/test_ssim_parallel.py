@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("skimage")
+
+from ssim_parallel import iter_ssim_blocks, ssim_matrix, ssim_score
+
+
+@pytest.fixture
+def image_stack():
+    rng = np.random.RandomState(0)
+    base = rng.rand(32, 32).astype(np.float32)
+    return np.stack([base + 0.05 * index * rng.rand(32, 32).astype(np.float32) for index in range(9)])
+
+
+def test_pooled_blocks_match_the_serial_blocks(image_stack):
+    serial = list(iter_ssim_blocks(image_stack, block_size=4, workers=1, tile_size=2))
+
+    pooled = list(iter_ssim_blocks(image_stack, block_size=4, workers=3, tile_size=2))
+
+    assert [start for start, _ in pooled] == [start for start, _ in serial]
+    for (_, pooled_block), (_, serial_block) in zip(pooled, serial):
+        np.testing.assert_array_equal(pooled_block, serial_block)
+
+
+def test_pooled_matrix_scores_only_the_given_pairs(image_stack):
+    pairs = {(0, 1), (2, 7), (5, 8)}
+
+    matrix = ssim_matrix(image_stack, pairs=pairs, workers=2, block_size=4)
+
+    for i, j in pairs:
+        assert matrix[i, j] == matrix[j, i] == pytest.approx(ssim_score(image_stack[i], image_stack[j]))
+    assert np.isnan(matrix[0, 2]) and np.isnan(matrix[3, 4])
+    np.testing.assert_array_equal(np.diag(matrix), 1.0)
@@ -0,0 +1,33 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from synthetic_corpus import generate_corpus
+
+
+def _word_sets(pdf_paths):
+    word_sets = []
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as pdf_document:
+            word_sets.append(set(" ".join(page.get_text() for page in pdf_document).split()))
+    return word_sets
+
+
+def _mean_jaccard(word_sets):
+    scores = [len(first & second) / len(first | second)
+              for position, first in enumerate(word_sets) for second in word_sets[position + 1:]]
+    return sum(scores) / len(scores)
+
+
+def test_corpus_is_reproducible_and_overlap_controls_similarity(tmp_path):
+    first = generate_corpus(str(tmp_path / "first"), n_documents=3, words_per_document=300, overlap=0.8,
+                            images_per_document=2)
+    again = generate_corpus(str(tmp_path / "again"), n_documents=3, words_per_document=300, overlap=0.8,
+                            images_per_document=2)
+    distinct = generate_corpus(str(tmp_path / "distinct"), n_documents=3, words_per_document=300, overlap=0.1,
+                               images_per_document=2)
+
+    assert _word_sets(first) == _word_sets(again)
+    assert _mean_jaccard(_word_sets(first)) > _mean_jaccard(_word_sets(distinct)) + 0.3
+    with fitz.open(first[0]) as pdf_document:
+        assert sum(len(page.get_images()) for page in pdf_document) == 2
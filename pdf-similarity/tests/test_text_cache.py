@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import text_cache
+from matrix_store import MatrixStore
+from pair_scoring import score_settings, similarity_column
+from text_cache import TextCache, reusable_pair_scores
+
+
+def test_filling_a_cold_cache_lists_the_directory_once(tmp_path, monkeypatch):
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(text_cache.os, "listdir", lambda path: listings.append(path) or listdir(path))
+    cache = TextCache(str(tmp_path))
+
+    for index in range(100):
+        cache.put(f"hash{index}", {'Text': "x" * 500, 'Preprocessed Text': ""})
+
+    assert len(listings) == 1
+
+
+def test_full_cache_stays_under_max_bytes(tmp_path):
+    cache = TextCache(str(tmp_path), max_bytes=20000)
+
+    for index in range(100):
+        cache.put(f"hash{index}", {'Text': "x" * 500, 'Preprocessed Text': ""})
+
+    assert sum(entry.stat().st_size for entry in os.scandir(tmp_path)) <= 20000
+    assert cache.get("hash99") is not None
+
+
+def _previous_run(tmp_path, settings):
+    file_names = ["a.pdf", "b.pdf", "c.pdf"]
+    pd.DataFrame({'File Name': file_names, 'Content Hash': ["ha", "hb", "hc"]}).to_pickle(str(tmp_path / "run.pkl"))
+    column = similarity_column("Jaccard", "Normal Text")
+    store = MatrixStore.create(str(tmp_path / "run.matrix"), file_names, settings=settings)
+    store.write_frame(pd.DataFrame({'File1': ["a.pdf", "a.pdf", "b.pdf"], 'File2': ["b.pdf", "c.pdf", "c.pdf"],
+                                    column: [0.1, 0.2, 0.3]}))
+    store.close()
+    return file_names, column
+
+
+def test_scores_are_reused_only_with_the_same_settings(tmp_path):
+    file_names, column = _previous_run(tmp_path, score_settings())
+    first, second = np.array([0, 0, 1]), np.array([1, 2, 2])
+
+    reusable = reusable_pair_scores(str(tmp_path / "run.pkl"), str(tmp_path / "run.matrix"), file_names,
+                                    ["ha", "hb", "hc"], score_settings())
+    np.testing.assert_allclose(reusable.lookup(first, second)[column], [0.1, 0.2, 0.3], rtol=1e-6)
+    reusable.close()
+
+    assert reusable_pair_scores(str(tmp_path / "run.pkl"), str(tmp_path / "run.matrix"), file_names,
+                                ["ha", "hb", "hc"], score_settings(jaccard_threshold=0.5)) is None
@@ -0,0 +1,44 @@
+# Only stopwords every NLTK English list has, so the expected output is fixed.
+TEXTS = ["The Quick brown foxes jumping to the lazy dogs!",
+         "Running, runner and runs: 42 dogs in the fog-bound harbour.",
+         ""]
+EXPECTED = ["quick brown fox jump lazi dog",
+            "run runner run 42 dog fog bound harbour",
+            ""]
+
+
+def _per_call_preprocess(text):
+    # The original preprocess_text, rebuilding the stopwords and stemmer on every call. Its
+    # word_tokenize sentence split is a no-op once punctuation is replaced, so the word
+    # tokenizer alone stands in for it and the reference needs no punkt data.
+    import re
+    from nltk.corpus import stopwords
+    from nltk.stem import PorterStemmer
+    from nltk.tokenize import NLTKWordTokenizer
+
+    text = re.sub(r"[^a-zA-Z0-9]", " ", text.lower())
+    tokens = NLTKWordTokenizer().tokenize(text)
+    stop_words = set(stopwords.words("english"))
+    filtered_tokens = [word for word in tokens if word.lower() not in stop_words]
+    stemmer = PorterStemmer()
+    return " ".join(stemmer.stem(word) for word in filtered_tokens)
+
+
+def test_preprocessor_matches_the_per_call_pipeline(nltk_data):
+    from text_preprocessing import TextPreprocessor, preprocess_texts
+
+    assert list(TextPreprocessor().preprocess_many(TEXTS)) == [_per_call_preprocess(text) for text in TEXTS]
+    assert list(preprocess_texts(TEXTS)) == EXPECTED
+
+
+def test_repeated_tokens_are_stemmed_once(nltk_data):
+    from text_preprocessing import TextPreprocessor
+
+    preprocessor = TextPreprocessor(memo_size=100)
+
+    first = preprocessor.preprocess("dogs running dogs running")
+    second = preprocessor.preprocess("running dogs")
+
+    assert first == "dog run dog run" and second == "run dog"
+    info = preprocessor._stem.cache_info()
+    assert (info.misses, info.hits) == (2, 4)
@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from matrix_store import MatrixStore, matrix_store_path
+from pair_scoring import result_columns
+from text_similarity import process_folder
+
+
+def _assert_empty_results(tmp_path):
+    output_csv_path = str(tmp_path / "similarities.csv")
+    result = pd.read_csv(output_csv_path)
+    assert result.empty and list(result.columns) == result_columns()
+    assert pd.read_pickle(tmp_path / "similarities.pkl").empty
+    store = MatrixStore.open(matrix_store_path(output_csv_path))
+    assert store.ids == [] and store.n_pairs == 0
+    assert not os.path.exists(matrix_store_path(output_csv_path) + ".new")
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_empty_folder_gives_empty_results(tmp_path, cache):
+    (tmp_path / "pdfs").mkdir()
+
+    process_folder(str(tmp_path / "pdfs"), str(tmp_path / "similarities.pkl"), str(tmp_path / "similarities.csv"),
+                   workers=1, cache_dir=str(tmp_path / "cache") if cache else None)
+
+    _assert_empty_results(tmp_path)
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_folder_where_every_pdf_fails_gives_empty_results(tmp_path, cache):
+    (tmp_path / "pdfs").mkdir()
+    for number in range(2):
+        (tmp_path / "pdfs" / f"broken{number}.pdf").write_bytes(b"not a pdf")
+
+    with pytest.warns(UserWarning, match="Skipping broken"):
+        process_folder(str(tmp_path / "pdfs"), str(tmp_path / "similarities.pkl"), str(tmp_path / "similarities.csv"),
+                       workers=1, cache_dir=str(tmp_path / "cache") if cache else None)
+
+    _assert_empty_results(tmp_path)
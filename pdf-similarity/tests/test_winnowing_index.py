@@ -0,0 +1,50 @@
+import random
+
+from winnowing_index import WinnowingIndex, winnow
+
+
+def _words(count, seed):
+    rng = random.Random(seed)
+    return " ".join(f"word{rng.randrange(100000)}" for _ in range(count))
+
+
+def test_shared_passage_of_guaranteed_length_shares_a_fingerprint():
+    k, window = 5, 4
+    for seed in range(20):
+        passage = _words(k + window - 1, seed)
+        first = f"{_words(30, seed + 100)} {passage} {_words(30, seed + 200)}"
+        second = f"{_words(15, seed + 300)} {passage}"
+        assert winnow(first, k, window) & winnow(second, k, window)
+
+
+def test_copied_pages_are_found_as_one_range(tmp_path):
+    pages = [_words(200, seed) for seed in range(6)]
+    index = WinnowingIndex()
+    index.add("report.pdf", pages)
+    index.add("other.pdf", [_words(200, seed) for seed in range(10, 14)])
+    index.add("copy.pdf", [_words(200, 20), pages[2], pages[3], _words(200, 21)])
+    index.save(str(tmp_path / "index.pkl"))
+    index = WinnowingIndex.load(str(tmp_path / "index.pkl"))
+
+    overlaps = index.overlaps()
+
+    assert len(overlaps) == 1
+    row = overlaps.iloc[0]
+    assert (row['File1'], row['File2']) == ("copy.pdf", "report.pdf")
+    assert (row['File1 Start Page'], row['File1 End Page']) == (2, 3)
+    assert (row['File2 Start Page'], row['File2 End Page']) == (3, 4)
+
+    query = index.query_pages([pages[4]])
+    assert query['File Name'].tolist() == ["report.pdf"]
+    assert (query.loc[0, 'Match Start Page'], query.loc[0, 'Match End Page']) == (5, 5)
+
+
+def test_remove_drops_postings():
+    index = WinnowingIndex()
+    index.add("a.pdf", [_words(50, 1)])
+    index.add("b.pdf", [_words(50, 2)])
+    index.remove("a.pdf")
+    index.remove("b.pdf")
+
+    assert len(index) == 0
+    assert not index.postings
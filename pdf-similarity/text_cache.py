@@ -0,0 +1,216 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from matrix_store import MatrixStore, condensed_index
+
+# Methods whose pair scores depend only on the two documents compared and the score settings.
+# LSH Jaccard qualifies: whether a pair is a candidate depends only on its two signatures and the
+# threshold. Corpus TF-IDF cosine changes whenever any document changes and is always recomputed.
+PAIRWISE_METHODS = ("Levenshtein", "Jaccard", "Hamming")
+
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 hash of a file's contents.
+
+    Parameters:
+    - file_path (str): Path to the file.
+    - chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+    - str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """
+    Content-addressed on-disk cache for extracted and preprocessed PDF text.
+
+    Entries are keyed by the PDF content hash plus a settings string describing the
+    preprocessing, so renamed files still hit and changed settings miss. The directory is kept
+    under max_bytes by evicting the least recently used entries (tracked by file mtime).
+
+    The total size is scanned once and then tracked as entries are stored, so the directory is
+    only listed again when it has to be evicted; an eviction frees EVICT_TO of max_bytes at once.
+    """
+
+    EVICT_TO = 0.9
+
+    def __init__(self, cache_dir, max_bytes=1 << 30, settings=""):
+        """
+        Parameters:
+        - cache_dir (str): Directory holding the cache entries.
+        - max_bytes (int): Maximum total size of the cache directory.
+        - settings (str): Description of the preprocessing settings, part of every key.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.settings = settings
+        self.total_size = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, content_hash):
+        key = hashlib.sha256(f"{content_hash}|{self.settings}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, content_hash):
+        """
+        Look up a cache entry and mark it as recently used.
+
+        Parameters:
+        - content_hash (str): Content hash of the PDF.
+
+        Returns:
+        - dict or None: Cached {'Text', 'Preprocessed Text'} entry, or None on a miss.
+        """
+        entry_path = self._entry_path(content_hash)
+        try:
+            with open(entry_path, 'rb') as file:
+                entry = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        os.utime(entry_path)
+        return entry
+
+    def put(self, content_hash, entry):
+        """
+        Store a cache entry and evict old entries if the cache grew too large.
+
+        Parameters:
+        - content_hash (str): Content hash of the PDF.
+        - entry (dict): {'Text', 'Preprocessed Text'} entry to store.
+        """
+        entry_path = self._entry_path(content_hash)
+        try:
+            previous_size = os.path.getsize(entry_path)
+        except OSError:
+            previous_size = 0
+        temporary_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(entry, file)
+        os.replace(temporary_path, entry_path)
+        if self.total_size is None:
+            self.evict()
+        else:
+            self.total_size += os.path.getsize(entry_path) - previous_size
+            if self.total_size > self.max_bytes:
+                self.evict(int(self.max_bytes * self.EVICT_TO))
+
+    def evict(self, target_bytes=None):
+        """
+        Delete least recently used entries until the cache fits in target_bytes.
+
+        Parameters:
+        - target_bytes (int or None): Size to shrink the cache to. None uses max_bytes.
+        """
+        target_bytes = self.max_bytes if target_bytes is None else target_bytes
+        entries = []
+        total_size = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".pkl"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, file_name))
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+            total_size += stat.st_size
+
+        for _, size, file_name in sorted(entries):
+            if total_size <= target_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+        self.total_size = total_size
+
+
+class ReusableScores:
+    """
+    Pair scores of a previous run that are still valid, read from its matrix store chunk by chunk.
+
+    Only the mapping from current to previous document positions is held in memory; the scores
+    stay memory-mapped, so reuse costs no memory per pair.
+    """
+
+    def __init__(self, store, previous_positions, columns):
+        """
+        Parameters:
+        - store (MatrixStore): Matrix store of the previous run.
+        - previous_positions (numpy.ndarray): Previous position of each current document, or -1
+          for new and changed documents.
+        - columns (list of str): Reusable metric columns.
+        """
+        self.store = store
+        self.previous_positions = previous_positions
+        self.columns = columns
+
+    def lookup(self, first, second):
+        """
+        Look up the reusable scores of a chunk of pairs.
+
+        Parameters:
+        - first (numpy.ndarray): First document index of each pair.
+        - second (numpy.ndarray): Second document index of each pair.
+
+        Returns:
+        - dict: Maps each reusable column to a float array aligned with the pairs, NaN where the
+          score is not reusable (changed files, or pairs the previous run left empty).
+        """
+        previous_first = self.previous_positions[first]
+        previous_second = self.previous_positions[second]
+        valid = (previous_first >= 0) & (previous_second >= 0)
+        positions = condensed_index(previous_first[valid], previous_second[valid], len(self.store.ids))
+        scores = {}
+        for column in self.columns:
+            values = np.full(len(first), np.nan)
+            values[valid] = self.store.array(column)[positions]
+            scores[column] = values
+        return scores
+
+    def close(self):
+        self.store.close()
+
+
+def reusable_pair_scores(output_pickle_path, store_path, file_names, content_hashes, settings):
+    """
+    Open the pair scores of a previous run that are still valid for the current folder.
+
+    A pair is reusable when both files have the same content hash as in the previous run. Only
+    the PAIRWISE_METHODS columns scored with the same settings as now are reused.
+
+    Parameters:
+    - output_pickle_path (str): Pickle written by the previous run, with a 'Content Hash' column.
+    - store_path (str): Matrix store written by the previous run (see matrix_store.py).
+    - file_names (list of str): Current file names, in document order.
+    - content_hashes (list of str): Current content hash of each file.
+    - settings (dict): Maps columns to their current settings, see pair_scoring.score_settings.
+
+    Returns:
+    - ReusableScores or None: The reusable scores, or None if the previous run left nothing to reuse.
+    """
+    if not (os.path.exists(output_pickle_path) and os.path.isdir(store_path)):
+        return None
+    previous_df = pd.read_pickle(output_pickle_path)
+    if 'Content Hash' not in previous_df.columns:
+        return None
+    previous_hashes = dict(zip(previous_df['File Name'], previous_df['Content Hash']))
+    store = MatrixStore.open(store_path)
+    columns = [column for column in store.metrics
+               if any(column.startswith(f"Similarity ({method})") for method in PAIRWISE_METHODS)
+               and column in settings and store.settings.get(column) == settings[column]]
+    previous_positions = np.array([store.position[file_name]
+                                   if file_name in store.position and previous_hashes.get(file_name) == content_hash
+                                   else -1
+                                   for file_name, content_hash in zip(file_names, content_hashes)], dtype=np.int64)
+    if not columns or (previous_positions < 0).all():
+        return None
+    return ReusableScores(store, previous_positions, columns)
@@ -0,0 +1,129 @@
+import re
+from functools import lru_cache
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-zA-Z0-9]")
+
+# Describes preprocess_text; part of every text cache key so changing the pipeline invalidates it.
+PREPROCESS_SETTINGS = "lower;alnum;punkt;stopwords-english;porter"
+
+# NLTK data used by the pipeline, as (nltk.data path, download name).
+NLTK_RESOURCES = [("corpora/stopwords", "stopwords")]
+
+
+def ensure_nltk_data(download=True):
+    """
+    Check that the NLTK data used by preprocessing is installed locally.
+
+    Only missing resources are downloaded, so nothing touches the network once the data is
+    present. This runs when the first TextPreprocessor is built, not at import.
+
+    Parameters:
+    - download (bool): Download missing resources; when False, a LookupError is raised instead.
+    """
+    import nltk
+
+    for resource_path, name in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource_path)
+        except LookupError:
+            if not download:
+                raise
+            nltk.download(name, quiet=True)
+
+
+class TextPreprocessor:
+    """
+    Reusable preprocessing pipeline producing the same output as ``preprocess_text``.
+
+    The stopword set, stemmer and word tokenizer are built once, and stems are memoised in a
+    bounded LRU table because corpus vocabularies repeat heavily.
+
+    After the non-alphanumeric characters are replaced, the text contains no sentence
+    punctuation, so ``word_tokenize``'s sentence split is a no-op and the word tokenizer is
+    applied directly.
+    """
+
+    def __init__(self, memo_size=200000):
+        """
+        Parameters:
+        - memo_size (int): Maximum number of distinct tokens kept in the stem memo table.
+        """
+        from nltk.corpus import stopwords
+        from nltk.stem import PorterStemmer
+        from nltk.tokenize import NLTKWordTokenizer
+
+        ensure_nltk_data()
+        self.stop_words = frozenset(stopwords.words("english"))
+        self.stemmer = PorterStemmer()
+        self.tokenizer = NLTKWordTokenizer()
+        self._stem = lru_cache(maxsize=memo_size)(self._stem_token)
+
+    def _stem_token(self, token):
+        # Returns None for stopwords so they are dropped with a single memo lookup.
+        if token in self.stop_words:
+            return None
+        return self.stemmer.stem(token)
+
+    def preprocess(self, text):
+        """
+        Preprocess text by converting to lowercase, removing non-alphanumeric characters,
+        tokenizing, removing stopwords, and stemming.
+
+        Parameters:
+        - text (str): Input text.
+
+        Returns:
+        - str: Preprocessed text.
+        """
+        text = _NON_ALPHANUMERIC.sub(" ", text.lower())
+        stems = map(self._stem, self.tokenizer.tokenize(text))
+        return " ".join(stem for stem in stems if stem is not None)
+
+    def preprocess_many(self, texts):
+        """
+        Preprocess an iterable of documents.
+
+        Parameters:
+        - texts (iterable of str): Input documents.
+
+        Returns:
+        - generator: Yields the preprocessed text of each document in order.
+        """
+        for text in texts:
+            yield self.preprocess(text)
+
+
+_default_preprocessor = None
+
+
+def _get_default_preprocessor():
+    global _default_preprocessor
+    if _default_preprocessor is None:
+        _default_preprocessor = TextPreprocessor()
+    return _default_preprocessor
+
+
+def preprocess_text(text):
+    """
+    Preprocess one document with the shared per-process TextPreprocessor.
+
+    Parameters:
+    - text (str): Input text.
+
+    Returns:
+    - str: Preprocessed text.
+    """
+    return _get_default_preprocessor().preprocess(text)
+
+
+def preprocess_texts(texts):
+    """
+    Preprocess an iterable of documents with the shared per-process TextPreprocessor.
+
+    Parameters:
+    - texts (iterable of str): Input documents.
+
+    Returns:
+    - generator: Yields the preprocessed text of each document in order.
+    """
+    return _get_default_preprocessor().preprocess_many(texts)
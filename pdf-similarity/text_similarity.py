@@ -1,19 +1,15 @@
 
-import os
-import re
-import nltk
-import PyPDF2
+import warnings
 import pandas as pd
 import textdistance
 from Levenshtein import distance
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from pdf_extraction import TEXT_COLUMNS, extract_folder
+from text_cache import TextCache, reusable_pair_scores
+import text_preprocessing
+from pair_scoring import SIMILARITY_METHODS, iter_text_pair_chunks, result_columns, score_settings
+from result_writer import ChunkedResultWriter, result_path
+from matrix_store import MatrixStore, matrix_store_path
 
-nltk.download('punkt')
-nltk.download('stopwords')
 
 def calculate_similarity(text1, text2, method):
     """
@@ -30,6 +26,8 @@ def calculate_similarity(text1, text2, method):
     if method == "Levenshtein":
         return 1 - (distance(text1, text2) / max(len(text1), len(text2)))
     elif method == "Cosine":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
         vectorizer = TfidfVectorizer().fit_transform([text1, text2])
         cosine_sim = cosine_similarity(vectorizer)
         return cosine_sim[0, 1]
@@ -50,23 +48,22 @@ def preprocess_text(text):
     Preprocess text by converting to lowercase, removing non-alphanumeric characters,
     tokenizing, removing stopwords, and stemming.
 
+    The stopword set and stemmer are shared across calls; use text_preprocessing.preprocess_texts
+    to preprocess many documents at once.
+
     Parameters:
     - text (str): Input text.
 
     Returns:
     - str: Preprocessed text.
     """
-    text = text.lower()
-    text = re.sub(r"[^a-zA-Z0-9]", " ", text)
-    tokens = word_tokenize(text)
-    stop_words = set(stopwords.words("english"))
-    filtered_tokens = [word for word in tokens if word.lower() not in stop_words]
-    stemmer = PorterStemmer()
-    stemmed_tokens = [stemmer.stem(word) for word in filtered_tokens]
-    preprocessed_text = " ".join(stemmed_tokens)
-    return preprocessed_text
+    return text_preprocessing.preprocess_text(text)
 
-def process_folder(folder_path, output_pickle_path, output_csv_path):
+def process_folder(folder_path, output_pickle_path, output_csv_path, corpus_cosine=True,
+                   jaccard_threshold=None, minhash_store_path=None,
+                   workers=None, timeout=None, cache_dir=None, cache_max_bytes=1 << 30,
+                   levenshtein_min_similarity=None, output_format="csv", chunk_rows=100000,
+                   methods=SIMILARITY_METHODS, cosine_threshold=None):
     """
     Process PDF files in a folder, calculate similarities, and save results to pickle and CSV.
 
@@ -74,53 +71,66 @@ def process_folder(folder_path, output_pickle_path, output_csv_path):
     - folder_path (str): Path to the folder containing PDF files.
     - output_pickle_path (str): Path to save the pickle file.
     - output_csv_path (str): Path to save the CSV file.
+    - corpus_cosine (bool): Score the Cosine method from one TF-IDF fitted over the whole
+      folder instead of fitting a vectorizer per pair.
+    - jaccard_threshold (float or None): When set, the Jaccard method is scored only for the
+      MinHash/LSH candidate pairs at or above this similarity; other pairs are left empty.
+      None keeps the exhaustive all-pairs comparison, which is fine for small folders.
+    - minhash_store_path (str or None): Pickle file for the MinHash signatures so later runs
+      only hash new or changed PDFs. The preprocessed-text signatures are stored next to it
+      with a '_preprocessed' suffix.
+    - workers (int or None): Number of processes used to extract and preprocess the PDFs and
+      to score Levenshtein pairs. None uses every CPU.
+    - timeout (float or None): Maximum number of seconds spent on a single PDF. PDFs that fail
+      or time out are skipped with a warning.
+    - cache_dir (str or None): Directory of the content-addressed text cache. When set, only new
+      or changed PDFs are extracted and preprocessed, and the Levenshtein, Jaccard and Hamming
+      scores of pairs whose files are unchanged are reused from the previous pickle and matrix store
+      when they were scored with the same settings.
+    - cache_max_bytes (int): Size limit of the text cache; least recently used entries are evicted.
+    - levenshtein_min_similarity (float or None): When set, Levenshtein pairs that cannot reach
+      this similarity are pruned by length or by an early-stopping distance and left empty.
+    - output_format (str): 'csv' writes output_csv_path; 'parquet' writes a partitioned dataset
+      next to it with a '.parquet' suffix. The same scores are always also written to a compact
+      matrix store with a '.matrix' suffix (see matrix_store.py), which the viewers load lazily.
+    - chunk_rows (int): Number of result rows scored and written at a time.
+    - methods (list of str): Text similarity methods to score, a subset of SIMILARITY_METHODS.
+    - cosine_threshold (float or None): When set with corpus_cosine, Cosine scores below this
+      similarity are pruned from the sparse TF-IDF products and left empty.
     """
-    data = []
-    similarities = []
-
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith(".pdf"):
-            file_path = os.path.join(folder_path, file_name)
-
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                file_text = ""
-
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    file_text += text.lower()
-
-                preprocessed_text = preprocess_text(file_text)
-                data.append({'File Name': file_name, 'Text': file_text, 'Preprocessed Text': preprocessed_text})
-
-    df = pd.DataFrame(data)
+    cache = TextCache(cache_dir, cache_max_bytes, text_preprocessing.PREPROCESS_SETTINGS) if cache_dir is not None else None
+    data, errors = extract_folder(folder_path, text_preprocessing.preprocess_text, workers, timeout, cache)
+    for file_name, error in errors.items():
+        warnings.warn(f"Skipping {file_name}: {error}")
+
+    # Explicit columns keep an empty folder (or one where every PDF fails) a valid empty table.
+    df = pd.DataFrame(data, columns=TEXT_COLUMNS + (['Content Hash'] if cache is not None else []))
+    settings = score_settings(text_preprocessing.PREPROCESS_SETTINGS, corpus_cosine, cosine_threshold,
+                              jaccard_threshold, levenshtein_min_similarity)
+    reusable_scores = None
+    if cache is not None:
+        reusable_scores = reusable_pair_scores(output_pickle_path, matrix_store_path(output_csv_path),
+                                               df['File Name'].tolist(), df['Content Hash'].tolist(), settings)
     df.to_pickle(output_pickle_path)
 
-    similarity_methods = ["Levenshtein", "Cosine", "Jaccard", "Hamming"]
-    for method in similarity_methods:
-        similarity_list = []
-        for i in range(len(df)):
-            for j in range(i + 1, len(df)):
-                file1_name, text1, preprocessed_text1 = df.iloc[i]['File Name'], df.iloc[i]['Text'], df.iloc[i]['Preprocessed Text']
-                file2_name, text2, preprocessed_text2 = df.iloc[j]['File Name'], df.iloc[j]['Text'], df.iloc[j]['Preprocessed Text']
-
-                similarity_normal_text = calculate_similarity(text1, text2, method)
-                similarity_preprocessed_text = calculate_similarity(preprocessed_text1, preprocessed_text2, method)
-
-                similarity_list.append({'File1': file1_name, 'File2': file2_name,
-                                        f'Similarity ({method}) (Normal Text)': similarity_normal_text,
-                                        f'Similarity ({method}) (Preprocessed Text)': similarity_preprocessed_text})
-
-        similarity_df_method = pd.DataFrame(similarity_list)
-        similarities.append(similarity_df_method)
-
-    final_similarity_df = pd.concat(similarities, axis=1)
-    final_similarity_df.to_csv(output_csv_path, index=False)
-
-# Example usage
-#change the path of the input folder as desired 
-input_folder_path = "C:\\Users\\sairaj.bai\\Desktop\\pdf2"
-output_pickle_path = 'output_all_similarities_text.pkl'
-output_csv_path = 'output_all_similarities_text.csv'
-process_folder(input_folder_path, output_pickle_path, output_csv_path)
+    # The previous store is read for reuse while the new one is written, so write it aside.
+    store = MatrixStore.create(matrix_store_path(output_csv_path) + ".new", df['File Name'], settings=settings)
+    with ChunkedResultWriter(result_path(output_csv_path, output_format), output_format, chunk_rows,
+                             result_columns(methods)) as writer:
+        for chunk in iter_text_pair_chunks(df, calculate_similarity, reusable_scores, corpus_cosine, jaccard_threshold,
+                                           minhash_store_path, levenshtein_min_similarity, workers,
+                                           methods=methods, chunk_rows=chunk_rows,
+                                           cosine_threshold=cosine_threshold):
+            writer.write(chunk)
+            store.write_frame(chunk)
+    if reusable_scores is not None:
+        reusable_scores.close()
+    store.move(matrix_store_path(output_csv_path))
+
+if __name__ == "__main__":
+    # Example usage
+    #change the path of the input folder as desired 
+    input_folder_path = "C:\\Users\\sairaj.bai\\Desktop\\pdf2"
+    output_pickle_path = 'output_all_similarities_text.pkl'
+    output_csv_path = 'output_all_similarities_text.csv'
+    process_folder(input_folder_path, output_pickle_path, output_csv_path)
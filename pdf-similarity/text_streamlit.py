@@ -1,18 +1,96 @@
+import os
+import tempfile
 import streamlit as st
 import pandas as pd
-from text_similarity import process_folder
+from similarity_index import INDEX_METHODS, SimilarityIndex
+from matrix_store import MatrixStore, matrix_store_path
+ 
+index_path = 'text_index.pkl'
+# Written by text_similarity.py; cli.py text writes similarities.csv in the input folder instead.
+default_csv_file_path = 'output_all_similarities_text.csv'
+ 
+@st.cache(allow_output_mutation=True)
+def load_index(path):
+    """
+    Load the similarity index once per Streamlit session.
+ 
+    Args:
+        path (str): Path of the index pickle file.
+ 
+    Returns:
+        SimilarityIndex: The loaded index.
+    """
+    return SimilarityIndex.load(path)
+ 
+@st.cache(allow_output_mutation=True)
+def load_store(path):
+    """
+    Open the similarity matrix store once per Streamlit session.
+ 
+    Args:
+        path (str): Path of the matrix store directory.
+ 
+    Returns:
+        MatrixStore: The store; scores are memory-mapped and read on demand.
+    """
+    return MatrixStore.open(path)
+ 
+def query_index_page():
+    """
+    Query the similarity index with an uploaded PDF and display its closest matches.
+    """
+    st.header("Find Similar PDFs")
+    if not os.path.exists(index_path):
+        st.warning(f"No similarity index found at {index_path}. Build one with similarity_index.build_index.")
+        return
+ 
+    index = load_index(index_path)
+    uploaded_pdf = st.file_uploader("Upload a PDF", type="pdf")
+    selected_method = st.selectbox("Select Similarity Method", INDEX_METHODS)
+    k = st.slider("Number of matches", min_value=1, max_value=max(1, min(50, len(index))), value=min(10, max(1, len(index))))
+ 
+    if uploaded_pdf is not None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temporary_pdf:
+            temporary_pdf.write(uploaded_pdf.getvalue())
+        try:
+            matches = index.query(temporary_pdf.name, k, selected_method)
+        finally:
+            os.remove(temporary_pdf.name)
+        st.subheader(f"Most Similar PDFs ({selected_method})")
+        st.dataframe(matches)
  
 def main():
     """
     Streamlit app for PDF Similarity Analysis.
  
-    Displays a DataFrame of PDF similarity results and allows users to select a similarity method.
+    Displays the similarity results of a selected PDF for a selected similarity method,
+    or queries the similarity index with a new PDF.
  
     """
     st.title("PDF Similarity Analysis App")
  
-    # Load CSV file
-    csv_file_path = 'text_lanstem.csv'
+    selected_page = st.sidebar.selectbox("Select Page", ["Similarity Results", "Query Index"])
+    if selected_page == "Query Index":
+        query_index_page()
+        return
+ 
+    csv_file_path = st.sidebar.text_input("Results CSV", default_csv_file_path)
+    store_path = matrix_store_path(csv_file_path)
+    if os.path.isdir(store_path):
+        # Load the matrix store; only the selected row is read from disk
+        store = load_store(store_path)
+        selected_method = st.selectbox("Select Similarity Method", store.metrics)
+        selected_file = st.selectbox("Select PDF", store.ids)
+ 
+        st.subheader(f"Similarity Results ({selected_method})")
+        st.dataframe(store.row_frame(selected_file, [selected_method]).sort_values(selected_method, ascending=False))
+        return
+ 
+    if not os.path.exists(csv_file_path):
+        st.warning(f"No similarity results found at {csv_file_path}. Run text_similarity.py (or cli.py text) first.")
+        return
+
+    # Load CSV file written before the matrix store existed
     df = pd.read_csv(csv_file_path)
  
     # Display CSV data
@@ -27,11 +105,7 @@ def main():
     st.dataframe(df[['File1', 'File2', selected_method]])
  
 if __name__ == "__main__":
-    # Define the paths for output files
-    output_pickle_path = 'text_lanstem.pkl'
-    output_csv_path = 'text_lanstem.csv'
-    # Change the path of the input folder as desired 
-    input_folder_path = r"C:\\Users\\sairaj.bai\\Desktop\\pdf2"
-    # Process the data and run the Streamlit app
-    process_folder(input_folder_path, output_pickle_path, output_csv_path)
+    # The results are produced by running text_similarity.py (or cli.py text) on the input folder;
+    # the app only reads them from the CSV path chosen in the sidebar, so launching it does not
+    # recompute anything.
     main()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import os
+
+from PIL import Image
+
+
+class ThumbnailStore:
+    """
+    On-disk store of fixed-size thumbnails next to the extracted images.
+
+    A thumbnail is rendered the first time it is requested and reused afterwards, so the
+    viewer does not decode and resize full images on every rerun.
+    """
+
+    def __init__(self, images_folder_path, size=(150, 150)):
+        """
+        Parameters:
+        - images_folder_path (str): Folder holding the extracted images.
+        - size (tuple): Thumbnail (width, height).
+        """
+        self.images_folder_path = images_folder_path
+        self.size = tuple(size)
+        self.thumbnails_path = os.path.join(images_folder_path, f".thumbnails_{self.size[0]}x{self.size[1]}")
+
+    def path(self, image_file):
+        """
+        Return the path of the thumbnail of an image, rendering it if it is missing or stale.
+
+        Parameters:
+        - image_file (str): Image file name inside images_folder_path.
+
+        Returns:
+        - str: Path of the PNG thumbnail.
+        """
+        image_path = os.path.join(self.images_folder_path, image_file)
+        thumbnail_path = os.path.join(self.thumbnails_path, f"{image_file}.png")
+        if not os.path.exists(thumbnail_path) or os.path.getmtime(thumbnail_path) < os.path.getmtime(image_path):
+            os.makedirs(self.thumbnails_path, exist_ok=True)
+            with Image.open(image_path) as image:
+                thumbnail = image.convert("RGB").resize(self.size)
+            temporary_path = f"{thumbnail_path}.tmp"
+            thumbnail.save(temporary_path, format="PNG")
+            os.replace(temporary_path, thumbnail_path)
+        return thumbnail_path
+
+    def load(self, image_file):
+        """
+        Return the thumbnail of an image as a PIL image.
+        """
+        with Image.open(self.path(image_file)) as thumbnail:
+            return thumbnail.copy()
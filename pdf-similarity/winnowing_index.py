@@ -0,0 +1,269 @@
+import hashlib
+import os
+import pickle
+import warnings
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from pdf_extraction import extract_folder, extract_pdf_pages
+from text_cache import TextCache, file_content_hash
+from text_preprocessing import PREPROCESS_SETTINGS, preprocess_text
+
+OVERLAP_COLUMNS = ['File Name', 'Query Start Page', 'Query End Page', 'Match Start Page', 'Match End Page',
+                   'Shared Fingerprints']
+
+
+def _shingle_hash(tokens):
+    return int.from_bytes(hashlib.blake2b(" ".join(tokens).encode(), digest_size=8).digest(), 'big')
+
+
+def winnow(preprocessed_text, k=5, window=4):
+    """
+    Select the winnowing fingerprints of a text.
+
+    The text is split into word k-gram shingles, each shingle is hashed, and the minimum hash of
+    every window of consecutive hashes is kept. Any shared passage of at least
+    ``k + window - 1`` words is guaranteed to share a fingerprint.
+
+    Parameters:
+    - preprocessed_text (str): Text as returned by preprocess_text.
+    - k (int): Number of words per shingle.
+    - window (int): Number of consecutive shingles per window.
+
+    Returns:
+    - set of int: The selected fingerprints.
+    """
+    tokens = preprocessed_text.split()
+    if not tokens:
+        return set()
+    hashes = [_shingle_hash(tokens[start:start + k]) for start in range(max(1, len(tokens) - k + 1))]
+    if len(hashes) <= window:
+        return {min(hashes)}
+    return {min(hashes[start:start + window]) for start in range(len(hashes) - window + 1)}
+
+
+def _page_ranges(page_pairs, gap=1):
+    # Chain (query page, match page, shared) triples that advance together into page ranges.
+    ranges = []
+    for query_page, match_page, shared in sorted(page_pairs):
+        for page_range in ranges:
+            if (0 <= query_page - page_range[1] <= gap and 0 <= match_page - page_range[3] <= gap):
+                page_range[1], page_range[3] = query_page, match_page
+                page_range[4] += shared
+                break
+        else:
+            ranges.append([query_page, query_page, match_page, match_page, shared])
+    return ranges
+
+
+class WinnowingIndex:
+    """
+    Inverted index from winnowing fingerprints to the pages they occur on.
+
+    Finds partial overlaps between documents, such as a few pages copied into a long report,
+    that whole-document similarity scores miss. Indexing a document and querying it are both
+    linear in its length; very common fingerprints (boilerplate) are ignored at query time.
+    """
+
+    def __init__(self, k=5, window=4):
+        """
+        Parameters:
+        - k (int): Number of words per shingle.
+        - window (int): Number of consecutive shingles per winnowing window.
+        """
+        self.k = k
+        self.window = window
+        self.pages = {}
+        self.metadata = {}
+        self.postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self.pages)
+
+    @property
+    def file_names(self):
+        return list(self.pages)
+
+    def add(self, file_name, preprocessed_pages, metadata=None):
+        """
+        Add or replace one document.
+
+        Parameters:
+        - file_name (str): Document name.
+        - preprocessed_pages (list of str): Preprocessed text of each page.
+        - metadata (dict or None): Extra information stored with the document.
+        """
+        if file_name in self.pages:
+            self.remove(file_name)
+        fingerprints = [winnow(page, self.k, self.window) for page in preprocessed_pages]
+        self.pages[file_name] = fingerprints
+        self.metadata[file_name] = metadata or {}
+        for page_number, page_fingerprints in enumerate(fingerprints):
+            for fingerprint in page_fingerprints:
+                self.postings[fingerprint].add((file_name, page_number))
+
+    def remove(self, file_name):
+        """
+        Remove one document from the index.
+        """
+        for page_number, page_fingerprints in enumerate(self.pages.pop(file_name)):
+            for fingerprint in page_fingerprints:
+                postings = self.postings[fingerprint]
+                postings.discard((file_name, page_number))
+                if not postings:
+                    del self.postings[fingerprint]
+        self.metadata.pop(file_name, None)
+
+    def _overlaps(self, fingerprints, exclude=None, min_shared=3, max_postings=50, gap=1):
+        matches = Counter()
+        for page_number, page_fingerprints in enumerate(fingerprints):
+            for fingerprint in page_fingerprints:
+                postings = self.postings.get(fingerprint)
+                if not postings or len(postings) > max_postings:
+                    continue
+                for file_name, match_page in postings:
+                    if file_name != exclude:
+                        matches[(file_name, page_number, match_page)] += 1
+
+        page_pairs = defaultdict(list)
+        for (file_name, page_number, match_page), shared in matches.items():
+            if shared >= min_shared:
+                page_pairs[file_name].append((page_number, match_page, shared))
+
+        rows = [[file_name, start + 1, end + 1, match_start + 1, match_end + 1, shared]
+                for file_name, pairs in page_pairs.items()
+                for start, end, match_start, match_end, shared in _page_ranges(pairs, gap)]
+        return pd.DataFrame(rows, columns=OVERLAP_COLUMNS).sort_values(
+            ['Shared Fingerprints', 'File Name'], ascending=[False, True], ignore_index=True)
+
+    def query_pages(self, preprocessed_pages, min_shared=3, max_postings=50, gap=1):
+        """
+        Find the page ranges of indexed documents that overlap the given pages.
+
+        Parameters:
+        - preprocessed_pages (list of str): Preprocessed text of each query page.
+        - min_shared (int): Minimum number of shared fingerprints for two pages to match.
+        - max_postings (int): Fingerprints found on more pages than this are ignored as boilerplate.
+        - gap (int): Number of pages a range may skip and still be continued.
+
+        Returns:
+        - pd.DataFrame: One row per overlapping range with 'File Name', the 1-based query and
+          match start and end pages and 'Shared Fingerprints', most shared first.
+        """
+        fingerprints = [winnow(page, self.k, self.window) for page in preprocessed_pages]
+        return self._overlaps(fingerprints, None, min_shared, max_postings, gap)
+
+    def query(self, pdf_path, min_shared=3, max_postings=50, gap=1):
+        """
+        Extract and preprocess one PDF page by page and find its overlaps with indexed documents.
+
+        Parameters:
+        - pdf_path (str): Path to the PDF file.
+        - min_shared (int): Minimum number of shared fingerprints for two pages to match.
+        - max_postings (int): Fingerprints found on more pages than this are ignored as boilerplate.
+        - gap (int): Number of pages a range may skip and still be continued.
+
+        Returns:
+        - pd.DataFrame: Overlapping page ranges, as returned by query_pages.
+        """
+        return self.query_pages([preprocess_text(page) for page in extract_pdf_pages(pdf_path)],
+                                min_shared, max_postings, gap)
+
+    def overlaps(self, min_shared=3, max_postings=50, gap=1):
+        """
+        Find the overlapping page ranges between every pair of indexed documents.
+
+        Each document is looked up in the inverted index once, so the cost grows with the corpus
+        size rather than with the number of document pairs.
+
+        Parameters:
+        - min_shared (int): Minimum number of shared fingerprints for two pages to match.
+        - max_postings (int): Fingerprints found on more pages than this are ignored as boilerplate.
+        - gap (int): Number of pages a range may skip and still be continued.
+
+        Returns:
+        - pd.DataFrame: 'File1' and 'File2' (File1 < File2), the 1-based page ranges in each and
+          'Shared Fingerprints'.
+        """
+        frames = []
+        for file_name, fingerprints in self.pages.items():
+            frame = self._overlaps(fingerprints, file_name, min_shared, max_postings, gap)
+            frame = frame[frame['File Name'] > file_name]
+            frame.insert(0, 'File1', file_name)
+            frames.append(frame.rename(columns={'File Name': 'File2', 'Query Start Page': 'File1 Start Page',
+                                                'Query End Page': 'File1 End Page',
+                                                'Match Start Page': 'File2 Start Page',
+                                                'Match End Page': 'File2 End Page'}))
+        columns = ['File1', 'File2', 'File1 Start Page', 'File1 End Page', 'File2 Start Page', 'File2 End Page',
+                   'Shared Fingerprints']
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def save(self, path):
+        """
+        Save the index to a pickle file.
+
+        Parameters:
+        - path (str): Destination path.
+        """
+        with open(path, 'wb') as file:
+            pickle.dump(self, file)
+
+    @staticmethod
+    def load(path):
+        """
+        Load an index saved with save.
+
+        Parameters:
+        - path (str): Path of the pickle file.
+
+        Returns:
+        - WinnowingIndex: Loaded index.
+        """
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+
+def build_winnowing_index(folder_path, index_path=None, workers=None, timeout=None, cache_dir=None, k=5, window=4):
+    """
+    Build or update a page-level winnowing index from every PDF in a folder.
+
+    With an existing index at index_path, only new or changed PDFs are re-indexed and PDFs that
+    left the folder are removed.
+
+    Parameters:
+    - folder_path (str): Path to the folder containing PDF files.
+    - index_path (str or None): Pickle file of the index; it is loaded if present and saved.
+    - workers (int or None): Number of processes used to extract and preprocess the PDFs.
+    - timeout (float or None): Maximum number of seconds spent on a single PDF.
+    - cache_dir (str or None): Directory of the content-addressed cache of preprocessed pages.
+    - k (int): Number of words per shingle of a new index.
+    - window (int): Number of consecutive shingles per winnowing window of a new index.
+
+    Returns:
+    - WinnowingIndex: The up-to-date index.
+    """
+    if index_path is not None and os.path.exists(index_path):
+        index = WinnowingIndex.load(index_path)
+    else:
+        index = WinnowingIndex(k, window)
+
+    cache = TextCache(cache_dir, settings=PREPROCESS_SETTINGS + ";pages") if cache_dir is not None else None
+    data, errors = extract_folder(folder_path, preprocess_text, workers, timeout, cache, pages=True)
+    for file_name, error in errors.items():
+        warnings.warn(f"Skipping {file_name}: {error}")
+
+    current = {row['File Name'] for row in data}
+    for file_name in [file_name for file_name in index.file_names if file_name not in current]:
+        index.remove(file_name)
+    for row in data:
+        file_path = os.path.join(folder_path, row['File Name'])
+        content_hash = row.get('Content Hash') or file_content_hash(file_path)
+        if index.metadata.get(row['File Name'], {}).get('Content Hash') != content_hash:
+            index.add(row['File Name'], row['Preprocessed Text'], {'Path': file_path, 'Content Hash': content_hash})
+
+    if index_path is not None:
+        index.save(index_path)
+    return index